@@ -269,26 +269,35 @@ def open_bank(direction) -> None:
 
     log.info("Attempting to open bank window.")
 
+    close_button = "./needles/buttons/close.png"
     tile_ranges = [
         f"./needles/game-screen/bank/bank-booth-{direction}-1-tile.png",
         f"./needles/game-screen/bank/bank-booth-{direction}-2-tiles.png",
     ]
-    # Try multiple times to open the bank window, while looping through 1-tile
-    #   and 2-tile distance versions of the needle.
+    # Try multiple times to open the bank window, using whichever of the
+    #   1-tile and 2-tile distance versions of the needle is visible.
     for _ in range(5):
-        for tile in tile_ranges:
-            try:
-                interface.enable_button(
-                    button_disabled=tile,
-                    button_disabled_region=vis.GAME_SCREEN,
-                    button_enabled="./needles/buttons/close.png",
-                    button_enabled_region=vis.GAME_SCREEN,
-                    loop_num=3,
-                    conf=0.85,
-                )
-                return
-            except start.NeedleError:
-                pass
+        try:
+            (tile, _) = vis.Vision(
+                region=vis.GAME_SCREEN, loop_num=2, conf=0.85
+            ).wait_for_any([close_button] + tile_ranges)
+        except start.NeedleError:
+            continue
+        if tile == close_button:
+            return
+
+        try:
+            interface.enable_button(
+                button_disabled=tile,
+                button_disabled_region=vis.GAME_SCREEN,
+                button_enabled=close_button,
+                button_enabled_region=vis.GAME_SCREEN,
+                loop_num=3,
+                conf=0.85,
+            )
+            return
+        except start.NeedleError:
+            pass
 
     raise start.BankingError("Unable to open bank window!")
 
@@ -422,6 +422,7 @@ def logout() -> None:
     banking.close_bank()
     open_side_stone("logout")
 
+    logged_out = "./needles/login-menu/orient-logged-out.png"
     logout_buttons = [
         # The standard logout button.
         "./needles/side-stones/logout/logout.png",
@@ -430,24 +431,32 @@ def logout() -> None:
         # The logout button when the world switcher is open.
         "./needles/side-stones/logout/logout-world-switcher.png",
     ]
-    # Try clicking on any one of the three possible logout buttons multiple
-    #   times, then wait to confirm the logout.
+    # Determine which one of the three possible logout buttons is visible and
+    #   try clicking on it multiple times, then wait to confirm the logout.
     for _ in range(3):
-        for button in logout_buttons:
-            try:
-                interface.enable_button(
-                    button_disabled=button,
-                    button_disabled_region=vis.SIDE_STONES,
-                    button_enabled="./needles/login-menu/orient-logged-out.png",
-                    button_enabled_region=vis.CLIENT,
-                    attempts=3,
-                    loop_num=15,
-                    conf=0.9,
-                )
-                return
-            # If we can't find the current button, just move on to the next one.
-            except start.NeedleError:
-                pass
+        try:
+            (button, _) = vis.Vision(
+                region=vis.SIDE_STONES, loop_num=2, conf=0.9
+            ).wait_for_any([(logged_out, vis.CLIENT)] + logout_buttons)
+        except start.NeedleError:
+            continue
+        if button == logged_out:
+            return
+
+        try:
+            interface.enable_button(
+                button_disabled=button,
+                button_disabled_region=vis.SIDE_STONES,
+                button_enabled=logged_out,
+                button_enabled_region=vis.CLIENT,
+                attempts=3,
+                loop_num=15,
+                conf=0.9,
+            )
+            return
+        # If the button changed before we could click on it, look again.
+        except start.NeedleError:
+            pass
     raise Exception("Could not logout!")
 
 
@@ -676,9 +685,10 @@ def travel(param_list, haystack_map, attempts=100) -> bool:
                            - A 2-tuple of the minimum and maximum number of
                              seconds to sleep before re-checking position
                              while going to that waypoint.
-        haystack_map (file): Filepath to the map to use to navigate.
-                             All waypoint coordinates are relative to
-                             this map.
+        haystack_map (file): Filepath to the map to use to navigate, or to
+                             the directory of a tiled map (see
+                             vision.TiledMap). All waypoint coordinates are
+                             relative to this map.
         attempts (int): The number of "walk" or "run" commands the function
                         will issue to the player before giving up.
 
@@ -692,7 +702,7 @@ def travel(param_list, haystack_map, attempts=100) -> bool:
 
     # Make sure file path is OS-agnostic.
     haystack_map = str(pathlib.Path(haystack_map))
-    haystack = cv2.imread(haystack_map, cv2.IMREAD_GRAYSCALE)
+    haystack = vis.MAPS.get(haystack_map)
 
     # Loop through each waypoint.
     # TODO: Change param_list to a dictionary so parameter names can be
@@ -710,7 +720,7 @@ def travel(param_list, haystack_map, attempts=100) -> bool:
                 return False
 
             # Find the minimap position within the haystack map.
-            coords = ocv_find_location(haystack)
+            coords = ocv_find_location(haystack, haystack_map)
             (
                 coords_map_left,
                 coords_map_top,
@@ -725,8 +735,7 @@ def travel(param_list, haystack_map, attempts=100) -> bool:
             # Get center of minimap coordinates within client.
             # Absolute coordinates are used rather than using an image
             #   search to speed things up.
-            coords_client_x = vis.CLIENT[0] + 642
-            coords_client_y = vis.CLIENT[1] + 85
+            (coords_client_x, coords_client_y) = vis.REGIONS.minimap_center
 
             # Figure out how far the waypoint is from the current location.
             waypoint_distance_x = waypoint[0] - coords_map_x
@@ -779,6 +788,12 @@ def travel(param_list, haystack_map, attempts=100) -> bool:
             else:
                 click_pos_y = coords_client_y + waypoint_distance_y + coord_rand
 
+            # The click's distance from the center of the minimap was
+            #   determined in haystack map pixels, which are larger on the
+            #   minimap of a scaled client.
+            click_pos_x = coords_client_x + round((click_pos_x - coords_client_x) * vis.SCALE)
+            click_pos_y = coords_client_y + round((click_pos_y - coords_client_y) * vis.SCALE)
+
             click_pos_y = abs(click_pos_y)
             click_pos_x = abs(click_pos_x)
             # Holding down CTRL while clicking will cause character to
@@ -805,10 +820,350 @@ def travel(param_list, haystack_map, attempts=100) -> bool:
     return True
 
 
-def ocv_find_location(haystack) -> tuple[int, int, int, int]:
+# The fastest the player moves across the haystack map, in pixels per
+#   second. Running covers 2 tiles per 0.6-second game tick, and a tile is
+#   4 pixels wide on the minimap.
+MINIMAP_MAX_SPEED = 15
+# Extra room around the player's furthest possible position to search
+#   within, in haystack map pixels.
+LOCALIZE_MARGIN = 8
+# The score below which a match of the minimap slice isn't trusted. The
+#   correct location typically scores above 0.7, other locations on the
+#   same map below 0.5.
+LOCALIZE_MIN_SCORE = 0.6
+# The number of consecutive positions estimated by odometry before the
+#   minimap slice is matched against the haystack map again.
+ODOMETRY_MAX_STEPS = 5
+# The phase correlation response below which an odometry estimate isn't
+#   trusted, e.g. because the camera was rotated.
+ODOMETRY_MIN_RESPONSE = 0.3
+# How far from an odometry estimate to look for the best match of the
+#   minimap slice, in haystack map pixels. This checks the estimate and
+#   corrects small errors before they can accumulate.
+ODOMETRY_TOLERANCE = 2
+
+
+class MinimapLocalizer:
+    """
+    Locates the minimap slice within a haystack map. After a trusted match,
+    the next search only covers the area the player could have moved to
+    since, which is much faster than matching the entire map. If the match
+    within that area isn't trusted, the entire map is searched instead.
+
+    With odometry enabled, the player's movement since the last minimap
+    slice is measured by phase correlation of the two slices instead, and
+    the slice is only matched within ODOMETRY_TOLERANCE pixels of the
+    resulting estimate, which is faster still. The slice is matched around
+    the last position again after ODOMETRY_MAX_STEPS estimates, or as soon
+    as an estimate isn't trusted.
+
+    Args:
+        odometry (bool): Whether to estimate the player's position by
+                         odometry between matches. Default is the
+                         `minimap_odometry` setting in the main config file.
+
+    """
+
+    def __init__(self, odometry: bool = None):
+        if odometry is None:
+            odometry = start.config["main"].get("minimap_odometry", False)
+        self.odometry = odometry
+        # The last trusted (left, top) match, the key of the map it was made
+        #   in, and the time.monotonic() time it was made at.
+        self.position = None
+        self.key = None
+        self.time = 0.0
+        # The previous minimap slice and the unrounded position estimated by
+        #   odometry, see _odometry().
+        self._previous = None
+        self._exact = (0.0, 0.0)
+        self._steps = 0
+        self._window = None
+        # Searches limited to the player's surroundings, and their total time.
+        self.windowed = 0
+        self.windowed_time = 0.0
+        # Searches of the entire map, and their total time.
+        self.searches = 0
+        self.search_time = 0.0
+        # Windowed searches that had to fall back to the entire map.
+        self.fallbacks = 0
+        # Positions estimated by odometry, their total time, and estimates
+        #   that weren't trusted.
+        self.odometry_steps = 0
+        self.odometry_time = 0.0
+        self.odometry_rejects = 0
+        # Number of seconds the last call to locate() took.
+        self.last_time = 0.0
+
+    def reset(self) -> None:
+        """
+        Forgets the player's position, so the next search covers the entire
+        map.
+
+        """
+        self.position = None
+        self._previous = None
+
+    def locate(
+        self, haystack: np.ndarray, needle: np.ndarray, key=None, now: float = None
+    ) -> tuple[tuple[int, int], float]:
+        """
+        Finds the best match of the needle within the haystack map.
+
+        Args:
+            haystack (ndarray): The grayscale haystack map, or a
+                                vision.TiledMap object. Only the tiles
+                                around the player's last position are
+                                searched, unless the entire map has to be.
+            needle (ndarray): The grayscale minimap slice.
+            key: Identifies the haystack map, e.g. its filepath. The player's
+                 position is only carried over between searches of the same
+                 map. Default is None, which uses the map's dimensions.
+            now (float): The time.monotonic() time at which the minimap
+                         slice was captured. Default is None, which uses the
+                         current time.
+
+        Returns:
+            Returns a 2-tuple of the (left, top) coordinates of the best match
+            within the haystack map and its score.
+
+        """
+        started = time.perf_counter()
+        if now is None:
+            now = time.monotonic()
+        if key is None:
+            key = haystack.shape
+
+        if self.position is not None and self.key == key:
+            match = self._odometry(haystack, needle)
+            if match is not None:
+                (position, score) = match
+                self.position = position
+                self.time = now
+                self.odometry_steps += 1
+                self.odometry_time += time.perf_counter() - started
+                self.last_time = time.perf_counter() - started
+                log.debug(
+                    "Odometry put minimap at %s with score %.2f in %.1f ms.",
+                    position,
+                    score,
+                    self.last_time * 1000,
+                )
+                return match
+
+        (position, score) = self._search(haystack, needle, key, now, started)
+        if score >= LOCALIZE_MIN_SCORE:
+            self.position = position
+            self.key = key
+            self.time = now
+            if self.odometry:
+                self._previous = needle.astype(np.float32)
+                self._exact = position
+                self._steps = 0
+        else:
+            self.reset()
+        self.last_time = time.perf_counter() - started
+        log.debug(
+            "Located minimap at %s with score %.2f in %.1f ms.",
+            position,
+            score,
+            self.last_time * 1000,
+        )
+        return position, score
+
+    def _odometry(self, haystack: np.ndarray, needle: np.ndarray):
+        """
+        Helper function that estimates the player's position from the shift
+        between the previous minimap slice and this one, then matches the
+        slice around the estimate.
+
+        Returns:
+            Returns a 2-tuple of the (left, top) coordinates of the best match
+            around the estimate and its score, or None if the estimate isn't
+            trusted or the slice should be matched around the last position
+            instead.
+
+        """
+        if (
+            self._previous is None
+            or self._steps >= ODOMETRY_MAX_STEPS
+            or self._previous.shape != needle.shape
+        ):
+            return None
+        current = needle.astype(np.float32)
+        if self._window is None or self._window.shape != current.shape:
+            self._window = cv2.createHanningWindow(
+                current.shape[::-1], cv2.CV_32F
+            )
+        ((shift_x, shift_y), response) = cv2.phaseCorrelate(
+            self._previous, current, self._window
+        )
+        if response < ODOMETRY_MIN_RESPONSE:
+            self.odometry_rejects += 1
+            return None
+
+        # The minimap moves in the opposite direction to the player.
+        (left, top) = (self._exact[0] - shift_x, self._exact[1] - shift_y)
+        (map_height, map_width) = haystack.shape[:2]
+        (height, width) = needle.shape[:2]
+        window_left = max(round(left) - ODOMETRY_TOLERANCE, 0)
+        window_top = max(round(top) - ODOMETRY_TOLERANCE, 0)
+        window_right = min(round(left) + ODOMETRY_TOLERANCE + width, map_width)
+        window_bottom = min(round(top) + ODOMETRY_TOLERANCE + height, map_height)
+        if window_right - window_left < width or window_bottom - window_top < height:
+            self.odometry_rejects += 1
+            return None
+        result = cv2.matchTemplate(
+            haystack[window_top:window_bottom, window_left:window_right],
+            needle,
+            cv2.TM_CCOEFF_NORMED,
+        )
+        (_, score, _, (x, y)) = cv2.minMaxLoc(result)
+        # A best match on the window's edge means the estimate is off by more
+        #   than the tolerance.
+        on_edge = (
+            (x == 0 and window_left > 0)
+            or (y == 0 and window_top > 0)
+            or (x == result.shape[1] - 1 and window_right < map_width)
+            or (y == result.shape[0] - 1 and window_bottom < map_height)
+        )
+        if score < LOCALIZE_MIN_SCORE or on_edge:
+            self.odometry_rejects += 1
+            return None
+        position = (window_left + x, window_top + y)
+        # Keep the fraction of a pixel the shift was measured to, unless the
+        #   match corrected the estimate.
+        if position != (round(left), round(top)):
+            (left, top) = position
+        self._previous = current
+        self._exact = (left, top)
+        self._steps += 1
+        return position, score
+
+    def _search(
+        self,
+        haystack: np.ndarray,
+        needle: np.ndarray,
+        key,
+        now: float,
+        started: float,
+    ) -> tuple[tuple[int, int], float]:
+        """
+        Helper function that matches the minimap slice around the player's
+        last position, or within the entire map.
+
+        """
+        (map_height, map_width) = haystack.shape[:2]
+        (height, width) = needle.shape[:2]
+
+        if self.position is not None and self.key == key:
+            radius = int(MINIMAP_MAX_SPEED * (now - self.time)) + LOCALIZE_MARGIN
+            (left, top) = self.position
+            window_left = max(left - radius, 0)
+            window_top = max(top - radius, 0)
+            window_right = min(left + radius + width, map_width)
+            window_bottom = min(top + radius + height, map_height)
+            window_width = window_right - window_left
+            window_height = window_bottom - window_top
+            # Once the player could be anywhere, searching the window is no
+            #   faster than searching the entire map. Tiled maps are searched
+            #   one tile at a time instead of opening more tiles at once
+            #   than can be kept open.
+            if window_width * window_height < (map_width * map_height) / 2 and (
+                not isinstance(haystack, vis.TiledMap)
+                or len(
+                    haystack.tiles_within(
+                        window_left, window_top, window_width, window_height
+                    )
+                )
+                <= haystack.tiles.size
+            ):
+                result = cv2.matchTemplate(
+                    haystack[window_top:window_bottom, window_left:window_right],
+                    needle,
+                    cv2.TM_CCOEFF_NORMED,
+                )
+                (_, score, _, (x, y)) = cv2.minMaxLoc(result)
+                # A best match on the window's edge may be outdone by a match
+                #   just outside of it.
+                on_edge = (
+                    (x == 0 and window_left > 0)
+                    or (y == 0 and window_top > 0)
+                    or (x == result.shape[1] - 1 and window_right < map_width)
+                    or (y == result.shape[0] - 1 and window_bottom < map_height)
+                )
+                if score >= LOCALIZE_MIN_SCORE and not on_edge:
+                    self.windowed += 1
+                    self.windowed_time += time.perf_counter() - started
+                    return (window_left + x, window_top + y), score
+                self.fallbacks += 1
+
+        if isinstance(haystack, vis.TiledMap):
+            (position, score) = haystack.match(needle)
+        else:
+            result = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+            (_, score, _, position) = cv2.minMaxLoc(result)
+        self.searches += 1
+        self.search_time += time.perf_counter() - started
+        return position, score
+
+    def clear(self) -> None:
+        """
+        Forgets the player's position and resets the statistics.
+
+        """
+        self.reset()
+        self.windowed = 0
+        self.windowed_time = 0.0
+        self.searches = 0
+        self.search_time = 0.0
+        self.fallbacks = 0
+        self.odometry_steps = 0
+        self.odometry_time = 0.0
+        self.odometry_rejects = 0
+        self.last_time = 0.0
+
+    def stats(self) -> dict:
+        """
+        Reports how often searches were limited to the player's surroundings
+        or replaced by odometry, and how long each took.
+
+        Returns:
+            Returns a dict containing the number of odometry estimates,
+            windowed and full-map searches, the number of odometry estimates
+            that weren't trusted, the number of windowed searches that fell
+            back to the full map, and the average and latest times in
+            milliseconds. Fallbacks are included in the full-map times.
+
+        """
+        return {
+            "odometry": self.odometry_steps,
+            "windowed": self.windowed,
+            "full_map": self.searches,
+            "odometry_rejects": self.odometry_rejects,
+            "fallbacks": self.fallbacks,
+            "avg_odometry_ms": (
+                (self.odometry_time / self.odometry_steps) * 1000
+                if self.odometry_steps
+                else 0.0
+            ),
+            "avg_windowed_ms": (
+                (self.windowed_time / self.windowed) * 1000 if self.windowed else 0.0
+            ),
+            "avg_full_map_ms": (
+                (self.search_time / self.searches) * 1000 if self.searches else 0.0
+            ),
+            "last_ms": self.last_time * 1000,
+        }
+
+
+LOCALIZER = MinimapLocalizer()
+
+
+def ocv_find_location(haystack, key=None) -> tuple[int, int, int, int]:
     """
     OpenCV helper function used by travel() to find the minimap within
-    the haystack map.
+    the haystack map, see MinimapLocalizer.
 
     Currently hard-coded to using the travel() function, so it's not
     very flexible.
@@ -816,16 +1171,26 @@ def ocv_find_location(haystack) -> tuple[int, int, int, int]:
     Args:
         haystack: The haystack to match the needle within. Must be
                   an OpenCV vision object.
+        key: Identifies the haystack map, see MinimapLocalizer.locate().
+             Default is None.
 
     Returns:
         Returns the (left, top, width, height) coordinates of the
         needle within the haystack.
 
     """
-    needle = pag.screenshot(region=vis.MINIMAP_SLICE)
-    needle = cv2.cvtColor(np.array(needle), cv2.COLOR_RGB2GRAY)
-    w, h = needle.shape[::-1]
-    result = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
-    loc = cv2.minMaxLoc(result)
-    match = loc[3]
-    return match[0], match[1], w, h
+    needle = vis.get_haystack(vis.MINIMAP_SLICE)
+    # How far the player may have run depends on when the minimap slice was
+    #   captured, not when it's searched.
+    captured = vis.frame_time()
+    needle = cv2.cvtColor(needle, cv2.COLOR_BGR2GRAY)
+    # Haystack maps are captured from the unscaled client.
+    if vis.SCALE != 1.0:
+        needle = cv2.resize(
+            needle,
+            (vis.MINIMAP_SLICE_WIDTH, vis.MINIMAP_SLICE_HEIGHT),
+            interpolation=cv2.INTER_AREA,
+        )
+    h, w = needle.shape
+    ((left, top), _) = LOCALIZER.locate(haystack, needle, key, now=captured)
+    return left, top, w, h
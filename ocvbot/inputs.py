@@ -3,8 +3,10 @@
 Controls the mouse and keyboard.
 
 """
+import collections
 import logging as log
 import random as rand
+import time
 
 import pyautogui as pag
 import pyclick as pyc
@@ -13,6 +15,33 @@ from ocvbot import misc
 # initialize HumanClicker object
 hc = pyc.HumanClicker()
 
+# Incremented every time an input is sent to the client. Used by vision.py to
+#   determine if its shared frame of the client is still current.
+input_count = 0
+# The time.monotonic() time at which the last input was sent.
+last_input_time = 0.0
+# The number of recent inputs kept in input_history.
+INPUT_HISTORY_SIZE = 64
+# The most recent inputs as (time.monotonic() time, action) tuples, oldest
+#   first. Saved by vision.py's flight recorder when the bot crashes.
+input_history = collections.deque(maxlen=INPUT_HISTORY_SIZE)
+
+
+def count_input(action: str = "") -> None:
+    """
+    Records that an input has been sent to the client, which invalidates any
+    frame of the client captured before it.
+
+    Args:
+        action (str): A short description of the input, for input_history.
+                      Default is an empty string.
+
+    """
+    global input_count, last_input_time
+    input_count += 1
+    last_input_time = time.monotonic()
+    input_history.append((last_input_time, action))
+
 
 class Mouse:
     """
@@ -100,6 +129,7 @@ class Mouse:
         y_coord = rand.randint(top, (top + height))
 
         hc.move((x_coord, y_coord), self.move_duration())
+        count_input(f"move to {x_coord},{y_coord}")
         return True
 
     def moverel(self) -> bool:
@@ -137,6 +167,7 @@ class Mouse:
             y_destination = y_position - y_distance
 
         hc.move((x_destination, y_destination), self.move_duration())
+        count_input(f"move to {x_destination},{y_destination}")
         return True
 
     def move_duration(self) -> float:
@@ -178,6 +209,7 @@ class Mouse:
             pag.click(button=self.button, duration=duration)
         else:
             pag.click(button=self.button)
+        count_input(f"click {self.button}")
 
         # Random sleep after click.
         misc.sleep_rand(sleep_min=self.sleep_range[2], sleep_max=self.sleep_range[3])
@@ -252,5 +284,6 @@ class Keyboard:
             sleep_max=self.action_duration_range[1],
         )
         pag.keyUp(key)
+        count_input(f"press {key}")
         misc.sleep_rand(sleep_min=self.sleep_range[2], sleep_max=self.sleep_range[3])
         return True
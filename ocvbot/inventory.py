@@ -0,0 +1,223 @@
+# coding=UTF-8
+"""
+Functions and classes for reading the contents of the player's inventory.
+
+"""
+import logging as log
+import zlib
+
+import cv2
+import numpy as np
+from ocvbot import vision as vis
+
+# Slot states other than an item's filepath.
+EMPTY = None
+UNKNOWN = "unknown"
+
+# Needle of the empty inventory, used to determine if a slot is empty.
+EMPTY_INVENTORY = "./needles/side-stones/inventory/empty-inventory.png"
+# Offset of the empty inventory needle relative to the top left corner of INV.
+EMPTY_INVENTORY_LEFT = 11
+EMPTY_INVENTORY_TOP = 6
+# The difference in any channel above which a pixel of a slot is considered
+#   to differ from the same pixel of the empty inventory.
+EMPTY_THRESHOLD = 30
+# The maximum number of differing pixels for a slot to be considered empty.
+#   An item's mean difference is diluted by the background around it, so
+#   small or dark items (e.g. a hammer) are counted rather than averaged.
+EMPTY_MAX_PIXELS = 10
+
+# Classifications of previously seen slots, keyed by a checksum of the slot's
+#   pixels and the settings used to classify it. The same item in the same
+#   slot always looks the same, so most slots are classified by a lookup.
+_classifications: dict[tuple, str] = {}
+_CLASSIFICATIONS_MAX = 4096
+
+
+def slot_offset(slot: int) -> tuple[int, int]:
+    """
+    Gets the position of an inventory slot relative to the top left corner
+    of INV, scaled by vis.SCALE.
+
+    Args:
+        slot (int): The slot's index, from 0 to 27. Slots are numbered left
+                    to right, then top to bottom.
+
+    Returns:
+        Returns a 2-tuple of the slot's (left, top) offset.
+
+    """
+    (row, column) = divmod(slot, vis.INV_COLUMNS)
+    return (
+        round((vis.INV_SLOT_LEFT + (column * vis.INV_SLOT_X_SPACING)) * vis.SCALE),
+        round((vis.INV_SLOT_TOP + (row * vis.INV_SLOT_Y_SPACING)) * vis.SCALE),
+    )
+
+
+def slot_size() -> tuple[int, int]:
+    """
+    Gets the size of an inventory slot, scaled by vis.SCALE.
+
+    Returns:
+        Returns a 2-tuple of the slot's width and height.
+
+    """
+    return round(vis.INV_SLOT_WIDTH * vis.SCALE), round(vis.INV_SLOT_HEIGHT * vis.SCALE)
+
+
+def slot_region(slot: int) -> tuple[int, int, int, int]:
+    """
+    Gets the region of an inventory slot, relative to the display.
+
+    Args:
+        slot (int): See slot_offset().
+
+    Returns:
+        Returns a (left, top, width, height) 4-tuple.
+
+    """
+    return vis.REGIONS.inv_slots[slot]
+
+
+class Inventory:
+    """
+    A snapshot of the player's inventory. Every slot is cut from a single
+    capture of INV and classified once, so counting or locating any number
+    of items costs one capture and at most 28 small comparisons per item,
+    rather than one search of the whole inventory per item.
+
+    The inventory side stone must be open.
+
+    Args:
+        items (list): Filepaths to needles of the items to look for, as they
+                      appear in the player's inventory.
+        conf (float): Confidence required to classify a slot as one of the
+                      items. If a slot matches several items, the best match
+                      is used. Default is 0.95.
+
+    Examples:
+        Count iron ore and uncut sapphires with a single capture:
+            inventory = Inventory(["./needles/items/iron-ore.png",
+                                   "./needles/items/uncut-sapphire.png"])
+            inventory.count("./needles/items/iron-ore.png")
+
+    """
+
+    def __init__(self, items: list, conf: float = 0.95):
+        self.items = list(items)
+        self.conf = conf
+        haystack = vis.get_haystack(vis.INV)
+        # Each slot is either EMPTY, UNKNOWN, or the filepath of an item.
+        self.slots = [self._classify(haystack, slot) for slot in range(28)]
+        log.debug("Inventory contents: %s", self.counts())
+
+    def _classify(self, haystack: np.ndarray, slot: int):
+        """
+        Helper function that determines what a single slot contains.
+
+        """
+        (left, top) = slot_offset(slot)
+        (width, height) = slot_size()
+        slot_image = haystack[top : top + height, left : left + width]
+        key = (
+            zlib.crc32(np.ascontiguousarray(slot_image)),
+            slot,
+            tuple(self.items),
+            self.conf,
+        )
+        if key in _classifications:
+            return _classifications[key]
+
+        best_score = self.conf
+        contents = UNKNOWN
+        for item in self.items:
+            needle = vis.NEEDLES.get(item)
+            if needle.height > height or needle.width > width:
+                continue
+            result = vis.match_template(needle.color, slot_image, needle.mask)
+            score = float(result.max())
+            if score > best_score:
+                (best_score, contents) = (score, item)
+
+        if contents == UNKNOWN and self._is_empty(slot_image, slot):
+            contents = EMPTY
+
+        if len(_classifications) >= _CLASSIFICATIONS_MAX:
+            _classifications.clear()
+        _classifications[key] = contents
+        return contents
+
+    @staticmethod
+    def _is_empty(slot_image: np.ndarray, slot: int) -> bool:
+        """
+        Helper function that compares a slot to the same slot of the empty
+        inventory.
+
+        """
+        (left, top) = slot_offset(slot)
+        (width, height) = slot_size()
+        left -= round(EMPTY_INVENTORY_LEFT * vis.SCALE)
+        top -= round(EMPTY_INVENTORY_TOP * vis.SCALE)
+        empty_slot = vis.NEEDLES.get(EMPTY_INVENTORY).color[
+            top : top + height, left : left + width
+        ]
+        # Rounding the scaled offsets may cut the last row or column of the
+        #   rescaled empty inventory short.
+        if empty_slot.shape != slot_image.shape:
+            empty_slot = cv2.resize(empty_slot, (slot_image.shape[1], slot_image.shape[0]))
+        difference = cv2.absdiff(slot_image, empty_slot).max(axis=2)
+        return int(np.count_nonzero(difference > EMPTY_THRESHOLD)) <= EMPTY_MAX_PIXELS
+
+    def count(self, item: str) -> int:
+        """
+        Returns the number of slots containing the given item.
+
+        """
+        return self.slots.count(item)
+
+    def counts(self) -> dict:
+        """
+        Returns a dict mapping each item to the number of slots containing
+        it. Includes counts for UNKNOWN and EMPTY slots.
+
+        """
+        counts = {item: 0 for item in self.items}
+        counts[UNKNOWN] = 0
+        counts[EMPTY] = 0
+        for contents in self.slots:
+            counts[contents] += 1
+        return counts
+
+    def positions(self, item: str) -> list:
+        """
+        Returns a list of the regions of the slots containing the given
+        item, relative to the display. Each region can be passed directly to
+        inputs.Mouse to click on the item.
+
+        """
+        return [
+            slot_region(slot)
+            for (slot, contents) in enumerate(self.slots)
+            if contents == item
+        ]
+
+    def free_slots(self) -> list:
+        """
+        Returns a list of the indexes of all empty slots.
+
+        """
+        return [slot for (slot, contents) in enumerate(self.slots) if contents is EMPTY]
+
+    def is_full(self) -> bool:
+        """
+        Returns True if there are no empty slots, returns False otherwise.
+
+        """
+        return EMPTY not in self.slots
+
+    def is_empty(self) -> bool:
+        """
+        Returns True if every slot is empty, returns False otherwise.
+
+        """
+        return all(contents is EMPTY for contents in self.slots)
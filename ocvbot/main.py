@@ -13,6 +13,7 @@ See `docs/scenarios/` for the required client configuration settings in
 each scenario.
 
 """
+import atexit
 import glob
 import logging as log
 import os
@@ -37,11 +38,23 @@ sys.path.insert(1, SCRIPTPATH)
 
 from ocvbot import banking
 from ocvbot import behavior
+from ocvbot import inventory
 from ocvbot import misc
 from ocvbot import skills
 from ocvbot import startup as start
 from ocvbot import vision as vis
 
+# Needles used by every script, regardless of scenario. These are decoded
+#   once at startup so the first search for each one doesn't have to.
+COMMON_NEEDLES = (
+    "./needles/bank/",
+    "./needles/buttons/",
+    "./needles/chat-menu/",
+    "./needles/login-menu/",
+    "./needles/minimap/",
+    "./needles/side-stones/",
+)
+
 
 def miner(scenario: str, loops: int = 10000) -> None:
     """
@@ -144,6 +157,16 @@ def miner(scenario: str, loops: int = 10000) -> None:
     else:
         raise ValueError("Scenario not supported!")
 
+    vis.NEEDLES.preload(
+        prefix,
+        ore,
+        "./needles/items/uncut-sapphire.png",
+        "./needles/items/uncut-emerald.png",
+        "./needles/items/uncut-ruby.png",
+        "./needles/items/uncut-diamond.png",
+        "./needles/items/clue-geode.png",
+    )
+
     # MAIN FUNCTION LOOP --------------------------------------------------------------------------
 
     for _ in range(loops):
@@ -179,7 +202,8 @@ def miner(scenario: str, loops: int = 10000) -> None:
 
             misc.session_duration(human_readable=True)
         # Logout when anything else unexpected occurs.
-        except (Exception, start.InefficientUseOfInventory):
+        except (Exception, start.InefficientUseOfInventory) as error:
+            vis.RECORDER.dump(error)
             behavior.logout()
 
 
@@ -199,6 +223,7 @@ def alchemist(alch_item_type, loops: int = 10000) -> None:
         target = "./needles/items/bank-note.png"
     else:
         target = f"./needles/items/{alch_item_type}.png"
+    vis.NEEDLES.preload(spell, target)
 
     behavior.open_side_stone("spellbook")
     for _ in range(loops):
@@ -251,6 +276,7 @@ def spellcaster(scenario: str, loops: int = 10000) -> None:
     else:
         raise ValueError("Scenario not supported!")
 
+    vis.NEEDLES.preload(spell, target)
     behavior.open_side_stone("spellbook")
     for _ in range(loops):
         skills.Magic(
@@ -301,6 +327,12 @@ def chef(item: str, location: str, loops: int = 10000) -> None:
     haystack_map = f"./haystacks/{location}.png"
     item_inv = f"./needles/items/{item}.png"
     item_bank = f"./needles/items/{item}-bank.png"
+    vis.NEEDLES.preload(
+        heat_source,
+        item_inv,
+        item_bank,
+        "./needles/game-screen/staff-of-water-top.png",
+    )
 
     for _ in range(loops):
         try:
@@ -322,8 +354,9 @@ def chef(item: str, location: str, loops: int = 10000) -> None:
             behavior.logout_break_range()
             misc.session_duration(human_readable=True)
 
-        except Exception:
+        except Exception as error:
             print(traceback.format_exc())
+            vis.RECORDER.dump(error)
             behavior.logout()
             return
     return
@@ -368,6 +401,14 @@ def smith(bar: str, item: str, location: str, loops: int = 10000):
     else:
         raise Exception("Unsupported value of item!")
 
+    vis.NEEDLES.preload(
+        anvil,
+        bar,
+        item,
+        "./needles/items/hammer-bank.png",
+        "./needles/items/hammer.png",
+    )
+
     behavior.open_side_stone("inventory")
     for _ in range(loops):
         if location == "varrock":
@@ -395,7 +436,7 @@ def smith(bar: str, item: str, location: str, loops: int = 10000):
         misc.sleep_rand_roll(chance_range=(20, 30))
 
         # Check if we withdrew a full inventory of bars. Stop script if we didn't
-        bars_in_inventory = vis.Vision(region=vis.INV, needle=bar).count_needles()
+        bars_in_inventory = inventory.Inventory([bar]).count(bar)
         if bars_in_inventory != 27:
             log.warning("Out of bars, stopping script.")
             return
@@ -431,13 +472,31 @@ def cleanup():
 script = start.config["main"]["script"]
 
 
+def excepthook(error_type, error, error_traceback) -> None:
+    """
+    Writes a crash report before the bot exits on an unhandled exception.
+    Stopping the bot with Ctrl-C isn't a crash, so no report is written.
+
+    """
+    if not issubclass(error_type, KeyboardInterrupt):
+        vis.RECORDER.dump(error)
+    sys.__excepthook__(error_type, error, error_traceback)
+
+
 def main():
     """
     Calls the main botting script defined in the config file.
 
     """
+    sys.excepthook = excepthook
     cleanup()
+    vis.NEEDLES.preload(*COMMON_NEEDLES)
     vis.init()
+    # Save what was learned about the client even if the script crashes, so
+    #   the next run can start where this one left off.
+    atexit.register(vis.CALIBRATION.save)
+    if vis.PRODUCER.fps > 0:
+        vis.PRODUCER.start()
 
     if script == "mining":
         miner(start.config[script]["location"])
@@ -468,6 +527,15 @@ def main():
         log.critical("Unknown value provided for 'script' key in config file!")
         raise RuntimeError("Unknown value provided for 'script' key in config file!")
 
+    log.info("Needle registry stats: %s", vis.NEEDLES.stats())
+    log.info("Needle location hint stats: %s", vis.HINTS.stats())
+    log.info("Change detection stats: %s", vis.CHANGES.stats())
+    log.info("Wait stats: %s", vis.WAITS.stats())
+    log.info("Client watchdog stats: %s", vis.WATCHDOG.stats())
+    log.info("Frame producer stats: %s", vis.PRODUCER.stats())
+    log.info("Flight recorder stats: %s", vis.RECORDER.stats())
+    log.info("Haystack map stats: %s", vis.MAPS.stats())
+    log.info("Minimap localization stats: %s", behavior.LOCALIZER.stats())
     cleanup()
     sys.exit(0)
 
@@ -3,15 +3,33 @@
 Contains all functions related to training skills.
 
 """
+import asyncio
 import logging as log
 
 from ocvbot import behavior
 from ocvbot import inputs
+from ocvbot import inventory
 from ocvbot import misc
 from ocvbot import startup as start
 from ocvbot import vision as vis
 
 
+# The maximum number of seconds to wait for an inventory of items to be
+#   cooked or smithed.
+PROCESSING_TIMEOUT = 180
+
+
+def level_up_appears():
+    """
+    Creates a predicate for vis.first_of() that checks for a level-up
+    message in the chat menu.
+
+    """
+    return vis.Vision(
+        region=vis.CHAT_MENU, needle="./needles/chat-menu/level-up.png"
+    ).appears()
+
+
 def wait_for_level_up(wait_time: int):
     """
     Waits the specified number of seconds for a level-up message to
@@ -20,7 +38,7 @@ def wait_for_level_up(wait_time: int):
     Args:
         wait_time: Approximately the number of seconds to wait for a
                    level-up message to appear. Checks for a level-up
-                   message about once every second.
+                   message at least once every second.
 
     Returns:
         If a level-up message appears, returns True.
@@ -29,14 +47,11 @@ def wait_for_level_up(wait_time: int):
     """
     log.debug("Checking for level-up")
     try:
-        vis.Vision(
-            region=vis.CHAT_MENU,
-            needle="./needles/chat-menu/level-up.png",
-            loop_num=wait_time,
-            loop_sleep_range=(900, 1100),
-        ).wait_for_needle()
+        vis.wait_until(
+            level_up_appears(), timeout=wait_time, poll_max=1, description="a level-up"
+        )
         return True
-    except start.NeedleError:
+    except start.TimeoutException:
         return False
 
 
@@ -115,24 +130,24 @@ class Cooking:
         #   bright blue "Staff of Water" orb to re-appear (equipped weapons
         #   disappear while cooking food). The player must have this item
         #   equipped.
-        for _ in range(1, 60):
-            misc.sleep_rand(1000, 3000)
-            level_up = wait_for_level_up(1)
-            # If the player levels-up while cooking, restart cooking.
-            if level_up is True:
-                self.cook_item()
-            try:
-                # Check if cooking has finished.
-                vis.Vision(
-                    region=vis.GAME_SCREEN,
-                    needle="./needles/game-screen/staff-of-water-top.png",
-                    conf=0.9,
-                    loop_num=1,
-                ).wait_for_needle()
-                log.info("Cooking is done.")
-                break
-            except start.NeedleError:
-                pass
+        level_up = level_up_appears()
+        cooking_done = vis.Vision(
+            region=vis.GAME_SCREEN,
+            needle="./needles/game-screen/staff-of-water-top.png",
+            conf=0.9,
+        ).appears()
+        try:
+            (condition, _) = asyncio.run(
+                vis.first_of(level_up, cooking_done, timeout=PROCESSING_TIMEOUT)
+            )
+        except start.TimeoutException:
+            log.warning("Timed out waiting for cooking to finish.")
+            return True
+
+        # If the player levels-up while cooking, restart cooking.
+        if condition is level_up:
+            return self.cook_item()
+        log.info("Cooking is done.")
         return True
 
 
@@ -318,30 +333,6 @@ class Mining:
         self.drop_clue_geode = drop_clue_geode
         self.conf = conf
 
-    def _is_inventory_full(self) -> bool:
-        """
-        Helper function to determine if the player's inventory is full. Looks
-        for a "your inventory is too full to hold any more resources" chat
-        message.
-
-        Returns:
-          Returns True if the player's inventory is full,
-          returns False otherwise.
-        """
-        log.debug("Checking for full inventory.")
-        try:
-            vis.Vision(
-                region=vis.CHAT_MENU,
-                loop_num=3,
-                needle="./needles/chat-menu/mining-inventory-full.png",
-                conf=0.85,
-            ).wait_for_needle()
-            log.debug("Inventory full.")
-            return True
-        except start.NeedleError:
-            log.debug("Inventory not full.")
-            return False
-
     def _mine_rock(self, rock_full_needle, rock_empty_needle) -> None:
         """
         Helper function to mine a given rock until it's been depleted.
@@ -372,24 +363,24 @@ class Mining:
         # Wait until the rock is empty or the inventory is full.
         # Check for both at the same time since some rocks (e.g. in Camdozaal Mine)
         #   provide multiple ore and may create a full inventory before the rock
-        #   is empty.
+        #   is empty. The full inventory message takes priority.
+        inventory_full = "./needles/chat-menu/mining-inventory-full.png"
         for _ in range(20):
-
-            if self._is_inventory_full() is True:
-                raise start.InventoryFull("Inventory is full!")
-
             try:
-                vis.Vision(
+                (needle, _) = vis.Vision(
                     region=vis.GAME_SCREEN,
                     loop_num=3,
                     conf=self.conf,
-                    needle=rock_empty_needle,
                     loop_sleep_range=(100, 600),
-                ).wait_for_needle()
-                log.info("Rock has been mined.")
-                return
+                ).wait_for_any([(inventory_full, vis.CHAT_MENU), rock_empty_needle])
             except start.NeedleError:
-                pass
+                continue
+
+            if needle == inventory_full:
+                log.debug("Inventory full.")
+                raise start.InventoryFull("Inventory is full!")
+            log.info("Rock has been mined.")
+            return
         raise start.TimeoutException("Timeout waiting for rock to be mined!")
 
     def mine_multiple_rocks(self) -> None:
@@ -437,16 +428,6 @@ class Mining:
         """
         behavior.open_side_stone("inventory")
 
-        # Raise an error if we have <=5 ores in the inventory, as it's very
-        #   inefficient to mine with an inventory so small.
-        ores_in_inventory = vis.Vision(region=vis.INV, needle=self.ore).count_needles()
-        if ores_in_inventory <= 5:
-            raise start.InefficientUseOfInventory(
-                "Free inventory too small! Must have at least 6 free spaces!"
-            )
-
-        behavior.drop_item(item=self.ore)
-
         # Iterate through the other items that could be dropped. If any of them
         #   is true, drop that item.
         non_ore_items = [
@@ -471,11 +452,26 @@ class Mining:
                 "./needles/items/clue-geode.png",
             ),
         ]
-        for item in non_ore_items:
-            (drop_item_bool, path) = item
-            if drop_item_bool is True:
-                behavior.drop_item(item=str(path))
-                return
+        items_to_drop = [
+            path for (drop_item_bool, path) in non_ore_items if drop_item_bool
+        ]
+
+        # Take a single snapshot of the inventory to count the ore and every
+        #   other item we might drop.
+        contents = inventory.Inventory([self.ore] + items_to_drop)
+
+        # Raise an error if we have <=5 ores in the inventory, as it's very
+        #   inefficient to mine with an inventory so small.
+        if contents.count(self.ore) <= 5:
+            raise start.InefficientUseOfInventory(
+                "Free inventory too small! Must have at least 6 free spaces!"
+            )
+
+        behavior.drop_item(item=self.ore)
+
+        for item in items_to_drop:
+            if contents.count(item) > 0:
+                behavior.drop_item(item=str(item))
         return
 
 
@@ -561,30 +557,34 @@ class Smithing:
         ).click_needle()
         log.info("Smithing...")
 
+        # Based the number of bars we need to smith the current item, we'll
+        #   end up with a different number of bars leftover.
+        if self.bars_required == 5:
+            bars_leftover = 2
+        elif self.bars_required == 2:
+            bars_leftover = 1
+        else:
+            bars_leftover = 0
+
+        # We're done smithing when the number of bars in our inventory is
+        #   equal to bars_leftover.
+        def bars_gone():
+            bars_remaining = inventory.Inventory([self.bar_type], conf=0.9).count(
+                self.bar_type
+            )
+            return bars_remaining <= bars_leftover
+
         # Wait for either a level-up or for smithing to finish.
-        for _ in range(1, 60):
-            misc.sleep_rand(1000, 3000)
-
-            # Based the number of bars we need to smith the current item, we'll
-            #   end up with a different number of bars leftover.
-            if self.bars_required == 5:
-                bars_leftover = 2
-            elif self.bars_required == 2:
-                bars_leftover = 1
-            else:
-                bars_leftover = 0
-
-            # We're done smithing when the number of bars in our inventory is
-            #   equal to bars_leftover.
-            bars_remaining = vis.Vision(
-                region=vis.INV, needle=self.bar_type, conf=0.9
-            ).count_needles()
-            if bars_remaining <= bars_leftover:
-                log.info("Done smithing.")
-                return True
-
-            # If the player levels-up while smithing, restart.
-            if wait_for_level_up(1) is True:
-                self.smith_items()
+        level_up = level_up_appears()
+        try:
+            (condition, _) = asyncio.run(
+                vis.first_of(level_up, bars_gone, timeout=PROCESSING_TIMEOUT)
+            )
+        except start.TimeoutException:
+            return False
 
-        return False
+        # If the player levels-up while smithing, restart.
+        if condition is level_up:
+            return self.smith_items()
+        log.info("Done smithing.")
+        return True
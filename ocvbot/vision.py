@@ -3,12 +3,27 @@
 Module for "seeing" the client.
 
 """
+import abc
+import asyncio
+import collections
+import ctypes
+import ctypes.util
+import inspect
+import json
 import logging as log
+import os
 import pathlib
+import re
+import threading
+import time
+import traceback
+import zipfile
+import zlib
 
+import cv2
+import numpy as np
 import pyautogui as pag
 from ocvbot import inputs
-from ocvbot import misc
 from ocvbot import startup as start
 
 
@@ -36,6 +51,15 @@ CLIENT_WIDTH = 765
 CLIENT_HEIGHT = 503
 CLIENT = (0, 0, 0, 0)
 
+# The factor by which the client is scaled, e.g. 2.0 for a client stretched
+#   to twice the fixed-size client's width and height. The widths, heights
+#   and offsets in this file are those of the unscaled client. Set by init(),
+#   see detect_scale().
+SCALE = 1.0
+# The scales detect_scale() tries, unless the `client_scales` setting in the
+#   main config file lists others.
+CLIENT_SCALES = (1.0, 1.25, 1.5, 2.0)
+
 DISPLAY_WIDTH = pag.size().width
 DISPLAY_HEIGHT = pag.size().height
 DISPLAY = (0, 0, DISPLAY_WIDTH, DISPLAY_HEIGHT)
@@ -53,6 +77,26 @@ INV_BOTTOM = (0, 0, 0, 0)
 INV_RIGHT_HALF = (0, 0, 0, 0)
 INV_LEFT_HALF = (0, 0, 0, 0)
 
+# The inventory is a fixed grid of 4 columns and 7 rows of slots. Slot offsets
+#   are relative to the top left corner of INV.
+INV_COLUMNS = 4
+INV_ROWS = 7
+INV_SLOT_WIDTH = 36
+INV_SLOT_HEIGHT = 32
+INV_SLOT_LEFT = 15
+INV_SLOT_TOP = 8
+INV_SLOT_X_SPACING = 42
+INV_SLOT_Y_SPACING = 36
+
+# The visible part of the bank is a grid of 8 columns and 6 rows of items.
+#   Item offsets are relative to the top left corner of BANK_ITEMS_WINDOW.
+BANK_COLUMNS = 8
+BANK_ROWS = 6
+BANK_SLOT_WIDTH = 36
+BANK_SLOT_HEIGHT = 32
+BANK_SLOT_X_SPACING = 48
+BANK_SLOT_Y_SPACING = 36
+
 LOGIN_FIELD_WIDTH = 258
 LOGIN_FIELD_HEIGHT = 12
 LOGIN_FIELD = (0, 0, 0, 0)
@@ -71,478 +115,4539 @@ SIDE_STONES_HEIGHT = 366
 SIDE_STONES = (0, 0, 0, 0)
 
 
-# TODO: Add examples of usage.
-# TODO: Rename to "Needle" or "Image". Create another class for pixel matching
-#   called "Pixel".
-class Vision:
-    """
-    Main class locating and clicking on images on the display.
-    All coordinates are relative to the top left corner of the display.
-    All coordinates are in a (left, top, width, height) format.
+# Screen capture backends. ------------------------------------------------------------------------
+#
+# Every screenshot the bot takes goes through a capture backend, which returns
+#   the captured region as a BGR NumPy array. The X11 shared-memory backend
+#   copies pixels from the X server straight into reusable NumPy buffers,
+#   skipping the PIL Image objects that PyAutoGUI creates. PyAutoGUI is used
+#   as a fallback wherever shared memory isn't available (e.g. on Windows,
+#   macOS or Wayland).
 
-    Args:
-        region (tuple): A 4-tuple containing the Left, Top, Width, and
-                        Height of the region in which to look for the
-                        needle. This typically will be one of the tuples
-                        defined at the top of this file like `INV` or
-                        `GAME_SCREEN`.
-        needle (file): A filepath to an the image to search for within the
-                       `region` tuple.
-        loctype (str): Whether to return the needle's (ltwh) coordinates
-                       or its (X, Y) center. Available values are `regular`
-                       and `center`.
-            regular = Returns the needle's left, top, width, and height
-                      as a 4-tuple.
-            center = Returns the (X, Y) coordinates of the needle's
-                     center as a 2-tuple (relative to the display's
-                     dimensions).
-        conf (float): The confidence value required to match the needle
-                      successfully, expressed as a decimal <= 1. This is
-                      used by PyAutoGUI. Default is 0.95.
-        loop_num (int): The number of times wait_for_needle() will search
-                        the given coordinates for the needle. Default is
-                        10.
-        loop_sleep_range (tuple): A 2-tuple containing the minimum and
-                                  maximum number of miliseconds to wait
-                                  between image-search loops. Used by
-                                  the wait_for_needle() method. Default
-                                  is (0, 100).
-        grayscale (bool): Converts the haystack to grayscale before
-                          searching within it. Speeds up searching by
-                          about 30%. Default is False.
 
+class CaptureBackend(abc.ABC):
     """
+    Interface for capturing regions of the display.
 
-    def __init__(
-        self,
-        region: tuple[int, int, int, int],
-        needle: str,
-        loctype: str = "regular",
-        conf: float = 0.95,
-        # TODO: Move to a parameter of wait_for_needle().
-        loop_num: int = 10,
-        # TODO: Move to a parameter of wait_for_needle().
-        loop_sleep_range: tuple[int, int] = (0, 100),
-        grayscale: bool = False,
-    ):
-        self.grayscale = grayscale
-        self.region = region
-        self.needle = needle
-        self.loctype = loctype
-        self.conf = conf
-        self.loop_num = loop_num
-        self.loop_sleep_range = loop_sleep_range
+    """
 
-    # TODO: Add examples of usage.
-    def find_needle(self):
+    name = ""
+
+    @abc.abstractmethod
+    def grab(self, region: tuple[int, int, int, int]) -> np.ndarray:
         """
-        Searches within the self.ltwh coordinates for self.needle.
+        Captures a region of the display.
+
+        Args:
+            region (tuple): A 4-tuple containing the left, top, width, and
+                            height of the region to capture, relative to the
+                            display's coordinates.
 
         Returns:
-            If the needle is found and self.loctype is `regular`, returns
-            the needle's left/top/width/height dimensions as a 4-tuple.
+            Returns the region as a BGR NumPy array. Backends may reuse the
+            array for the next capture of the same size, so it must be copied
+            if it needs to be kept.
 
-            If the needle is found and self.loctype is `center`, returns
-            coordinates of the needle's (X, Y) center as a 2-tuple.
+        """
 
-            If the needle is not found, returns False.
+    def close(self) -> None:
+        """
+        Releases any resources held by the backend.
 
         """
-        if self.loctype == "regular":
-            needle_coords = pag.locateOnScreen(
-                self.needle,
-                confidence=self.conf,
-                grayscale=self.grayscale,
-                region=self.region,
-            )
-            if needle_coords is not None:
-                log.debug("Found regular image %s, %s", self.needle, needle_coords)
-                return needle_coords
-            raise start.NeedleError("Could not find needle!", self.needle)
 
-        elif self.loctype == "center":
-            needle_coords = pag.locateCenterOnScreen(
-                self.needle,
-                confidence=self.conf,
-                grayscale=self.grayscale,
-                region=self.region,
-            )
-            if needle_coords is not None:
-                log.debug("Found center of image %s, %s", self.needle, needle_coords)
-                return needle_coords
-            raise start.NeedleError("Could not find needle!", self.needle)
 
-        raise RuntimeError(
-            "self.loctype must be 'regular' or 'center', got '%s'", self.loctype
-        )
+class PyAutoGUICapture(CaptureBackend):
+    """
+    Captures the display with pag.screenshot(). Slow, but works everywhere
+    PyAutoGUI does.
 
-    # TODO: Add examples of usage.
-    def wait_for_needle(self):
-        """
-        Repeatedly searches within the self.ltwh coordinates for the needle.
+    """
 
-        Returns:
-            If self.loctype is `regular`, returns a 4-tuple containing the
-            (left, top, width, height) coordinates of the needle.
+    name = "pyautogui"
 
-            If self.loctype is `center`, returns a 2-tuple containing the
-            (X, Y) center of the needle.
+    def grab(self, region: tuple[int, int, int, int]) -> np.ndarray:
+        screenshot = pag.screenshot(region=region)
+        return cv2.cvtColor(np.asarray(screenshot), cv2.COLOR_RGB2BGR)
 
-        Raises:
-            Raises start.NeedleError if the needle could not be found.
-        """
-        # Add 1 to self.loop_num because if loop_num=1, it won't loop at
-        #   all.
-        for tries in range(1, (self.loop_num + 1)):
 
-            try:
-                needle_coords = Vision.find_needle(self)
-                log.debug(
-                    "Found %s in region %s after trying %s times.",
-                    self.needle,
-                    self.region,
-                    tries,
-                )
-                return needle_coords
-            except start.NeedleError:
-                log.debug(
-                    "Cannot find %s in region %s, tried %s times.",
-                    self.needle,
-                    self.region,
-                    tries,
-                )
-                misc.sleep_rand(self.loop_sleep_range[0], self.loop_sleep_range[1])
+class _XImage(ctypes.Structure):
+    # Only the leading fields of Xlib's XImage struct are needed.
+    _fields_ = [
+        ("width", ctypes.c_int),
+        ("height", ctypes.c_int),
+        ("xoffset", ctypes.c_int),
+        ("format", ctypes.c_int),
+        ("data", ctypes.c_void_p),
+        ("byte_order", ctypes.c_int),
+        ("bitmap_unit", ctypes.c_int),
+        ("bitmap_bit_order", ctypes.c_int),
+        ("bitmap_pad", ctypes.c_int),
+        ("depth", ctypes.c_int),
+        ("bytes_per_line", ctypes.c_int),
+        ("bits_per_pixel", ctypes.c_int),
+        ("red_mask", ctypes.c_ulong),
+        ("green_mask", ctypes.c_ulong),
+        ("blue_mask", ctypes.c_ulong),
+    ]
 
-        raise start.NeedleError("Timed out looking for needle!", self.needle)
 
-    # TODO: Add examples of usage.
-    def click_needle(
-        self,
-        sleep_range: tuple[int, int, int, int] = (50, 200, 50, 200),
-        move_duration_range: tuple[int, int] = (1, 50),
-        button: str = "left",
-        move_away: bool = False,
-        number_of_clicks: int = 1,
-    ) -> None:
-        """
-        Moves the mouse to the provided needle image and clicks on
-        it. Automatically randomizes the location the mouse cursor
-        will click to based on the dimensions of the needle image.
+class _XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ("shmseg", ctypes.c_ulong),
+        ("shmid", ctypes.c_int),
+        ("shmaddr", ctypes.c_void_p),
+        ("readOnly", ctypes.c_int),
+    ]
 
-        Args:
-            sleep_range (tuple): Passed to the Mouse class in inputs.py,
-                                 see its docstring for more info.
-            move_duration_range (tuple): Passed to the Mouse class in
-                                         inputs.py, see its docstring for
-                                         more info.
-            button (str): The mouse button to use when clicking on the
-                          needle, default is `left`.
-            move_away (bool): Whether to move the mouse out of the way
-                              after clicking on the needle. Useful when
-                              we needs to determine the status of a button
-                              that the mouse just clicked.
-            number_of_clicks (int): Passed to the click_coord() function of the
-                                    Mouse class, see its docstring for more
-                                    info. Default is 1.
 
-        Returns:
-            Returns True if the needle was clicked on successfully,
-            returns False otherwise.
+class XShmCapture(CaptureBackend):
+    """
+    Captures the display using the X11 MIT-SHM extension. The X server writes
+    each capture directly into a shared memory segment that's exposed to
+    NumPy without copying, which is then converted from BGRA to BGR in a
+    single pass into a reusable buffer.
 
-        """
-        log.debug("Looking for %s to click on.", self.needle)
+    One shared memory segment is kept for each distinct capture size, so
+    repeatedly capturing the same regions doesn't allocate anything.
 
-        needle_coords = self.wait_for_needle()
+    Raises:
+        Raises OSError if X11 or its shared memory extension isn't available.
 
-        # Randomize the location the mouse cursor will move to using
-        #   the dimensions of needle image.
-        # The mouse will click anywhere within the needle image.
-        inputs.Mouse(
-            region=needle_coords,
-            sleep_range=sleep_range,
-            move_duration_range=move_duration_range,
-            button=button,
-        ).click_coord(number_of_clicks=number_of_clicks)
+    """
 
-        log.debug("Clicking on %s", self.needle)
+    name = "xshm"
 
-        # Ensure the mouse moves completely off the client.
-        if move_away is True:
+    _IPC_PRIVATE = 0
+    _IPC_CREAT = 0o1000
+    _IPC_RMID = 0
+    _ZPIXMAP = 2
+    _ALL_PLANES = ctypes.c_ulong(-1).value
 
-            # Unpack CLIENT tuple so we can get to the left and top values.
-            (client_left, client_top, CLIENT_WIDTH, CLIENT_HEIGHT) = CLIENT
-            client_right = client_left + CLIENT_WIDTH
-            client_bottom = client_top + CLIENT_HEIGHT
+    def __init__(self):
+        x11_path = ctypes.util.find_library("X11")
+        xext_path = ctypes.util.find_library("Xext")
+        if x11_path is None or xext_path is None:
+            raise OSError("Could not find libX11 and libXext!")
+        self._x11 = ctypes.CDLL(x11_path)
+        self._xext = ctypes.CDLL(xext_path)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._declare_functions()
 
-            inputs.Mouse(
-                region=(client_right + 2, client_bottom + 2, 3, 3),
-                move_duration_range=(5, 20),
-            ).move_to()
+        self._display = self._x11.XOpenDisplay(None)
+        if not self._display:
+            raise OSError("Could not open X display!")
+        if not self._xext.XShmQueryExtension(self._display):
+            self._x11.XCloseDisplay(self._display)
+            raise OSError("X server doesn't support MIT-SHM!")
 
-    def count_needles(self):
-        """
-        Counts the number of needles found within the region specified.
+        screen = self._x11.XDefaultScreen(self._display)
+        self._root = self._x11.XRootWindow(self._display, screen)
+        self._visual = self._x11.XDefaultVisual(self._display, screen)
+        self._depth = self._x11.XDefaultDepth(self._display, screen)
+        self._root_width = self._x11.XDisplayWidth(self._display, screen)
+        self._root_height = self._x11.XDisplayHeight(self._display, screen)
+        # Shared memory segments, keyed by (width, height).
+        self._segments: dict[tuple[int, int], tuple] = {}
 
-        Examples:
-            Count the number of iron bars in the player's inventory:
-            vision.Vision(region=vis.inv, needle="./needles/items/iron-bar.png").count_needles()
+    def _declare_functions(self) -> None:
+        x11 = self._x11
+        xext = self._xext
+        libc = self._libc
+        display = ctypes.c_void_p
+        shminfo = ctypes.POINTER(_XShmSegmentInfo)
+        ximage = ctypes.POINTER(_XImage)
+
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XOpenDisplay.restype = display
+        x11.XCloseDisplay.argtypes = [display]
+        x11.XDefaultScreen.argtypes = [display]
+        x11.XDefaultScreen.restype = ctypes.c_int
+        x11.XRootWindow.argtypes = [display, ctypes.c_int]
+        x11.XRootWindow.restype = ctypes.c_ulong
+        x11.XDefaultVisual.argtypes = [display, ctypes.c_int]
+        x11.XDefaultVisual.restype = ctypes.c_void_p
+        x11.XDefaultDepth.argtypes = [display, ctypes.c_int]
+        x11.XDefaultDepth.restype = ctypes.c_int
+        x11.XDisplayWidth.argtypes = [display, ctypes.c_int]
+        x11.XDisplayWidth.restype = ctypes.c_int
+        x11.XDisplayHeight.argtypes = [display, ctypes.c_int]
+        x11.XDisplayHeight.restype = ctypes.c_int
+        x11.XSync.argtypes = [display, ctypes.c_int]
+        x11.XFree.argtypes = [ctypes.c_void_p]
+
+        xext.XShmQueryExtension.argtypes = [display]
+        xext.XShmQueryExtension.restype = ctypes.c_int
+        xext.XShmCreateImage.argtypes = [
+            display,
+            ctypes.c_void_p,
+            ctypes.c_uint,
+            ctypes.c_int,
+            ctypes.c_void_p,
+            shminfo,
+            ctypes.c_uint,
+            ctypes.c_uint,
+        ]
+        xext.XShmCreateImage.restype = ximage
+        xext.XShmAttach.argtypes = [display, shminfo]
+        xext.XShmAttach.restype = ctypes.c_int
+        xext.XShmDetach.argtypes = [display, shminfo]
+        xext.XShmGetImage.argtypes = [
+            display,
+            ctypes.c_ulong,
+            ximage,
+            ctypes.c_int,
+            ctypes.c_int,
+            ctypes.c_ulong,
+        ]
+        xext.XShmGetImage.restype = ctypes.c_int
+
+        libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        libc.shmget.restype = ctypes.c_int
+        libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        libc.shmat.restype = ctypes.c_void_p
+        libc.shmdt.argtypes = [ctypes.c_void_p]
+        libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+    def _segment(self, width: int, height: int) -> tuple:
+        """
+        Gets the shared memory segment for the given capture size, creating
+        it if needed.
 
         Returns:
-            Returns an int.
+            Returns a 4-tuple of the XImage, its segment info, a BGRA NumPy
+            view of the shared memory and the reusable BGR output buffer.
+
         """
-        # Make sure file path is OS-agnostic.
-        needle = str(pathlib.Path(self.needle))
+        segment = self._segments.get((width, height))
+        if segment is not None:
+            return segment
+
+        shminfo = _XShmSegmentInfo()
+        image = self._xext.XShmCreateImage(
+            self._display,
+            self._visual,
+            self._depth,
+            self._ZPIXMAP,
+            None,
+            ctypes.byref(shminfo),
+            width,
+            height,
+        )
+        if not image:
+            raise OSError("XShmCreateImage failed!")
+        if image.contents.bits_per_pixel != 32:
+            self._x11.XFree(image)
+            raise OSError("Only 32 bits-per-pixel displays are supported!")
+
+        bytes_per_line = image.contents.bytes_per_line
+        size = bytes_per_line * height
+        shminfo.shmid = self._libc.shmget(self._IPC_PRIVATE, size, self._IPC_CREAT | 0o600)
+        if shminfo.shmid < 0:
+            self._x11.XFree(image)
+            raise OSError(ctypes.get_errno(), "shmget failed!")
+        shminfo.shmaddr = self._libc.shmat(shminfo.shmid, None, 0)
+        if shminfo.shmaddr in (None, ctypes.c_void_p(-1).value):
+            self._libc.shmctl(shminfo.shmid, self._IPC_RMID, None)
+            self._x11.XFree(image)
+            raise OSError(ctypes.get_errno(), "shmat failed!")
+        shminfo.readOnly = 0
+        image.contents.data = shminfo.shmaddr
+
+        self._xext.XShmAttach(self._display, ctypes.byref(shminfo))
+        self._x11.XSync(self._display, 0)
+        # Mark the segment for removal now, so it's freed once it's detached,
+        #   even if the bot crashes.
+        self._libc.shmctl(shminfo.shmid, self._IPC_RMID, None)
+
+        buffer = (ctypes.c_ubyte * size).from_address(shminfo.shmaddr)
+        bgra = np.ndarray(
+            shape=(height, width, 4),
+            dtype=np.uint8,
+            buffer=buffer,
+            strides=(bytes_per_line, 4, 1),
+        )
+        bgr = np.empty((height, width, 3), dtype=np.uint8)
+        segment = (image, shminfo, bgra, bgr)
+        self._segments[(width, height)] = segment
+        return segment
+
+    def grab(self, region: tuple[int, int, int, int]) -> np.ndarray:
+        (left, top, width, height) = region
+        # Xlib's default error handler exits the process if the region isn't
+        #   entirely within the root window, so check for that first.
+        if (
+            left < 0
+            or top < 0
+            or left + width > self._root_width
+            or top + height > self._root_height
+        ):
+            raise ValueError(f"Region {region} is outside the display!")
+        (image, _, bgra, bgr) = self._segment(width, height)
+        if not self._xext.XShmGetImage(
+            self._display, self._root, image, left, top, self._ALL_PLANES
+        ):
+            raise OSError(f"XShmGetImage failed for region {region}!")
+        return cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=bgr)
+
+    def close(self) -> None:
+        for (image, shminfo, _, _) in self._segments.values():
+            self._xext.XShmDetach(self._display, ctypes.byref(shminfo))
+            self._libc.shmdt(shminfo.shmaddr)
+            image.contents.data = None
+            self._x11.XFree(image)
+        self._segments.clear()
+        if self._display:
+            self._x11.XCloseDisplay(self._display)
+            self._display = None
+
+
+# The available capture backends, in order of preference.
+CAPTURE_BACKENDS = {
+    XShmCapture.name: XShmCapture,
+    PyAutoGUICapture.name: PyAutoGUICapture,
+}
+
+_capture_backend = None
+
+
+def set_capture_backend(name: str = "auto") -> CaptureBackend:
+    """
+    Selects the backend used for all screen captures.
 
+    Args:
+        name (str): The name of the backend to use, one of the keys of
+                    CAPTURE_BACKENDS. `auto` tries each backend in order of
+                    preference and uses the first one that's available.
+                    Default is `auto`.
+
+    Returns:
+        Returns the selected backend.
+
+    Raises:
+        Raises a ValueError if the backend name isn't supported.
+
+        Raises OSError if the requested backend isn't available.
+
+    """
+    global _capture_backend
+
+    if name == "auto":
+        names = list(CAPTURE_BACKENDS)
+    elif name in CAPTURE_BACKENDS:
+        names = [name]
+    else:
+        raise ValueError(f"Unsupported capture backend {name}!")
+
+    for backend_name in names:
         try:
-            needles_coords = pag.locateAllOnScreen(
-                needle,
-                confidence=self.conf,
-                grayscale=self.grayscale,
-                region=self.region,
-            )
-            needles_coords_list = list(needles_coords)
-            number_of_needles = len(needles_coords_list)
-            return number_of_needles
+            backend = CAPTURE_BACKENDS[backend_name]()
+        except OSError as error:
+            if name != "auto":
+                raise
+            log.debug("Capture backend %s unavailable: %s", backend_name, error)
+            continue
+        if _capture_backend is not None:
+            _capture_backend.close()
+        _capture_backend = backend
+        log.info("Using capture backend %s", backend_name)
+        return backend
 
-        # If no needles can be found, then the number of needles is 0.
-        except pag.ImageNotFoundException:
-            return 0
+    raise OSError("No capture backend is available!")
 
 
-# TODO: Add examples of usage.
-# TODO: Break out an "is_logged_in" function.
-def orient(
-    region: tuple[int, int, int, int] = (DISPLAY),
-    launch_client: bool = False,
-):
+def get_capture_backend() -> CaptureBackend:
     """
-    Looks for an icon to orient the client. If it's found, use its
-    location within the game client to determine the coordinates of the
-    game client relative to the display's coordinates.
+    Gets the backend used for all screen captures, selecting one according
+    to the `capture_backend` setting in the main config file if none has
+    been selected yet.
+
+    """
+    if _capture_backend is None:
+        set_capture_backend(start.config["main"].get("capture_backend", "auto"))
+    return _capture_backend
+
+
+# Shared frame capture. ---------------------------------------------------------------------------
+#
+# Rather than taking a new screenshot for every needle search, the CLIENT
+#   region is captured once and every search within it crops its region from
+#   that shared frame. The frame is re-captured when it becomes stale, which
+#   happens when:
+#     - an input has been sent to the client (see inputs.count_input()).
+#     - invalidate_frame() has been called.
+#     - the frame is older than FRAME_MAX_AGE seconds.
+#
+# If the frame producer is running, new frames are taken from it instead of
+#   being captured, see FrameProducer.
+
+FRAME_MAX_AGE = 0.1
+# The maximum number of seconds to wait for the frame producer to capture a
+#   new frame before capturing one directly.
+FRAME_PRODUCER_TIMEOUT = 0.5
+
+_frame = None
+_frame_region = (0, 0, 0, 0)
+_frame_time = 0.0
+_frame_input_count = -1
+# Incremented every time a new frame is captured.
+_frame_id = 0
+# The ID of the frame producer's frame that's currently the shared frame.
+_frame_producer_id = 0
+# The time invalidate_frame() was last called.
+_frame_invalidated = 0.0
 
-    This function is also used to determine if the client is logged out.
-    This is generally one of the first functions that is run upon script
-    startup.
+
+def capture(region: tuple[int, int, int, int]) -> np.ndarray:
+    """
+    Takes a new screenshot of the given region with the current capture
+    backend, bypassing the shared frame.
 
     Args:
         region (tuple): A 4-tuple containing the left, top, width, and
-                      height of the coordinate space to search within,
-                      relative to the display's coordinates. By default
-                      uses the entire display.
-
-    Raises:
-       Raises an exception if the client cannot be found, or if the
-       function can't determine if the client is logged in or logged
-       out.
+                        height of the region to capture, relative to the
+                        display's coordinates.
 
     Returns:
-         If client is logged in, returns a 2-tuple containing a string
-         with the text "logged_in" and a 2-tuple of the center (X, Y)
-         coordinates of the orient needle.
-
-         If client is logged out, returns a 2-tuple containing a string
-         with the text "logged_out" and a 2-tuple of the center (X, Y)
-         coordinates of the orient-logged-out needle.
+        Returns the screenshot as a BGR NumPy array, which is the channel
+        order OpenCV expects. The array may be reused by the next capture
+        of the same size, see CaptureBackend.grab().
 
     """
-    for _ in range(5):
-        try:
-            logged_in = Vision(
-                region=region,
-                needle="needles/minimap/orient.png",
-                loctype="center",
-                loop_num=1,
-                conf=0.8,
-            ).wait_for_needle()
-            log.info("Client is logged in.")
-            return "logged_in", logged_in
-        except start.NeedleError:
-            pass
+    return get_capture_backend().grab(region)
 
-        try:
-            # If the client is not logged in, check if it's logged out.
-            logged_out = Vision(
-                region=region,
-                needle="needles/login-menu/orient-logged-out.png",
-                loctype="center",
-                loop_num=1,
-                conf=0.8,
-            ).wait_for_needle()
-            log.info("Client is logged out.")
-            return "logged_out", logged_out
-        except start.NeedleError:
-            pass
-    raise RuntimeError("Unable to locate client!")
 
+def invalidate_frame() -> None:
+    """
+    Marks the shared frame as stale, forcing the next search to capture a
+    new one. Call this whenever the client may have changed in a way the
+    bot didn't cause, such as between the iterations of a polling loop.
 
-# TODO: add 'configure camera' function that clicks on compass, zooms in camera, and holds down up arrow
-#       only click on the compass if it isn't perfectly aligned
+    """
+    global _frame, _frame_invalidated
+    _frame = None
+    _frame_invalidated = time.monotonic()
 
 
-def init() -> None:
+def grab_frame() -> np.ndarray:
     """
-    Locates the client and sets the value of the vision regions.
-    This function MUST be run before OCVBot can do anything else.
+    Returns the shared frame of the CLIENT region, capturing a new one only
+    if the current frame is stale.
+
+    Returns:
+        Returns the frame as a BGR NumPy array.
+
     """
+    global _frame, _frame_region, _frame_time, _frame_input_count, _frame_id
+    global _frame_producer_id
 
-    (client_status, anchor) = orient(region=DISPLAY)
-    (client_left, client_top) = anchor
-
-    if client_status == "logged_in":
-        client_left -= 735
-        client_top -= 21
-    elif client_status == "logged_out":
-        client_left -= 183
-        client_top -= 59
-
-    # Each of these tuples contains coordinates for the "region" parameter
-    #   of PyAutoGUI's Locate() functions. These tuples are used by methods
-    #   in the Vision class to look for needles within the specified set of
-    #   coordinates, rather than within the entire display's coordinates,
-    #   which is much faster.
-
-    # All coordinates are in a (left, top, width, height) format, to match
-    #   PyAutoGUI.
-
-    # The fixed-width game client.
-    global CLIENT
-    CLIENT = (client_left, client_top, CLIENT_WIDTH, CLIENT_HEIGHT)
-
-    # The player's inventory.
-    inv_left = client_left + 548
-    inv_top = client_top + 205
-    global INV
-    INV = (inv_left, inv_top, INV_WIDTH, INV_HEIGHT)
-
-    # Bottom half of the player's inventory.
-    inv_bottom_left = inv_left
-    inv_bottom_top = inv_top + INV_HALF_HEIGHT
-    global INV_BOTTOM
-    INV_BOTTOM = (
-        inv_bottom_left,
-        inv_bottom_top,
-        INV_WIDTH,
-        INV_HALF_HEIGHT,
-    )
+    if (
+        _frame is not None
+        and _frame_region == CLIENT
+        and _frame_input_count == inputs.input_count
+        and (time.monotonic() - _frame_time) <= FRAME_MAX_AGE
+    ):
+        return _frame
 
-    # Right half of the player's inventory.
-    inv_right_half_left = (inv_left + INV_HALF_WIDTH) - 5
-    inv_right_half_top = inv_top
-    global INV_RIGHT_HALF
-    INV_RIGHT_HALF = (
-        inv_right_half_left,
-        inv_right_half_top,
-        INV_HALF_WIDTH,
-        INV_HEIGHT,
-    )
+    _frame_input_count = inputs.input_count
+    produced = None
+    if PRODUCER.running:
+        # The frame must have been captured after anything that made the
+        #   current one stale.
+        newer_than = max(
+            inputs.last_input_time,
+            _frame_invalidated,
+            time.monotonic() - FRAME_MAX_AGE,
+        )
+        produced = PRODUCER.wait_for_frame(newer_than, FRAME_PRODUCER_TIMEOUT)
+        if produced is not None and produced[3] != CLIENT:
+            produced = None
+    if produced is not None:
+        (frame, producer_id, frame_time, _) = produced
+        _frame = frame
+        _frame_time = frame_time
+        if producer_id == _frame_producer_id:
+            return _frame
+        _frame_producer_id = producer_id
+    else:
+        _frame = capture(CLIENT)
+        _frame_time = time.monotonic()
+    _frame_region = CLIENT
+    _frame_id += 1
+    RECORDER.record_frame(_frame_id, _frame, _frame_time)
+    if WATCHDOG.due(_frame_id):
+        WATCHDOG.check()
+        # If the client moved, the frame was captured from its old position.
+        if _frame_region != CLIENT:
+            return grab_frame()
+    return _frame
 
-    # Left half of the player's inventory.
-    inv_left_half_left = inv_left
-    inv_left_half_top = inv_top
-    global INV_LEFT_HALF
-    INV_LEFT_HALF = (
-        inv_left_half_left,
-        inv_left_half_top,
-        INV_HALF_WIDTH,
-        INV_HEIGHT,
-    )
 
-    # The "gameplay screen". This is the screen that displays the player
-    #   character and the game world.
-    game_screen_left = client_left + 4
-    game_screen_top = client_top + 4
-    global GAME_SCREEN
-    GAME_SCREEN = (
-        game_screen_left,
-        game_screen_top,
-        GAME_SCREEN_WIDTH,
-        GAME_SCREEN_HEIGHT,
-    )
+def in_client(region: tuple[int, int, int, int]) -> bool:
+    """
+    Determines if the given region lies entirely within the CLIENT region.
 
-    # Banking window, minus the tabs at the top and other surrounding elements.
-    # This is done to prevent the bot from attempting to withdrawal items by
-    #   clicking on their tab icons
-    bank_items_window_left = game_screen_left + 68
-    bank_items_window_top = game_screen_top + 77
-    global BANK_ITEMS_WINDOW
-    BANK_ITEMS_WINDOW = (
-        bank_items_window_left,
-        bank_items_window_top,
-        BANK_ITEMS_WINDOW_WIDTH,
-        BANK_ITEMS_WINDOW_HEIGHT,
-    )
+    Returns:
+        Returns True if the region can be cropped from the shared frame,
+        returns False otherwise.
 
-    # The player's inventory, plus the top and bottom "side stone" tabs that
-    #   open all the different menus.
-    side_stones_left = client_left + 516
-    side_stones_top = client_top + 166
-    global SIDE_STONES
-    SIDE_STONES = (
-        side_stones_left,
-        side_stones_top,
-        SIDE_STONES_WIDTH,
-        SIDE_STONES_HEIGHT,
+    """
+    (client_left, client_top, client_width, client_height) = CLIENT
+    (left, top, width, height) = region
+    return (
+        client_width > 0
+        and left >= client_left
+        and top >= client_top
+        and left + width <= client_left + client_width
+        and top + height <= client_top + client_height
     )
 
-    # Chat menu.
-    chat_menu_left = client_left + 7
-    chat_menu_top = client_top + 345
-    global CHAT_MENU
-    CHAT_MENU = (
-        chat_menu_left,
-        chat_menu_top,
-        CHAT_MENU_WIDTH,
-        CHAT_MENU_HEIGHT,
-    )
 
-    # The most recent chat message.
-    chat_menu_recent_left = chat_menu_left - 3
-    chat_menu_recent_top = chat_menu_top + 98
-    global CHAT_MENU_RECENT
-    CHAT_MENU_RECENT = (
-        chat_menu_recent_left,
-        chat_menu_recent_top,
-        CHAT_MENU_RECENT_WIDTH,
-        CHAT_MENU_RECENT_HEIGHT,
-    )
+def get_haystack(region: tuple[int, int, int, int]) -> np.ndarray:
+    """
+    Gets an image of the given region to search for needles within. Regions
+    within the client are cropped from the shared frame, all other regions
+    (e.g. DISPLAY) are captured directly.
 
-    # The "Login" field on the main login screen.
-    login_field_left = client_left + 273
-    login_field_top = client_top + 242
-    global LOGIN_FIELD
-    LOGIN_FIELD = (
-        login_field_left,
-        login_field_top,
-        LOGIN_FIELD_WIDTH,
-        LOGIN_FIELD_HEIGHT,
-    )
+    Args:
+        region (tuple): A 4-tuple containing the left, top, width, and
+                        height of the region, relative to the display's
+                        coordinates.
 
-    # The "Password" field on the main login screen.
-    pass_field_left = client_left + 275
-    pass_field_top = client_top + 258
-    global PASS_FIELD
-    PASS_FIELD = (
-        pass_field_left,
-        pass_field_top,
-        LOGIN_FIELD_WIDTH,
-        LOGIN_FIELD_HEIGHT,
-    )
+    Returns:
+        Returns a BGR NumPy array. Arrays cropped from the shared frame are
+        views, so they must not be modified.
 
-    # The entire minimap.
-    minimap_left = client_left + 571
-    minimap_top = client_top + 11
-    global MINIMAP
-    MINIMAP = (minimap_left, minimap_top, MINIMAP_WIDTH, MINIMAP_HEIGHT)
-
-    # The current minimap "slice" for locating the player on the world map.
-    # The largest area of the minimap, centered on the player, that can be
-    #   used to determine the player's location for the travel() function.
-    minimap_slice_left = client_left + 599
-    minimap_slice_top = client_top + 43
-    global MINIMAP_SLICE
-    MINIMAP_SLICE = (
-        minimap_slice_left,
-        minimap_slice_top,
-        MINIMAP_SLICE_WIDTH,
-        MINIMAP_SLICE_HEIGHT,
+    """
+    if not in_client(region):
+        return capture(region)
+
+    (left, top, width, height) = region
+    left -= CLIENT[0]
+    top -= CLIENT[1]
+    return grab_frame()[top : top + height, left : left + width]
+
+
+def frame_time() -> float:
+    """
+    Gets the time at which the shared frame was captured.
+
+    Returns:
+        Returns the time.monotonic() time at which capturing the shared
+        frame began, or 0.0 if no frame has been captured yet.
+
+    """
+    return _frame_time
+
+
+# Frame producer. ---------------------------------------------------------------------------------
+#
+# Optionally, a background thread captures CLIENT continuously into a ring
+#   buffer of preallocated frames. grab_frame() then reads the newest frame
+#   instead of capturing one, so searches only pay for matching, and waits
+#   see the client's newest state as soon as it's captured. The frames in
+#   the ring buffer are also the client's recent history.
+
+# The number of frames kept in the ring buffer.
+FRAME_RING_SIZE = 8
+
+
+class FrameProducer:
+    """
+    Captures CLIENT at a fixed rate on a background thread. Each frame is
+    written into the next slot of a ring buffer of preallocated arrays,
+    along with its frame ID and the time it was captured.
+
+    Frames are read without copying, so a frame read from the ring buffer
+    is only valid until the producer wraps around to its slot again, which
+    takes (FRAME_RING_SIZE - 1) / fps seconds. Use history() to keep frames
+    for longer.
+
+    The producer uses its own capture backend, since backends aren't
+    thread-safe.
+
+    Args:
+        fps (float): The number of frames to capture per second. Default is
+                     the `capture_fps` setting in the main config file.
+        size (int): The number of frames in the ring buffer. Default is
+                    FRAME_RING_SIZE.
+
+    """
+
+    def __init__(self, fps: float = None, size: int = FRAME_RING_SIZE):
+        if fps is None:
+            fps = start.config["main"].get("capture_fps", 0)
+        self.fps = fps
+        self.size = size
+        self._frames = None
+        self._ids = np.zeros(size, dtype=np.int64)
+        self._times = np.zeros(size, dtype=np.float64)
+        self._regions = [None] * size
+        # The slot of the newest frame, or -1 if there's none yet.
+        self._newest = -1
+        # The number of slots written since the ring buffer was allocated.
+        self._written = 0
+        self._next_id = 1
+        self._thread = None
+        self._stopping = threading.Event()
+        self._captured = threading.Condition()
+        self.frames = 0
+        # Total number of seconds spent capturing.
+        self.capture_time = 0.0
+        # Frames that took longer to capture than the interval between frames.
+        self.late = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Starts capturing frames. Does nothing if already running.
+
+        """
+        if self.running:
+            return
+        if self.fps <= 0:
+            raise ValueError("The frame producer's fps must be positive!")
+        if self.fps * FRAME_MAX_AGE >= self.size - 1:
+            log.warning(
+                "At %s fps, frames may be overwritten while they're still in use!",
+                self.fps,
+            )
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="frame-producer", daemon=True
+        )
+        self._thread.start()
+        log.info("Capturing frames at %s fps.", self.fps)
+
+    def stop(self) -> None:
+        """
+        Stops capturing frames and waits for the thread to exit.
+
+        """
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        backend = type(get_capture_backend())()
+        interval = 1 / self.fps
+        next_time = time.monotonic()
+        try:
+            while not self._stopping.is_set():
+                region = CLIENT
+                if region[2] > 0 and region[3] > 0:
+                    self._capture(backend, region)
+                next_time += interval
+                delay = next_time - time.monotonic()
+                if delay < 0:
+                    # Don't try to catch up on missed frames.
+                    self.late += 1
+                    next_time = time.monotonic()
+                    delay = 0
+                self._stopping.wait(delay)
+        finally:
+            backend.close()
+
+    def _capture(self, backend: CaptureBackend, region: tuple[int, int, int, int]) -> None:
+        """
+        Helper function that captures a single frame into the next slot.
+
+        """
+        shape = (region[3], region[2], 3)
+        if self._frames is None or self._frames.shape[1:] != shape:
+            # The client's size changed, so none of the frames are usable.
+            with self._captured:
+                self._newest = -1
+                self._written = 0
+            self._frames = np.empty((self.size,) + shape, dtype=np.uint8)
+
+        slot = (self._newest + 1) % self.size
+        start_time = time.monotonic()
+        np.copyto(self._frames[slot], backend.grab(region))
+        self.capture_time += time.monotonic() - start_time
+
+        with self._captured:
+            self._ids[slot] = self._next_id
+            self._times[slot] = start_time
+            self._regions[slot] = region
+            self._newest = slot
+            self._written = min(self._written + 1, self.size)
+            self._next_id += 1
+            self.frames += 1
+            self._captured.notify_all()
+
+    def latest(self):
+        """
+        Gets the newest frame without copying it.
+
+        Returns:
+            Returns a 4-tuple of the frame as a BGR NumPy array, its frame
+            ID, the time.monotonic() time at which its capture began, and
+            the region it was captured from. Returns None if no frame has
+            been captured yet.
+
+        """
+        with self._captured:
+            slot = self._newest
+            if slot < 0:
+                return None
+            return (
+                self._frames[slot],
+                int(self._ids[slot]),
+                float(self._times[slot]),
+                self._regions[slot],
+            )
+
+    def wait_for_frame(self, newer_than: float, timeout: float):
+        """
+        Waits for a frame whose capture began after the given time.
+
+        Args:
+            newer_than (float): A time.monotonic() time.
+            timeout (float): The maximum number of seconds to wait.
+
+        Returns:
+            Returns the same as latest(), or None if no such frame was
+            captured in time.
+
+        """
+        with self._captured:
+            if not self._captured.wait_for(
+                lambda: self._newest >= 0 and self._times[self._newest] > newer_than,
+                timeout,
+            ):
+                return None
+            return self.latest()
+
+    def history(self, count: int = None) -> list:
+        """
+        Copies the most recent frames out of the ring buffer. The oldest
+        slot is left out, since it's the one the next frame is captured into.
+
+        Args:
+            count (int): The maximum number of frames to copy. Default is
+                         None, which copies every frame in the buffer but
+                         the oldest.
+
+        Returns:
+            Returns a list of 3-tuples of each frame's ID, capture time and
+            a copy of the frame, oldest first.
+
+        """
+        if count is None:
+            count = self.size
+        with self._captured:
+            newest = self._newest
+            if newest < 0:
+                return []
+            frames = []
+            for age in range(min(count, self._written, self.size - 1)):
+                slot = (newest - age) % self.size
+                frames.append(
+                    (int(self._ids[slot]), float(self._times[slot]), self._frames[slot].copy())
+                )
+        return frames[::-1]
+
+    def clear(self) -> None:
+        """
+        Resets the statistics.
+
+        """
+        self.frames = 0
+        self.capture_time = 0.0
+        self.late = 0
+
+    def stats(self) -> dict:
+        """
+        Reports how quickly frames have been captured.
+
+        Returns:
+            Returns a dict containing the number of frames captured, the
+            number of frames that took longer than the interval between
+            frames, and the average capture time in milliseconds.
+
+        """
+        return {
+            "frames": self.frames,
+            "late": self.late,
+            "avg_capture_ms": (
+                (self.capture_time / self.frames) * 1000 if self.frames else 0.0
+            ),
+        }
+
+
+PRODUCER = FrameProducer()
+
+
+# Flight recorder. --------------------------------------------------------------------------------
+#
+# When a script gives up and logs out, the log rarely says why a needle
+#   wasn't found. The flight recorder keeps the client's recent frames and
+#   the searches made in them in memory, and writes them to a crash report
+#   when the bot crashes, so the failure can be looked at afterwards.
+
+# The number of compressed frames kept by the flight recorder.
+RECORDER_FRAMES = 16
+# The minimum number of seconds between compressed frames. Each frame takes
+#   about a millisecond to compress.
+RECORDER_INTERVAL = 0.1
+# The number of searches kept by the flight recorder.
+RECORDER_QUERIES = 256
+# The JPEG quality of the compressed frames.
+RECORDER_JPEG_QUALITY = 90
+
+
+class FlightRecorder:
+    """
+    Keeps bounded histories of the frames of the client, the searches made
+    in them, and the inputs sent to the client (see inputs.input_history).
+    dump() writes them to a zip file.
+
+    New frames are compressed no more often than every RECORDER_INTERVAL
+    seconds. The newest frame is copied into a buffer that's reused for
+    each new frame, so the frame the bot crashed on is saved no matter when
+    it was captured. It has to be copied because capture backends and
+    PRODUCER reuse their arrays, see CaptureBackend.grab().
+
+    Args:
+        frames (int): The number of compressed frames to keep. 0 disables
+                      the recorder. Default is the `flight_recorder_frames`
+                      setting in the main config file.
+        path (str): The directory to write crash reports to. Default is the
+                    `flight_recorder_dir` setting in the main config file.
+
+    """
+
+    def __init__(self, frames: int = None, path: str = None):
+        config = start.config["main"]
+        if frames is None:
+            frames = config.get("flight_recorder_frames", RECORDER_FRAMES)
+        if path is None:
+            path = config.get("flight_recorder_dir", "crash-reports")
+        self.enabled = frames > 0
+        self.path = pathlib.Path(path)
+        # (frame ID, time, JPEG bytes) tuples, oldest first.
+        self._frames = collections.deque(maxlen=max(frames, 1))
+        # (time, frame ID, needle path, region, conf, grayscale, limit,
+        #   number of matches, first match, seconds) tuples, oldest first.
+        self._queries = collections.deque(maxlen=RECORDER_QUERIES)
+        self._latest = None
+        self._latest_id = 0
+        self._latest_time = 0.0
+        self._compressed_time = float("-inf")
+        self.dumps = 0
+        # Total number of seconds spent recording.
+        self.record_time = 0.0
+
+    def record_frame(
+        self, frame_id: int, frame: np.ndarray, frame_time: float
+    ) -> None:
+        """
+        Records a new frame of the client.
+
+        """
+        if not self.enabled:
+            return
+        started = time.perf_counter()
+        if self._latest is None or self._latest.shape != frame.shape:
+            self._latest = frame.copy()
+        else:
+            np.copyto(self._latest, frame)
+        self._latest_id = frame_id
+        self._latest_time = frame_time
+        if frame_time - self._compressed_time >= RECORDER_INTERVAL:
+            self._frames.append((frame_id, frame_time, self._compress(frame)))
+            self._compressed_time = frame_time
+        self.record_time += time.perf_counter() - started
+
+    def record_query(
+        self,
+        needle_path: str,
+        region: tuple[int, int, int, int],
+        conf: float,
+        grayscale: bool,
+        limit: int,
+        matches: list[tuple[int, int]],
+        seconds: float,
+    ) -> None:
+        """
+        Records a search and its first match. Searches within the client
+        are recorded along with the ID of the frame they were made in.
+
+        """
+        if not self.enabled:
+            return
+        started = time.perf_counter()
+        frame_id = _frame_id if in_client(region) else None
+        self._queries.append(
+            (
+                time.monotonic(),
+                frame_id,
+                needle_path,
+                region,
+                conf,
+                grayscale,
+                limit,
+                len(matches),
+                matches[0] if matches else None,
+                seconds,
+            )
+        )
+        self.record_time += time.perf_counter() - started
+
+    @staticmethod
+    def _compress(frame: np.ndarray) -> bytes:
+        (_, jpeg) = cv2.imencode(
+            ".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, RECORDER_JPEG_QUALITY]
+        )
+        return jpeg.tobytes()
+
+    def _recorded_frames(self) -> list:
+        """
+        Helper function that returns the compressed frames plus the newest
+        frame, if it wasn't compressed.
+
+        """
+        frames = list(self._frames)
+        if self._latest is not None and (
+            not frames or frames[-1][0] != self._latest_id
+        ):
+            frames.append(
+                (self._latest_id, self._latest_time, self._compress(self._latest))
+            )
+        return frames
+
+    @staticmethod
+    def _score(query: tuple, frame: np.ndarray):
+        """
+        Helper function that measures how well the needle of a search
+        matches the frame it was made in.
+
+        Returns:
+            Returns the best match's score as a float, or None if the needle
+            can't be matched within the search's region.
+
+        """
+        (_, _, needle_path, region, _, grayscale) = query[:6]
+        try:
+            needle = NEEDLES.get(needle_path)
+        except Exception:
+            return None
+        (left, top, width, height) = region
+        left -= CLIENT[0]
+        top -= CLIENT[1]
+        haystack = frame[top : top + height, left : left + width]
+        needle_image = needle.color
+        if grayscale:
+            haystack = cv2.cvtColor(haystack, cv2.COLOR_BGR2GRAY)
+            needle_image = needle.gray
+        if (
+            needle_image.shape[0] > haystack.shape[0]
+            or needle_image.shape[1] > haystack.shape[1]
+        ):
+            return None
+        score = match_template(needle_image, haystack, needle.mask).max()
+        return round(float(score), 4)
+
+    def dump(self, error: BaseException = None) -> pathlib.Path:
+        """
+        Writes the recorded frames, searches and inputs to a new zip file in
+        the crash report directory. The zip file contains each frame as a
+        JPEG image and a `report.json` file describing the rest.
+
+        Searches made in a recorded frame are given the score of the
+        needle's best match within that frame. Since the frames are
+        compressed, scores can differ slightly from those seen at the time.
+
+        Args:
+            error (Exception): The exception that caused the crash, if any.
+                               Default is None.
+
+        Returns:
+            Returns the path to the zip file, or None if the recorder is
+            disabled or the file couldn't be written.
+
+        """
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        frames = self._recorded_frames()
+        jpegs = {frame_id: jpeg for (frame_id, _, jpeg) in frames}
+        decoded = {}
+        # Searches are often repeated within the same frame.
+        scores = {}
+        queries = []
+        for query in self._queries:
+            frame_id = query[1]
+            score_key = (frame_id, query[2], query[3], query[5])
+            if frame_id in jpegs and score_key not in scores:
+                if frame_id not in decoded:
+                    decoded[frame_id] = cv2.imdecode(
+                        np.frombuffer(jpegs[frame_id], dtype=np.uint8),
+                        cv2.IMREAD_COLOR,
+                    )
+                scores[score_key] = self._score(query, decoded[frame_id])
+            score = scores.get(score_key)
+            queries.append(
+                {
+                    "age": round(now - query[0], 3),
+                    "frame": frame_id,
+                    "needle": query[2],
+                    "region": list(query[3]),
+                    "conf": query[4],
+                    "grayscale": query[5],
+                    "limit": query[6],
+                    "matches": query[7],
+                    "first_match": None if query[8] is None else list(query[8]),
+                    "score": score,
+                    "ms": round(query[9] * 1000, 2),
+                }
+            )
+        report = {
+            "error": None if error is None else repr(error),
+            "traceback": (
+                None
+                if error is None
+                else "".join(
+                    traceback.format_exception(type(error), error, error.__traceback__)
+                )
+            ),
+            "client": None if _client_origin is None else list(_client_origin),
+            "scale": SCALE,
+            "frames": [
+                {
+                    "frame": frame_id,
+                    "age": round(now - frame_time, 3),
+                    "file": f"frame-{frame_id}.jpg",
+                }
+                for (frame_id, frame_time, _) in frames
+            ],
+            "queries": queries,
+            "inputs": [
+                {"age": round(now - input_time, 3), "action": action}
+                for (input_time, action) in inputs.input_history
+            ],
+        }
+        stamp = time.strftime("crash-%Y%m%d-%H%M%S")
+        bundle_path = self.path / f"{stamp}.zip"
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            # Never overwrite an earlier report written within the same second.
+            number = 1
+            while True:
+                try:
+                    bundle = zipfile.ZipFile(bundle_path, "x")
+                    break
+                except FileExistsError:
+                    number += 1
+                    bundle_path = self.path / f"{stamp}-{number}.zip"
+            with bundle:
+                # JPEG images are already compressed.
+                for (frame_id, _, jpeg) in frames:
+                    bundle.writestr(f"frame-{frame_id}.jpg", jpeg)
+                bundle.writestr(
+                    "report.json",
+                    json.dumps(report, indent=1),
+                    compress_type=zipfile.ZIP_DEFLATED,
+                )
+        except OSError as error:
+            log.warning("Unable to write crash report %s: %s", bundle_path, error)
+            return None
+        self.dumps += 1
+        log.error("Wrote crash report %s.", bundle_path)
+        return bundle_path
+
+    def clear(self) -> None:
+        """
+        Forgets all recorded frames and searches, and resets the statistics.
+
+        """
+        self._frames.clear()
+        self._queries.clear()
+        self._latest = None
+        self._compressed_time = float("-inf")
+        self.dumps = 0
+        self.record_time = 0.0
+
+    def stats(self) -> dict:
+        """
+        Reports how much the flight recorder holds and what it has cost.
+
+        Returns:
+            Returns a dict containing the number of frames and searches
+            held, the size of the compressed frames in bytes, the number of
+            crash reports written, and the total time spent recording in
+            milliseconds.
+
+        """
+        return {
+            "frames": len(self._frames),
+            "queries": len(self._queries),
+            "frame_bytes": sum(len(frame[2]) for frame in self._frames),
+            "dumps": self.dumps,
+            "record_ms": self.record_time * 1000,
+        }
+
+
+RECORDER = FlightRecorder()
+
+
+# The intersection-over-union above which two matches of the same needle
+#   are considered the same match, see match_boxes().
+NMS_OVERLAP = 0.3
+_PEAK_KERNEL = np.ones((3, 3), dtype=np.uint8)
+# Searches at or above this confidence require a practically pixel-perfect
+#   match, so locate_all() finds them with locate_exact() instead of
+#   template matching.
+EXACT_MATCH_CONF = 0.999
+# The difference allowed between each color channel of each pixel in an
+#   exact match.
+EXACT_MATCH_TOLERANCE = 2
+# Settings of coarse-to-fine searches, see locate_pyramid(). A needle is
+#   halved at most PYRAMID_MAX_LEVELS times, as long as its smallest side
+#   stays at least PYRAMID_MIN_SIZE pixels long.
+PYRAMID_MAX_LEVELS = 3
+PYRAMID_MIN_SIZE = 8
+# Downscaling lowers the scores of matches, so candidates at the lowest
+#   resolution only need to exceed the confidence minus this.
+PYRAMID_CONF_SLACK = 0.2
+# The maximum number of candidates refined at full resolution.
+PYRAMID_CANDIDATES = 20
+
+
+def match_template(
+    needle: np.ndarray, haystack: np.ndarray, mask: np.ndarray = None
+) -> np.ndarray:
+    """
+    Runs normalized template matching, optionally excluding the needle's
+    masked-out pixels.
+
+    Returns:
+        Returns the result of cv2.matchTemplate() using TM_CCOEFF_NORMED.
+
+    """
+    if mask is None:
+        return cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+    result = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED, mask=mask)
+    # Masked matching divides by zero where the haystack is a single color.
+    return np.nan_to_num(result, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def locate_all(
+    needle: np.ndarray,
+    haystack: np.ndarray,
+    conf: float,
+    limit: int = 0,
+    exact: bool = None,
+    mask: np.ndarray = None,
+) -> list[tuple[int, int]]:
+    """
+    Template-matches a needle against a haystack. Matching follows the same
+    rules as PyAutoGUI's locate functions.
+
+    Args:
+        needle (ndarray): Image of the needle.
+        haystack (ndarray): Image to search within. Must have the same number
+                            of channels as the needle.
+        conf (float): The confidence value a match must exceed.
+        limit (int): The maximum number of matches to return. 0 means no
+                     limit. Default is 0.
+        exact (bool): Whether to search with locate_exact() instead of
+                      template matching. Default is None, which searches
+                      with locate_exact() if conf >= EXACT_MATCH_CONF.
+        mask (ndarray): Excludes pixels of the needle from matching, see
+                        Needle. Default is None.
+
+    Returns:
+        Returns a list of (left, top) coordinates of each match relative
+        to the haystack, in row-major order. Returns an empty list if
+        there are no matches.
+
+    """
+    if exact is None:
+        exact = conf >= EXACT_MATCH_CONF
+    if exact:
+        return locate_exact(needle, haystack, limit=limit, mask=mask)
+
+    if needle.shape[0] > haystack.shape[0] or needle.shape[1] > haystack.shape[1]:
+        return []
+
+    result = match_template(needle, haystack, mask)
+    match_indices = np.flatnonzero(result > conf)
+    if limit:
+        match_indices = match_indices[:limit]
+    (tops, lefts) = np.unravel_index(match_indices, result.shape)
+    return list(zip(lefts.tolist(), tops.tolist()))
+
+
+def locate_exact(
+    needle: np.ndarray,
+    haystack: np.ndarray,
+    tolerance: int = EXACT_MATCH_TOLERANCE,
+    limit: int = 0,
+    mask: np.ndarray = None,
+) -> list[tuple[int, int]]:
+    """
+    Finds the positions where the haystack contains a pixel-perfect (or
+    nearly pixel-perfect) copy of the needle. Much faster than template
+    matching when such a match is required.
+
+    Every position is first compared against a single pixel of the needle.
+    The few positions that survive are compared against a handful of other
+    pixels, then against the whole needle, so most positions are rejected
+    after a single comparison.
+
+    Unlike template matching, this doesn't tolerate changes in brightness.
+
+    Args:
+        needle (ndarray): See locate_all().
+        haystack (ndarray): See locate_all().
+        tolerance (int): The maximum difference allowed between each color
+                         channel of each pixel of the needle and of the
+                         haystack. Default is EXACT_MATCH_TOLERANCE.
+        limit (int): See locate_all().
+        mask (ndarray): See locate_all().
+
+    Returns:
+        Returns the same as locate_all().
+
+    """
+    (height, width) = needle.shape[:2]
+    if height > haystack.shape[0] or width > haystack.shape[1]:
+        return []
+
+    result_height = haystack.shape[0] - height + 1
+    result_width = haystack.shape[1] - width + 1
+    # Compare the first anchor against every position at once.
+    anchors = _exact_anchors(height, width, mask)
+    (anchor_y, anchor_x) = anchors[0]
+    window = haystack[
+        anchor_y : anchor_y + result_height, anchor_x : anchor_x + result_width
+    ]
+    color = np.atleast_1d(needle[anchor_y, anchor_x]).astype(np.int16)
+    candidates = cv2.inRange(
+        window,
+        tuple(np.clip(color - tolerance, 0, 255).tolist()),
+        tuple(np.clip(color + tolerance, 0, 255).tolist()),
+    )
+    (tops, lefts) = np.nonzero(candidates)
+
+    needle = needle.astype(np.int16)
+
+    # Narrow the candidates down with the remaining anchors.
+    for (anchor_y, anchor_x) in anchors[1:]:
+        if len(tops) == 0:
+            return []
+        pixels = haystack[tops + anchor_y, lefts + anchor_x].astype(np.int16)
+        difference = np.abs(pixels - needle[anchor_y, anchor_x])
+        if difference.ndim == 2:
+            difference = difference.max(axis=1)
+        survivors = difference <= tolerance
+        (tops, lefts) = (tops[survivors], lefts[survivors])
+
+    # Verify the survivors against the whole needle.
+    matches = []
+    for (top, left) in zip(tops.tolist(), lefts.tolist()):
+        candidate = haystack[top : top + height, left : left + width]
+        difference = np.abs(candidate.astype(np.int16) - needle)
+        if mask is not None:
+            difference = difference[mask > 0]
+        if difference.max() <= tolerance:
+            matches.append((left, top))
+            if len(matches) == limit:
+                break
+    return matches
+
+
+def _exact_anchors(
+    height: int, width: int, mask: np.ndarray = None
+) -> list[tuple[int, int]]:
+    """
+    Helper function that picks the pixels of a needle of the given size
+    that locate_exact() compares first: the center, then pixels scattered
+    evenly across the needle. If the needle has a mask, each anchor is moved
+    to the nearest pixel that isn't masked out.
+
+    """
+    positions = [(height // 2, width // 2)]
+    for row in np.linspace(0, height - 1, 3).astype(int):
+        for column in np.linspace(0, width - 1, 3).astype(int):
+            positions.append((int(row), int(column)))
+
+    if mask is not None:
+        (rows, columns) = np.nonzero(mask)
+        if len(rows) == 0:
+            raise ValueError("Mask doesn't include any pixels!")
+        nearest = []
+        for (row, column) in positions:
+            index = np.argmin(np.abs(rows - row) + np.abs(columns - column))
+            nearest.append((int(rows[index]), int(columns[index])))
+        positions = nearest
+
+    anchors = []
+    for anchor in positions:
+        if anchor not in anchors:
+            anchors.append(anchor)
+    return anchors
+
+
+def match_boxes(
+    needle: np.ndarray,
+    haystack: np.ndarray,
+    conf: float,
+    overlap: float = NMS_OVERLAP,
+    mask: np.ndarray = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds every distinct match of a needle within a haystack. Unlike
+    locate_all(), a needle is only matched once no matter how many
+    neighboring positions exceed the confidence.
+
+    Candidates are the local maxima of the template matching result that
+    exceed the confidence. Overlapping candidates are then suppressed,
+    keeping the best-scoring one.
+
+    Args:
+        needle (ndarray): See locate_all().
+        haystack (ndarray): See locate_all().
+        conf (float): See locate_all().
+        overlap (float): The intersection-over-union above which two
+                         matches are considered the same. Default is
+                         NMS_OVERLAP.
+        mask (ndarray): See locate_all().
+
+    Returns:
+        Returns a 2-tuple of an (N, 4) array containing the (left, top,
+        width, height) of each match relative to the haystack, and an (N,)
+        array containing each match's score, both sorted by descending
+        score.
+
+    """
+    (height, width) = needle.shape[:2]
+    if height > haystack.shape[0] or width > haystack.shape[1]:
+        return np.empty((0, 4), dtype=np.int32), np.empty(0, dtype=np.float32)
+
+    result = match_template(needle, haystack, mask)
+    peaks = (result > conf) & (result >= cv2.dilate(result, _PEAK_KERNEL))
+    (tops, lefts) = np.nonzero(peaks)
+    scores = result[tops, lefts]
+    order = np.argsort(-scores, kind="stable")
+    (tops, lefts, scores) = (tops[order], lefts[order], scores[order])
+
+    # Every box has the needle's dimensions, so the overlap of two boxes
+    #   only depends on the distance between them.
+    area = width * height
+    keep = np.ones(len(scores), dtype=bool)
+    for index in range(len(scores)):
+        if not keep[index]:
+            continue
+        rest = slice(index + 1, None)
+        overlap_width = np.maximum(0, width - np.abs(lefts[rest] - lefts[index]))
+        overlap_height = np.maximum(0, height - np.abs(tops[rest] - tops[index]))
+        intersection = overlap_width * overlap_height
+        iou = intersection / ((2 * area) - intersection)
+        keep[rest] &= iou <= overlap
+
+    boxes = np.column_stack(
+        (
+            lefts[keep],
+            tops[keep],
+            np.full(keep.sum(), width),
+            np.full(keep.sum(), height),
+        )
+    ).astype(np.int32)
+    return boxes, scores[keep]
+
+
+def _pyramid_levels(needle: np.ndarray) -> int:
+    """
+    Helper function that determines how many times a needle can be halved
+    by locate_pyramid() while staying large enough to match reliably.
+
+    """
+    levels = 0
+    size = min(needle.shape[:2])
+    while levels < PYRAMID_MAX_LEVELS and (size // 2) >= PYRAMID_MIN_SIZE:
+        size //= 2
+        levels += 1
+    return levels
+
+
+def locate_pyramid(
+    needle: np.ndarray,
+    haystack: np.ndarray,
+    conf: float,
+    limit: int = 0,
+    mask: np.ndarray = None,
+) -> list[tuple[int, int]]:
+    """
+    Finds a needle within a large haystack using a coarse-to-fine search.
+    The needle and haystack are downscaled, the best candidates are located
+    at the low resolution, and each candidate is then confirmed or rejected
+    at full resolution within a small window around it. Much faster than
+    locate_all() when the haystack is large, such as the entire display.
+
+    Args:
+        needle (ndarray): See locate_all().
+        haystack (ndarray): See locate_all().
+        conf (float): See locate_all(). Candidates at the low resolution
+                      only need to exceed conf - PYRAMID_CONF_SLACK.
+        limit (int): See locate_all().
+        mask (ndarray): See locate_all().
+
+    Returns:
+        Returns the same as locate_all().
+
+    """
+    levels = _pyramid_levels(needle)
+    if levels == 0:
+        return locate_all(needle, haystack, conf, limit, mask=mask)
+
+    (small_needle, small_haystack) = (needle, haystack)
+    for _ in range(levels):
+        small_needle = cv2.pyrDown(small_needle)
+        small_haystack = cv2.pyrDown(small_haystack)
+    small_mask = None
+    if mask is not None:
+        small_mask = cv2.resize(
+            mask,
+            (small_needle.shape[1], small_needle.shape[0]),
+            interpolation=cv2.INTER_NEAREST,
+        )
+
+    (candidates, _) = match_boxes(
+        small_needle, small_haystack, conf - PYRAMID_CONF_SLACK, mask=small_mask
+    )
+
+    # Refine each candidate within a window that covers the error of
+    #   downscaling, which can shift a match by more than one pixel at the
+    #   low resolution.
+    scale = 2**levels
+    margin = 2 * scale
+    (height, width) = needle.shape[:2]
+    matches = set()
+    for (left, top, _, _) in candidates[:PYRAMID_CANDIDATES].tolist():
+        window_left = max((left * scale) - margin, 0)
+        window_top = max((top * scale) - margin, 0)
+        window_right = min((left * scale) + width + margin, haystack.shape[1])
+        window_bottom = min((top * scale) + height + margin, haystack.shape[0])
+        found = locate_all(
+            needle,
+            haystack[window_top:window_bottom, window_left:window_right],
+            conf,
+            1,
+            mask=mask,
+        )
+        if found:
+            matches.add((window_left + found[0][0], window_top + found[0][1]))
+
+    # Sort into row-major order, like locate_all().
+    matches = sorted(matches, key=lambda match: (match[1], match[0]))
+    return matches[:limit] if limit else matches
+
+
+# Needle registry. --------------------------------------------------------------------------------
+
+
+# Suffix of the companion mask file of a needle, e.g. the mask of
+#   "iron-ore.png" is "iron-ore.mask.png".
+MASK_SUFFIX = ".mask.png"
+# Format of the name of a needle captured from a scaled client, e.g. the
+#   needle "iron-ore.png" captured at a scale of 1.5 is "iron-ore@1.5x.png".
+#   Captured needles are used instead of rescaling the unscaled one, which
+#   blurs it enough to lower its confidence at fractional scales.
+SCALED_NEEDLE_NAME = "{stem}@{scale:g}x.png"
+
+
+class Needle:
+    """
+    A needle image decoded into the formats used for matching.
+
+    Args:
+        path (str): Filepath to the needle.
+        color (ndarray): The needle as a BGR NumPy array.
+        mask (ndarray): A single-channel NumPy array the size of the needle.
+                        Only pixels whose mask value is nonzero are matched,
+                        so background pixels can be excluded. Default is
+                        None, which matches every pixel.
+
+    """
+
+    def __init__(self, path: str, color: np.ndarray, mask: np.ndarray = None):
+        self.path = path
+        self.color = color
+        self.gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+        self.mask = mask
+        (self.height, self.width) = color.shape[:2]
+
+
+def rescale_needle(needle: Needle, scale: float) -> Needle:
+    """
+    Resizes a needle to match a client of the given scale, see SCALE.
+
+    Returns:
+        Returns a new Needle object with the same path.
+
+    """
+    size = (max(round(needle.width * scale), 1), max(round(needle.height * scale), 1))
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    color = cv2.resize(needle.color, size, interpolation=interpolation)
+    mask = None
+    if needle.mask is not None:
+        # Masks must stay strictly binary.
+        mask = cv2.resize(needle.mask, size, interpolation=cv2.INTER_NEAREST)
+    return Needle(needle.path, color, mask)
+
+
+def mask_from_background(needle: np.ndarray, tolerance: int = 12) -> np.ndarray:
+    """
+    Creates a mask that excludes a needle's background, assuming the needle's
+    top left pixel is background and that the background is a single color,
+    like the inventory's.
+
+    Args:
+        needle (ndarray): The needle as a BGR NumPy array.
+        tolerance (int): Pixels whose color channels all differ from the
+                         background by no more than this are excluded.
+                         Default is 12.
+
+    Returns:
+        Returns the mask as a single-channel NumPy array, where 255 marks
+        pixels to match and 0 marks background pixels.
+
+    """
+    difference = cv2.absdiff(needle, np.full_like(needle, needle[0, 0]))
+    if difference.ndim == 3:
+        difference = difference.max(axis=2)
+    return np.where(difference > tolerance, 255, 0).astype(np.uint8)
+
+
+class NeedleRegistry:
+    """
+    Decodes each needle once and keeps it in memory, so searches don't have
+    to re-read and re-decode PNG files from disk.
+
+    Needles are keyed by their normalized filepath, so
+    "./needles/items/iron-ore.png" and "needles/items/iron-ore.png" share
+    an entry.
+
+    Needles are returned at the registry's scale, see set_scale(). Each
+    needle is rescaled once per scale, or read from a needle captured at
+    that scale if there is one (see SCALED_NEEDLE_NAME), so every search is
+    still a single-scale match.
+
+    Examples:
+        Preload the needles for a scenario:
+            NEEDLES.preload("./needles/game-screen/varrock-east-mine/",
+                            "./needles/items/iron-ore.png")
+
+        Get a decoded needle:
+            NEEDLES.get("./needles/items/iron-ore.png").gray
+
+    """
+
+    def __init__(self):
+        # Needles keyed by their normalized filepath and scale.
+        self._needles: dict[tuple[str, float], Needle] = {}
+        self.scale = 1.0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path: str) -> str:
+        # Make sure file path is OS-agnostic.
+        return str(pathlib.Path(path))
+
+    @staticmethod
+    def _decode(key: str) -> Needle:
+        image = cv2.imread(key, cv2.IMREAD_UNCHANGED)
+        if image is None:
+            raise FileNotFoundError(f"Could not read needle {key}!")
+
+        # Transparent pixels of needles with an alpha channel are excluded
+        #   from matching. Otherwise, a companion mask file may exclude them.
+        mask = None
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif image.shape[2] == 4:
+            alpha = image[:, :, 3]
+            if (alpha < 255).any():
+                mask = np.where(alpha > 0, 255, 0).astype(np.uint8)
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+
+        mask_path = pathlib.Path(key).with_suffix(MASK_SUFFIX)
+        if mask is None and mask_path.is_file():
+            mask = cv2.imread(str(mask_path), cv2.IMREAD_GRAYSCALE)
+            if mask is None or mask.shape != image.shape[:2]:
+                raise ValueError(f"Mask {mask_path} doesn't fit needle {key}!")
+            log.debug("Using mask %s", mask_path)
+
+        return Needle(key, image, mask)
+
+    def _load(self, key: str, scale: float) -> Needle:
+        """
+        Helper function that decodes a needle at the given scale, reusing
+        the unscaled needle if it has already been decoded.
+
+        """
+        if scale != 1.0:
+            path = pathlib.Path(key)
+            scaled_path = path.with_name(
+                SCALED_NEEDLE_NAME.format(stem=path.stem, scale=scale)
+            )
+            if scaled_path.is_file():
+                log.debug("Decoding needle %s", scaled_path)
+                needle = self._decode(str(scaled_path))
+                needle.path = key
+                self._needles[(key, scale)] = needle
+                return needle
+
+        needle = self._needles.get((key, 1.0))
+        if needle is None:
+            log.debug("Decoding needle %s", key)
+            needle = self._decode(key)
+            self._needles[(key, 1.0)] = needle
+        if scale != 1.0:
+            needle = rescale_needle(needle, scale)
+            self._needles[(key, scale)] = needle
+        return needle
+
+    def get(self, path: str, scale: float = None) -> Needle:
+        """
+        Gets a decoded needle, decoding it first if it isn't cached yet.
+
+        Args:
+            path (str): Filepath to the needle.
+            scale (float): The scale to get the needle at. Default is None,
+                           which uses the registry's scale.
+
+        Returns:
+            Returns a Needle object.
+
+        Raises:
+            Raises FileNotFoundError if the needle could not be read.
+
+        """
+        if scale is None:
+            scale = self.scale
+        key = self._key(path)
+        needle = self._needles.get((key, scale))
+        if needle is not None:
+            self.hits += 1
+            return needle
+
+        self.misses += 1
+        return self._load(key, scale)
+
+    def set_scale(self, scale: float) -> int:
+        """
+        Sets the scale at which needles are returned, and rescales every
+        needle that has already been decoded so searches at the new scale
+        don't have to.
+
+        Returns:
+            Returns the number of needles that were newly rescaled.
+
+        """
+        self.scale = scale
+        keys = {key for (key, _) in self._needles if (key, scale) not in self._needles}
+        for key in keys:
+            self._load(key, scale)
+        log.debug("Rescaled %s needles to %s", len(keys), scale)
+        return len(keys)
+
+    def preload(self, *paths: str) -> int:
+        """
+        Decodes needles ahead of time so the first search doesn't pay for it.
+        Preloading doesn't count towards the hit/miss statistics.
+
+        Args:
+            paths (str): Filepaths to needles, or to directories of needles.
+                         Directories are searched recursively for PNG files.
+
+        Returns:
+            Returns the number of needles that were newly decoded.
+
+        """
+        decoded = 0
+        for path in paths:
+            path_obj = pathlib.Path(path)
+            if path_obj.is_dir():
+                files = sorted(
+                    file
+                    for file in path_obj.rglob("*.png")
+                    if not file.name.endswith(MASK_SUFFIX) and "@" not in file.name
+                )
+            else:
+                files = [path_obj]
+
+            for file in files:
+                key = self._key(str(file))
+                if (key, self.scale) not in self._needles:
+                    self._load(key, self.scale)
+                    decoded += 1
+
+        log.debug("Preloaded %s needles, %s cached", decoded, len(self._needles))
+        return decoded
+
+    def clear(self) -> None:
+        """
+        Removes all needles from the registry and resets its statistics.
+
+        """
+        self._needles.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Reports how effective the registry has been.
+
+        Returns:
+            Returns a dict containing the number of cached needles, hits,
+            misses, and the hit rate as a decimal <= 1.
+
+        """
+        lookups = self.hits + self.misses
+        return {
+            "needles": len(self._needles),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+NEEDLES = NeedleRegistry()
+
+
+# Haystack maps. ----------------------------------------------------------------------------------
+#
+# travel() locates the player by matching the minimap against a haystack map
+#   of the area. Decoding a map's PNG file takes longer than most searches
+#   within it, so each map is converted once into an uncompressed grayscale
+#   NumPy file, which is then memory-mapped rather than read. Only the parts
+#   of a map that are searched are read from disk, and the pages read are
+#   shared with every other process using the same map.
+
+# The number of haystack maps kept open.
+MAP_CACHE_SIZE = 4
+
+
+class MapStore:
+    """
+    Opens haystack maps as read-only, memory-mapped grayscale arrays, and
+    keeps the most recently used maps open.
+
+    Each map is converted into a .npy file in the cache directory the first
+    time it's opened, and again whenever its PNG file is newer than the
+    converted file. Each level of a map's image pyramid (see cv2.pyrDown())
+    is converted into its own file the same way.
+
+    Args:
+        path (str): The directory to keep converted maps in. Default is the
+                    `map_cache_dir` setting in the main config file.
+        size (int): The number of maps to keep open. Default is
+                    MAP_CACHE_SIZE.
+
+    """
+
+    def __init__(self, path: str = None, size: int = MAP_CACHE_SIZE):
+        if path is None:
+            path = start.config["main"].get("map_cache_dir", "map-cache")
+        self.path = pathlib.Path(path)
+        self.size = size
+        # Maps keyed by their normalized filepath and pyramid level, least
+        #   recently used first.
+        self._maps: collections.OrderedDict = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.conversions = 0
+        # Total number of seconds spent opening and converting maps.
+        self.load_time = 0.0
+
+    def _cache_path(self, key: str, level: int) -> pathlib.Path:
+        path = pathlib.Path(key)
+        name = path.stem if level == 0 else f"{path.stem}@{level}"
+        # Maps with the same name in different directories mustn't collide.
+        digest = zlib.crc32(str(path.parent).encode())
+        return self.path / f"{name}-{digest:08x}.npy"
+
+    def _convert(self, key: str, level: int, cache_path: pathlib.Path) -> None:
+        """
+        Helper function that writes a map, or a level of its image pyramid,
+        to the cache directory.
+
+        """
+        if level == 0:
+            image = cv2.imread(key, cv2.IMREAD_GRAYSCALE)
+            if image is None:
+                raise FileNotFoundError(f"Could not read haystack map {key}!")
+        else:
+            image = cv2.pyrDown(np.asarray(self.get(key, level - 1)))
+        self.path.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so a crash while converting can't
+        #   leave a truncated map behind.
+        temporary_path = cache_path.with_name(cache_path.name + ".tmp")
+        with open(temporary_path, "wb") as cache_file:
+            np.save(cache_file, image)
+        os.replace(temporary_path, cache_path)
+        self.conversions += 1
+        log.debug("Converted haystack map %s level %s to %s", key, level, cache_path)
+
+    def get(self, path: str, level: int = 0) -> np.ndarray:
+        """
+        Gets a haystack map, converting it first if needed.
+
+        Args:
+            path (str): Filepath to the map's PNG file, or to the directory
+                        of a tiled map.
+            level (int): The level of the map's image pyramid to get. Each
+                         level is half the width and height of the previous
+                         one. Default is 0, the map itself.
+
+        Returns:
+            Returns the map as a read-only 2D NumPy array, or a TiledMap
+            object if the path is a directory.
+
+        Raises:
+            Raises FileNotFoundError if the map could not be read.
+
+            Raises ValueError if a pyramid level of a tiled map is requested.
+
+        """
+        # Make sure file path is OS-agnostic.
+        key = str(pathlib.Path(path))
+        haystack_map = self._maps.get((key, level))
+        if haystack_map is not None:
+            self._maps.move_to_end((key, level))
+            self.hits += 1
+            return haystack_map
+
+        self.misses += 1
+        started = time.perf_counter()
+        source_path = pathlib.Path(key)
+        if source_path.is_dir():
+            if level != 0:
+                raise ValueError("Tiled maps don't have image pyramids!")
+            haystack_map = TiledMap(key, cache_path=self.path)
+        else:
+            cache_path = self._cache_path(key, level)
+            if not source_path.is_file():
+                raise FileNotFoundError(f"Could not read haystack map {key}!")
+            if (
+                not cache_path.is_file()
+                or cache_path.stat().st_mtime_ns < source_path.stat().st_mtime_ns
+            ):
+                self._convert(key, level, cache_path)
+            haystack_map = np.load(cache_path, mmap_mode="r")
+        self._maps[(key, level)] = haystack_map
+        if len(self._maps) > self.size:
+            self._maps.popitem(last=False)
+        self.load_time += time.perf_counter() - started
+        return haystack_map
+
+    def clear(self) -> None:
+        """
+        Closes all maps and resets the statistics. Converted maps are kept.
+
+        """
+        self._maps.clear()
+        self.hits = 0
+        self.misses = 0
+        self.conversions = 0
+        self.load_time = 0.0
+
+    def stats(self) -> dict:
+        """
+        Reports how effective the store has been.
+
+        Returns:
+            Returns a dict containing the number of open maps, hits, misses,
+            the number of maps converted, and the average time taken to open
+            a map in milliseconds.
+
+        """
+        return {
+            "maps": len(self._maps),
+            "hits": self.hits,
+            "misses": self.misses,
+            "conversions": self.conversions,
+            "avg_load_ms": (
+                (self.load_time / self.misses) * 1000 if self.misses else 0.0
+            ),
+        }
+
+
+MAPS = MapStore()
+
+
+# Tiled maps. -------------------------------------------------------------------------------------
+#
+# A map too large to search or hold in memory at once, such as the entire
+#   world, is split into square tiles. Tiles are opened through their own
+#   MapStore, so only the tiles around the player are ever open.
+
+# The width and height of each tile of a tiled map, in pixels.
+TILE_SIZE = 256
+# The number of tiles of each tiled map kept open. Searching around the
+#   player needs up to 4, searching the entire map one at a time.
+TILE_CACHE_SIZE = 16
+# The name of a tiled map's index file, within its directory.
+TILE_INDEX_NAME = "index.json"
+# The name of each tile's file, within the tiled map's directory.
+TILE_NAME = "{column}_{row}.png"
+TILE_INDEX_VERSION = 1
+
+
+class TiledMap:
+    """
+    A haystack map stored as a directory of square tiles, along with an
+    index file listing the map's size and which tiles exist. Areas without a
+    tile, e.g. the sea, are black.
+
+    Slicing a tiled map with two slices, like a 2D NumPy array, returns the
+    area as an array. Only the tiles within the area are opened. Areas
+    within a single tile are returned without copying them.
+
+    Args:
+        path (str): The tiled map's directory.
+        size (int): The number of tiles to keep open. Default is
+                    TILE_CACHE_SIZE.
+        cache_path (str): The directory to keep converted tiles in. Default
+                          is the directory MAPS keeps converted maps in.
+
+    Raises:
+        Raises FileNotFoundError if the map's index file could not be read.
+
+    """
+
+    def __init__(
+        self, path: str, size: int = TILE_CACHE_SIZE, cache_path: str = None
+    ):
+        self.path = pathlib.Path(path)
+        index_path = self.path / TILE_INDEX_NAME
+        try:
+            with open(index_path, encoding="utf-8") as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError) as error:
+            raise FileNotFoundError(
+                f"Could not read tiled map index {index_path}!"
+            ) from error
+        if index.get("version") != TILE_INDEX_VERSION:
+            raise ValueError(f"Unsupported tiled map index {index_path}!")
+        self.tile_size = index["tile_size"]
+        self.shape = (index["height"], index["width"])
+        # The spatial index, from each tile's (column, row) to its file.
+        self._index = {
+            (column, row): str(self.path / TILE_NAME.format(column=column, row=row))
+            for (column, row) in index["tiles"]
+        }
+        if cache_path is None:
+            cache_path = MAPS.path
+        self.tiles = MapStore(path=cache_path, size=size)
+
+    def tiles_within(self, left: int, top: int, width: int, height: int) -> list:
+        """
+        Finds the tiles that overlap an area of the map.
+
+        Returns:
+            Returns a list of the (column, row) of each existing tile that
+            overlaps the area.
+
+        """
+        first_column = max(left // self.tile_size, 0)
+        first_row = max(top // self.tile_size, 0)
+        last_column = (left + width - 1) // self.tile_size
+        last_row = (top + height - 1) // self.tile_size
+        return [
+            (column, row)
+            for row in range(first_row, last_row + 1)
+            for column in range(first_column, last_column + 1)
+            if (column, row) in self._index
+        ]
+
+    def __getitem__(self, area: tuple[slice, slice]) -> np.ndarray:
+        (rows, columns) = area
+        (top, bottom, _) = rows.indices(self.shape[0])
+        (left, right, _) = columns.indices(self.shape[1])
+        width = max(right - left, 0)
+        height = max(bottom - top, 0)
+        tiles = self.tiles_within(left, top, width, height)
+
+        size = self.tile_size
+        if len(tiles) == 1:
+            (column, row) = tiles[0]
+            tile_left = column * size
+            tile_top = row * size
+            if (
+                left >= tile_left
+                and top >= tile_top
+                and right <= tile_left + size
+                and bottom <= tile_top + size
+            ):
+                tile = self.tiles.get(self._index[tiles[0]])
+                return tile[
+                    top - tile_top : bottom - tile_top,
+                    left - tile_left : right - tile_left,
+                ]
+
+        image = np.zeros((height, width), dtype=np.uint8)
+        for (column, row) in tiles:
+            tile = self.tiles.get(self._index[(column, row)])
+            tile_left = column * size
+            tile_top = row * size
+            # The part of the area within this tile.
+            area_left = max(left, tile_left)
+            area_top = max(top, tile_top)
+            area_right = min(right, tile_left + tile.shape[1])
+            area_bottom = min(bottom, tile_top + tile.shape[0])
+            image[
+                area_top - top : area_bottom - top, area_left - left : area_right - left
+            ] = tile[
+                area_top - tile_top : area_bottom - tile_top,
+                area_left - tile_left : area_right - tile_left,
+            ]
+        return image
+
+    def match(self, needle: np.ndarray) -> tuple[tuple[int, int], float]:
+        """
+        Matches a needle against the entire map, one tile at a time. Areas
+        without a tile are only searched where the needle could overlap one.
+
+        Returns:
+            Returns a 2-tuple of the (left, top) coordinates of the best match
+            and its score.
+
+        """
+        (height, width) = needle.shape[:2]
+        size = self.tile_size
+        # A needle overlapping a tile may start in a missing tile to its left
+        #   or above it, so search every grid cell within the needle's size
+        #   of an existing tile.
+        reach_x = -(-width // size)
+        reach_y = -(-height // size)
+        cells = {
+            (column - offset_x, row - offset_y)
+            for (column, row) in self._index
+            for offset_x in range(reach_x + 1)
+            for offset_y in range(reach_y + 1)
+            if column >= offset_x and row >= offset_y
+        }
+        best = ((0, 0), -1.0)
+        for (column, row) in sorted(cells):
+            left = column * self.tile_size
+            top = row * self.tile_size
+            # Include enough of the neighboring tiles to match the needle
+            #   across the tile's right and bottom edges.
+            haystack = self[
+                top : top + self.tile_size + height - 1,
+                left : left + self.tile_size + width - 1,
+            ]
+            if haystack.shape[0] < height or haystack.shape[1] < width:
+                continue
+            result = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+            (_, score, _, (x, y)) = cv2.minMaxLoc(result)
+            if score > best[1]:
+                best = ((left + x, top + y), score)
+        return best
+
+
+def write_tiled_map(image: np.ndarray, path: str, tile_size: int = TILE_SIZE) -> int:
+    """
+    Splits a grayscale map into a tiled map. Tiles that are entirely black
+    aren't written.
+
+    Args:
+        image (ndarray): The map to split.
+        path (str): The directory to write the tiled map to.
+        tile_size (int): The width and height of each tile. Default is
+                         TILE_SIZE.
+
+    Returns:
+        Returns the number of tiles written.
+
+    """
+    path = pathlib.Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    (height, width) = image.shape[:2]
+    tiles = []
+    for top in range(0, height, tile_size):
+        for left in range(0, width, tile_size):
+            tile = image[top : top + tile_size, left : left + tile_size]
+            if not tile.any():
+                continue
+            (column, row) = (left // tile_size, top // tile_size)
+            cv2.imwrite(str(path / TILE_NAME.format(column=column, row=row)), tile)
+            tiles.append([column, row])
+    index = {
+        "version": TILE_INDEX_VERSION,
+        "tile_size": tile_size,
+        "width": width,
+        "height": height,
+        "tiles": tiles,
+    }
+    with open(path / TILE_INDEX_NAME, "w", encoding="utf-8") as index_file:
+        json.dump(index, index_file)
+    return len(tiles)
+
+
+# Last-known-location hints. ----------------------------------------------------------------------
+
+
+class HintCache:
+    """
+    Remembers where each needle was last found within each region. Most
+    needles (buttons, spell icons, rocks seen from a fixed camera) appear in
+    nearly the same place every time, so a small window around the last hit
+    is searched first, and the full region is only searched if that fails.
+
+    Args:
+        margin (int): The number of pixels around the last hit to include in
+                      the window that's searched first. Default is 8.
+
+    """
+
+    def __init__(self, margin: int = 8):
+        self.margin = margin
+        self._hints: dict[tuple, tuple[int, int]] = {}
+        # The confidence of each key's last match, which shows how much
+        #   headroom each needle has above the confidence it's searched with.
+        self._scores: dict[tuple, float] = {}
+        # Searches where the needle was found near its last hit.
+        self.hits = 0
+        # Searches where the needle had a hint but wasn't found near it.
+        self.misses = 0
+        # Searches where the needle had no hint yet.
+        self.cold = 0
+
+    def locate(
+        self,
+        key: tuple,
+        needle: np.ndarray,
+        haystack: np.ndarray,
+        conf: float,
+        mask: np.ndarray = None,
+        pyramid: bool = False,
+    ) -> list[tuple[int, int]]:
+        """
+        Finds a single match of the needle, trying the hint for the given key
+        first.
+
+        Args:
+            key (tuple): Identifies the needle and region being searched,
+                         e.g. a 2-tuple of the needle's filepath and region.
+            needle (ndarray): See locate_all().
+            haystack (ndarray): See locate_all().
+            conf (float): See locate_all().
+            mask (ndarray): See locate_all().
+            pyramid (bool): Whether to search the whole haystack with
+                            locate_pyramid() if the hint misses. Default is
+                            False.
+
+        Returns:
+            Returns the same as locate_all() with a limit of 1.
+
+        """
+        hint = self._hints.get(key)
+        if hint is None:
+            self.cold += 1
+        else:
+            (needle_height, needle_width) = needle.shape[:2]
+            left = max(hint[0] - self.margin, 0)
+            top = max(hint[1] - self.margin, 0)
+            right = hint[0] + needle_width + self.margin
+            bottom = hint[1] + needle_height + self.margin
+            matches = locate_all(
+                needle, haystack[top:bottom, left:right], conf, 1, mask=mask
+            )
+            if matches:
+                self.hits += 1
+                match = (left + matches[0][0], top + matches[0][1])
+                self.remember(key, needle, haystack, match, mask)
+                return [match]
+            self.misses += 1
+
+        if pyramid:
+            matches = locate_pyramid(needle, haystack, conf, 1, mask=mask)
+        else:
+            matches = locate_all(needle, haystack, conf, 1, mask=mask)
+        if matches:
+            self.remember(key, needle, haystack, matches[0], mask)
+        return matches
+
+    def confirm(self, key: tuple, match: tuple[int, int]) -> bool:
+        """
+        Counts a search that reused an earlier match instead of calling
+        locate(), e.g. because ChangeDetector skipped it, in the same way
+        locate() would have.
+
+        Args:
+            key (tuple): See locate().
+            match (tuple): The (left, top) position of the reused match.
+
+        Returns:
+            Returns True if the match is already the key's hint. Returns
+            False if it isn't, in which case it must be stored with
+            remember().
+
+        """
+        hint = self._hints.get(key)
+        if hint is None:
+            self.cold += 1
+        elif hint == match:
+            self.hits += 1
+            return True
+        else:
+            self.misses += 1
+        return False
+
+    def remember(
+        self,
+        key: tuple,
+        needle: np.ndarray,
+        haystack: np.ndarray,
+        match: tuple[int, int],
+        mask: np.ndarray = None,
+    ) -> None:
+        """
+        Stores a match as the key's hint, along with its confidence.
+        Measuring the confidence only matches the needle at a single
+        position.
+
+        """
+        (needle_height, needle_width) = needle.shape[:2]
+        (left, top) = match
+        window = haystack[top : top + needle_height, left : left + needle_width]
+        self._hints[key] = match
+        self._scores[key] = round(float(match_template(needle, window, mask)[0, 0]), 4)
+
+    def dump(self) -> list[tuple[tuple, tuple[int, int], float]]:
+        """
+        Lists every hint, see load().
+
+        Returns:
+            Returns a list of 3-tuples of each hint's key, its (left, top)
+            position and the confidence of its last match.
+
+        """
+        return [
+            (key, hint, self._scores.get(key, 0.0)) for (key, hint) in self._hints.items()
+        ]
+
+    def load(self, hints: list[tuple[tuple, tuple[int, int], float]]) -> None:
+        """
+        Adds hints listed by dump(), replacing any existing hints for the
+        same keys. Hints that turn out to be wrong only cost a search of
+        their small window, so loaded hints don't need to be validated.
+
+        """
+        for (key, hint, score) in hints:
+            self._hints[key] = tuple(hint)
+            self._scores[key] = score
+
+    def clear(self) -> None:
+        """
+        Forgets all hints and resets the statistics.
+
+        """
+        self._hints.clear()
+        self._scores.clear()
+        self.hits = 0
+        self.misses = 0
+        self.cold = 0
+
+    def stats(self) -> dict:
+        """
+        Reports how effective the hints have been.
+
+        Returns:
+            Returns a dict containing the number of hints, hits, misses, cold
+            searches, the hit rate as a decimal <= 1, and the lowest
+            confidence of any hint's last match.
+
+        """
+        lookups = self.hits + self.misses + self.cold
+        return {
+            "hints": len(self._hints),
+            "hits": self.hits,
+            "misses": self.misses,
+            "cold": self.cold,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "lowest_score": min(self._scores.values(), default=None),
+        }
+
+
+HINTS = HintCache()
+
+
+# Change detection. -------------------------------------------------------------------------------
+
+
+class ChangeDetector:
+    """
+    Skips template matching in regions whose pixels haven't changed. Each
+    search's result is stored alongside a checksum of the haystack it was
+    made in. If the next identical search is made in a haystack with the
+    same checksum, the stored result is returned without matching again.
+
+    This mostly benefits polling loops that wait for something to appear
+    in a region that rarely changes, such as the chat menu or inventory.
+
+    """
+
+    def __init__(self):
+        # Checksums of regions within the shared frame, keyed by region, so
+        #   searching for several needles in a region only computes it once.
+        self._checksums: dict[tuple, tuple[int, int]] = {}
+        self._results: dict[tuple, tuple[int, list]] = {}
+        self.checks = 0
+        self.skips = 0
+        # Total number of seconds spent computing checksums.
+        self.diff_time = 0.0
+
+    def checksum(self, region: tuple[int, int, int, int], haystack: np.ndarray) -> int:
+        """
+        Computes the checksum of a haystack of the given region. Checksums of
+        regions cropped from the shared frame are cached for that frame.
+
+        """
+        cacheable = in_client(region)
+        if cacheable:
+            cached = self._checksums.get(region)
+            if cached is not None and cached[0] == _frame_id:
+                return cached[1]
+
+        start_time = time.perf_counter()
+        checksum = zlib.crc32(np.ascontiguousarray(haystack))
+        self.diff_time += time.perf_counter() - start_time
+
+        if cacheable:
+            self._checksums[region] = (_frame_id, checksum)
+        return checksum
+
+    def get(self, key: tuple, checksum: int):
+        """
+        Gets the stored result of a search, if the haystack hasn't changed
+        since it was made.
+
+        Args:
+            key (tuple): Identifies the search, i.e. everything besides the
+                         haystack that affects its result.
+            checksum (int): The checksum of the current haystack.
+
+        Returns:
+            Returns the stored result, or None if there is no stored result
+            or the haystack has changed.
+
+        """
+        self.checks += 1
+        stored = self._results.get(key)
+        if stored is not None and stored[0] == checksum:
+            self.skips += 1
+            return stored[1]
+        return None
+
+    def put(self, key: tuple, checksum: int, result: list) -> None:
+        """
+        Stores the result of a search. See get() for the args.
+
+        """
+        self._results[key] = (checksum, result)
+
+    def clear(self) -> None:
+        """
+        Forgets all stored results and resets the statistics.
+
+        """
+        self._checksums.clear()
+        self._results.clear()
+        self.checks = 0
+        self.skips = 0
+        self.diff_time = 0.0
+
+    def stats(self) -> dict:
+        """
+        Reports how effective change detection has been.
+
+        Returns:
+            Returns a dict containing the number of checks, skipped matches,
+            the skip rate as a decimal <= 1, and the total and average number
+            of miliseconds spent computing checksums.
+
+        """
+        return {
+            "checks": self.checks,
+            "skips": self.skips,
+            "skip_rate": (self.skips / self.checks) if self.checks else 0.0,
+            "diff_ms": self.diff_time * 1000,
+            "diff_ms_avg": (self.diff_time * 1000 / self.checks) if self.checks else 0.0,
+        }
+
+
+CHANGES = ChangeDetector()
+
+
+# Deadline-based waits. ---------------------------------------------------------------------------
+
+# The default bounds, in seconds, of the interval between polls of a wait.
+WAIT_POLL_MIN = 0.02
+WAIT_POLL_MAX = 0.25
+# The factor by which the poll interval grows while the client is static.
+WAIT_BACKOFF = 1.5
+# The number of seconds a single search used to take, used to convert
+#   Vision's loop_num into a timeout.
+WAIT_SEARCH_ALLOWANCE = 0.05
+
+
+class WaitEngine:
+    """
+    Waits until a predicate becomes true or a wall-clock deadline passes.
+    The predicate is evaluated against every new frame, so the wait fires
+    as soon as the client reaches the expected state instead of after a
+    fixed number of tries.
+
+    The interval between polls adapts to the client. While the frame keeps
+    changing, the client is in flux and is polled every poll_min seconds.
+    While the frame stays the same, the interval grows by WAIT_BACKOFF up
+    to poll_max seconds, since capturing it again is unlikely to help.
+
+    The duration of each wait is logged and recorded, see stats().
+
+    """
+
+    def __init__(
+        self,
+        poll_min: float = WAIT_POLL_MIN,
+        poll_max: float = WAIT_POLL_MAX,
+    ):
+        self.poll_min = poll_min
+        self.poll_max = poll_max
+        self.waits = 0
+        self.timeouts = 0
+        self.polls = 0
+        # Total and longest number of seconds spent waiting.
+        self.wait_time = 0.0
+        self.wait_time_max = 0.0
+        # The duration in seconds of the most recent wait.
+        self.last_duration = 0.0
+
+    def record(self, duration: float, polls: int, timed_out: bool) -> None:
+        """
+        Counts a finished wait in the statistics. Waits that don't go
+        through until(), such as first_of(), must call this themselves.
+
+        Args:
+            duration (float): The number of seconds the wait took.
+            polls (int): The number of times the wait's condition was
+                         checked.
+            timed_out (bool): Whether the wait ended because it timed out.
+
+        """
+        self.waits += 1
+        self.timeouts += int(timed_out)
+        self.polls += polls
+        self.wait_time += duration
+        self.wait_time_max = max(self.wait_time_max, duration)
+        self.last_duration = duration
+
+    def until(
+        self,
+        predicate,
+        timeout: float,
+        poll_min: float = None,
+        poll_max: float = None,
+        description: str = "condition",
+    ):
+        """
+        Evaluates the predicate on each new frame until it returns a truthy
+        value. The predicate is always evaluated at least once, even if the
+        timeout is 0.
+
+        Args:
+            predicate (callable): Takes no arguments. Returns a falsy value
+                                  until the wait should end.
+            timeout (float): The maximum number of seconds to wait.
+            poll_min (float): The minimum number of seconds between polls.
+                              Default is this object's poll_min.
+            poll_max (float): The maximum number of seconds between polls.
+                              Default is this object's poll_max.
+            description (str): What is being waited for, used for logging.
+
+        Returns:
+            Returns the predicate's first truthy return value.
+
+        Raises:
+            Raises start.TimeoutException if the deadline passed before the
+            predicate became true.
+
+        """
+        poll_min = self.poll_min if poll_min is None else poll_min
+        poll_max = max(poll_min, self.poll_max if poll_max is None else poll_max)
+
+        start_time = time.monotonic()
+        deadline = start_time + timeout
+        interval = poll_min
+        previous_checksum = None
+        polls = 0
+
+        while True:
+            polls += 1
+            result = predicate()
+            now = time.monotonic()
+            if result:
+                self.record(now - start_time, polls, timed_out=False)
+                log.debug(
+                    "Waited %.3f seconds for %s (%s polls).",
+                    now - start_time,
+                    description,
+                    polls,
+                )
+                return result
+
+            if now >= deadline:
+                self.record(now - start_time, polls, timed_out=True)
+                log.debug(
+                    "Timed out after %.3f seconds waiting for %s (%s polls).",
+                    now - start_time,
+                    description,
+                    polls,
+                )
+                raise start.TimeoutException(
+                    "Timed out waiting for " + description + "!"
+                )
+
+            # Poll quickly while the client is changing, back off while it
+            #   isn't. The frame's checksum is cached, so this is nearly free
+            #   if the predicate already searched the frame.
+            changed = False
+            if _frame is not None and _frame_region == CLIENT:
+                checksum = CHANGES.checksum(CLIENT, _frame)
+                changed = checksum != previous_checksum
+                previous_checksum = checksum
+            if changed:
+                interval = poll_min
+            else:
+                interval = min(interval * WAIT_BACKOFF, poll_max)
+
+            time.sleep(min(interval, deadline - now))
+            invalidate_frame()
+
+    def clear(self) -> None:
+        """
+        Resets the statistics.
+
+        """
+        self.waits = 0
+        self.timeouts = 0
+        self.polls = 0
+        self.wait_time = 0.0
+        self.wait_time_max = 0.0
+        self.last_duration = 0.0
+
+    def stats(self) -> dict:
+        """
+        Reports how long waits have taken.
+
+        Returns:
+            Returns a dict containing the number of waits, timeouts and polls,
+            and the total, average and longest number of seconds spent
+            waiting.
+
+        """
+        return {
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+            "polls": self.polls,
+            "wait_s": self.wait_time,
+            "wait_s_avg": (self.wait_time / self.waits) if self.waits else 0.0,
+            "wait_s_max": self.wait_time_max,
+        }
+
+
+WAITS = WaitEngine()
+
+
+def wait_until(predicate, timeout: float, **kwargs):
+    """
+    Waits until the predicate becomes true using the shared WaitEngine. See
+    WaitEngine.until() for the args, return value and exceptions.
+
+    Examples:
+        Wait up to 30 seconds for the inventory to fill up:
+            vision.wait_until(
+                lambda: inventory.Inventory([ore]).is_full(),
+                timeout=30,
+                description="a full inventory",
+            )
+
+    """
+    return WAITS.until(predicate, timeout, **kwargs)
+
+
+# Asynchronous waits. -----------------------------------------------------------------------------
+
+
+class FrameTicker:
+    """
+    Captures a new shared frame on an adaptive interval (see WaitEngine) and
+    wakes every coroutine waiting for it. Conditions that are awaited
+    together therefore all see the same frames.
+
+    """
+
+    def __init__(
+        self, poll_min: float = WAIT_POLL_MIN, poll_max: float = WAIT_POLL_MAX
+    ):
+        self.poll_min = poll_min
+        self.poll_max = max(poll_min, poll_max)
+        # Incremented each time a new frame is captured.
+        self.tick = 0
+        self._ticked = asyncio.Condition()
+
+    async def wait(self, seen: int) -> int:
+        """
+        Waits until a frame newer than the given tick has been captured.
+
+        Returns:
+            Returns the tick of the new frame.
+
+        """
+        async with self._ticked:
+            await self._ticked.wait_for(lambda: self.tick > seen)
+            return self.tick
+
+    async def run(self) -> None:
+        """
+        Captures frames until cancelled.
+
+        """
+        interval = self.poll_min
+        previous_checksum = None
+        while True:
+            invalidate_frame()
+            checksum = CHANGES.checksum(CLIENT, grab_frame())
+            if checksum != previous_checksum:
+                interval = self.poll_min
+            else:
+                interval = min(interval * WAIT_BACKOFF, self.poll_max)
+            previous_checksum = checksum
+
+            async with self._ticked:
+                self.tick += 1
+                self._ticked.notify_all()
+            await asyncio.sleep(interval)
+
+
+async def _watch(predicate, ticker: FrameTicker):
+    """
+    Helper function that evaluates a predicate on each new frame until it
+    returns a truthy value, then returns that value.
+
+    """
+    tick = 0
+    while True:
+        tick = await ticker.wait(tick)
+        result = predicate()
+        if result:
+            return result
+
+
+async def first_of(
+    *conditions,
+    timeout: float,
+    poll_min: float = WAIT_POLL_MIN,
+    poll_max: float = WAIT_POLL_MAX,
+) -> tuple:
+    """
+    Waits for the first of several conditions to become true. Every
+    condition is evaluated against each new frame, so the reaction time is
+    bounded by a single frame rather than by a series of searches. Once a
+    condition is met, the others are cancelled.
+
+    Args:
+        conditions: Any number of predicates, such as those returned by
+                    Vision.appears() and Vision.vanishes(), or awaitables.
+                    A predicate takes no arguments and returns a truthy
+                    value once its condition is met.
+        timeout (float): The maximum number of seconds to wait.
+        poll_min (float): See WaitEngine.until().
+        poll_max (float): See WaitEngine.until().
+
+    Returns:
+        Returns a 2-tuple of the condition that was met first, exactly as it
+        was passed in, and the value it returned.
+
+    Raises:
+        Raises start.TimeoutException if no condition was met in time.
+
+    Examples:
+        Wait up to 3 minutes for a level-up or for the inventory's bars to
+        run out:
+            level_up = vision.Vision(region=vision.CHAT_MENU,
+                needle="./needles/chat-menu/level-up.png").appears()
+            bars_gone = vision.Vision(region=vision.INV,
+                needle="./needles/items/iron-bar.png").vanishes()
+            (condition, _) = await vision.first_of(level_up, bars_gone,
+                timeout=180)
+            if condition is level_up:
+                ...
+
+    """
+    ticker = FrameTicker(poll_min, poll_max)
+    tasks = {}
+    for condition in conditions:
+        if inspect.isawaitable(condition):
+            task = asyncio.ensure_future(condition)
+        else:
+            task = asyncio.ensure_future(_watch(condition, ticker))
+        tasks[task] = condition
+    ticker_task = asyncio.ensure_future(ticker.run())
+
+    start_time = time.monotonic()
+    try:
+        (done, _) = await asyncio.wait(
+            tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        for task in list(tasks) + [ticker_task]:
+            task.cancel()
+        await asyncio.gather(ticker_task, *tasks, return_exceptions=True)
+    duration = time.monotonic() - start_time
+
+    if not done:
+        WAITS.record(duration, ticker.tick, timed_out=True)
+        log.debug(
+            "Timed out after %.3f seconds waiting for any of %s conditions.",
+            duration,
+            len(conditions),
+        )
+        raise start.TimeoutException("Timed out waiting for any condition!")
+
+    WAITS.record(duration, ticker.tick, timed_out=False)
+    # If several conditions were met on the same frame, prefer the one that
+    #   was passed first.
+    winner = min(done, key=list(tasks).index)
+    log.debug(
+        "Condition %s of %s was met after %.3f seconds.",
+        list(tasks).index(winner) + 1,
+        len(conditions),
+        duration,
+    )
+    return (tasks[winner], winner.result())
+
+
+# TODO: Add examples of usage.
+# TODO: Rename to "Needle" or "Image".
+class Vision:
+    """
+    Main class locating and clicking on images on the display.
+    All coordinates are relative to the top left corner of the display.
+    All coordinates are in a (left, top, width, height) format.
+
+    Args:
+        region (tuple): A 4-tuple containing the Left, Top, Width, and
+                        Height of the region in which to look for the
+                        needle. This typically will be one of the tuples
+                        defined at the top of this file like `INV` or
+                        `GAME_SCREEN`.
+        needle (file): A filepath to an the image to search for within the
+                       `region` tuple. May be omitted when only using
+                       find_any(), find_all_of() or wait_for_any().
+                       Transparent pixels of the needle, or pixels excluded
+                       by its companion mask file (see MASK_SUFFIX), are
+                       ignored when matching.
+        loctype (str): Whether to return the needle's (ltwh) coordinates
+                       or its (X, Y) center. Available values are `regular`
+                       and `center`.
+            regular = Returns the needle's left, top, width, and height
+                      as a 4-tuple.
+            center = Returns the (X, Y) coordinates of the needle's
+                     center as a 2-tuple (relative to the display's
+                     dimensions).
+        conf (float): The confidence value required to match the needle
+                      successfully, expressed as a decimal <= 1. This is
+                      used by OpenCV's template matching. Default is 0.95.
+        loop_num (int): Used to derive the timeout of wait_for_needle()
+                        and wait_for_any() if `timeout` isn't given. The
+                        timeout is roughly how long the given number of
+                        searches used to take. Default is 10.
+        loop_sleep_range (tuple): A 2-tuple containing the minimum and
+                                  maximum number of miliseconds to wait
+                                  between searches. The interval adapts
+                                  within this range, see WaitEngine.
+                                  Default is (0, 100).
+        timeout (float): The maximum number of seconds wait_for_needle()
+                         and wait_for_any() will wait for a needle to
+                         appear. Overrides loop_num. Default is None.
+        pyramid (bool): Searches for a single needle with a coarse-to-fine
+                        search (see locate_pyramid()), which is much faster
+                        in large regions like DISPLAY. Default is False.
+        grayscale (bool): Converts the haystack to grayscale before
+                          searching within it. Speeds up searching by
+                          about 30%. Default is False.
+
+    """
+
+    def __init__(
+        self,
+        region: tuple[int, int, int, int],
+        needle: str = "",
+        loctype: str = "regular",
+        conf: float = 0.95,
+        # TODO: Move to a parameter of wait_for_needle().
+        loop_num: int = 10,
+        # TODO: Move to a parameter of wait_for_needle().
+        loop_sleep_range: tuple[int, int] = (0, 100),
+        grayscale: bool = False,
+        timeout: float = None,
+        pyramid: bool = False,
+    ):
+        self.grayscale = grayscale
+        self.pyramid = pyramid
+        self.region = region
+        self.needle = needle
+        self.loctype = loctype
+        self.conf = conf
+        self.loop_num = loop_num
+        self.loop_sleep_range = loop_sleep_range
+        self.timeout = timeout
+
+    def _match(
+        self,
+        needle_path: str,
+        region: tuple[int, int, int, int],
+        haystack: np.ndarray,
+        limit: int = 0,
+    ) -> tuple[Needle, list[tuple[int, int]]]:
+        """
+        Helper function that matches a needle within a haystack of the given
+        region using this object's confidence and grayscale settings.
+        Searches for a single match (limit=1) try the needle's last known
+        location first, see HintCache. Searches in haystacks that haven't
+        changed since the same search was last made aren't matched again,
+        see ChangeDetector. Every search is recorded by RECORDER.
+
+        Returns:
+            Returns a 2-tuple of the Needle object and the list of (left, top)
+            matches relative to the haystack, as returned by locate_all().
+
+        """
+        started = time.perf_counter()
+        needle = NEEDLES.get(needle_path)
+        search_key = (
+            needle.path,
+            region,
+            self.conf,
+            self.grayscale,
+            self.pyramid,
+            limit,
+        )
+        checksum = CHANGES.checksum(region, haystack)
+        matches = CHANGES.get(search_key, checksum)
+        if matches is None:
+            needle_image = needle.color
+            if self.grayscale:
+                haystack = cv2.cvtColor(haystack, cv2.COLOR_BGR2GRAY)
+                needle_image = needle.gray
+
+            if limit == 1:
+                key = (needle.path, region)
+                matches = HINTS.locate(
+                    key,
+                    needle_image,
+                    haystack,
+                    self.conf,
+                    mask=needle.mask,
+                    pyramid=self.pyramid,
+                )
+            else:
+                matches = locate_all(
+                    needle_image, haystack, self.conf, limit, mask=needle.mask
+                )
+            CHANGES.put(search_key, checksum, matches)
+        elif limit == 1 and matches and not HINTS.confirm((needle.path, region), matches[0]):
+            # The needle is where the skipped search found it, so make that
+            #   its hint, as HINTS.locate() would have.
+            needle_image = needle.color
+            if self.grayscale:
+                haystack = cv2.cvtColor(haystack, cv2.COLOR_BGR2GRAY)
+                needle_image = needle.gray
+            HINTS.remember(
+                (needle.path, region), needle_image, haystack, matches[0], needle.mask
+            )
+        RECORDER.record_query(
+            needle.path,
+            region,
+            self.conf,
+            self.grayscale,
+            limit,
+            matches,
+            time.perf_counter() - started,
+        )
+        return needle, matches
+
+    def _search(self, limit: int = 0) -> tuple[Needle, list[tuple[int, int]]]:
+        """
+        Helper function that matches self.needle within self.region.
+
+        """
+        return self._match(
+            self.needle, self.region, get_haystack(self.region), limit
+        )
+
+    def _coords(
+        self, needle: Needle, region: tuple[int, int, int, int], match: tuple[int, int]
+    ) -> tuple:
+        """
+        Helper function that converts a match relative to a region into
+        display coordinates, in the format given by self.loctype.
+
+        """
+        left = region[0] + match[0]
+        top = region[1] + match[1]
+
+        if self.loctype == "regular":
+            return left, top, needle.width, needle.height
+        if self.loctype == "center":
+            return left + int(needle.width / 2), top + int(needle.height / 2)
+        raise RuntimeError(
+            "self.loctype must be 'regular' or 'center', got '%s'", self.loctype
+        )
+
+    def _haystacks(self, needles: list):
+        """
+        Helper generator that pairs each needle with the region to search for
+        it in and a haystack of that region. Each region is only captured
+        once, no matter how many needles are searched for within it.
+
+        Args:
+            needles (list): A list of needle filepaths. Any item may instead
+                            be a 2-tuple of a filepath and the region to
+                            search within, which overrides self.region for
+                            that needle.
+
+        Yields:
+            Yields a 3-tuple of the needle's filepath, its region and the
+            haystack to search within.
+
+        """
+        haystacks = {}
+        for needle in needles:
+            if isinstance(needle, tuple):
+                (needle, region) = needle
+            else:
+                region = self.region
+            if region not in haystacks:
+                haystacks[region] = get_haystack(region)
+            yield needle, region, haystacks[region]
+
+    # TODO: Add examples of usage.
+    def find_needle(self):
+        """
+        Searches within the self.ltwh coordinates for self.needle.
+
+        Returns:
+            If the needle is found and self.loctype is `regular`, returns
+            the needle's left/top/width/height dimensions as a 4-tuple.
+
+            If the needle is found and self.loctype is `center`, returns
+            coordinates of the needle's (X, Y) center as a 2-tuple.
+
+            If the needle is not found, returns False.
+
+        """
+        (needle, matches) = self._search(limit=1)
+        if not matches:
+            raise start.NeedleError("Could not find needle!", self.needle)
+
+        needle_coords = self._coords(needle, self.region, matches[0])
+        log.debug("Found %s image %s, %s", self.loctype, self.needle, needle_coords)
+        return needle_coords
+
+    def find_any(self, needles: list) -> tuple:
+        """
+        Searches for several needles within a single capture and returns
+        the first one that's found. Useful for checking which of several
+        possible states the client is in.
+
+        Args:
+            needles (list): A list of needle filepaths, in order of priority.
+                            See _haystacks() for how to search each needle
+                            in a different region.
+
+        Examples:
+            Determine if the client is logged in or logged out:
+            vision.Vision(region=vis.DISPLAY, loctype="center").find_any(
+                ["./needles/minimap/orient.png",
+                 "./needles/login-menu/orient-logged-out.png"])
+
+        Returns:
+            Returns a 2-tuple of the filepath of the needle that was found
+            and its coordinates, in the format given by self.loctype.
+
+        Raises:
+            Raises start.NeedleError if none of the needles could be found.
+
+        """
+        for (needle_path, region, haystack) in self._haystacks(needles):
+            (needle, matches) = self._match(needle_path, region, haystack, limit=1)
+            if matches:
+                needle_coords = self._coords(needle, region, matches[0])
+                log.debug("Found %s of %s, %s", needle_path, needles, needle_coords)
+                return needle_path, needle_coords
+
+        raise start.NeedleError("Could not find any needle!", needles)
+
+    def find_all_of(self, needles: list) -> dict:
+        """
+        Searches for several needles within a single capture and returns
+        every one that's found.
+
+        Args:
+            needles (list): A list of needle filepaths. See _haystacks()
+                            for how to search each needle in a different
+                            region.
+
+        Returns:
+            Returns a dict mapping the filepath of each needle that was found
+            to its coordinates, in the format given by self.loctype. Needles
+            that weren't found are omitted, so the dict may be empty.
+
+        """
+        found = {}
+        for (needle_path, region, haystack) in self._haystacks(needles):
+            (needle, matches) = self._match(needle_path, region, haystack, limit=1)
+            if matches:
+                found[needle_path] = self._coords(needle, region, matches[0])
+        log.debug("Found %s of %s", list(found), needles)
+        return found
+
+    def _wait(self, predicate, description: str):
+        """
+        Helper function that waits for a predicate using this object's
+        timeout and poll interval. See WaitEngine.until().
+
+        Raises:
+            Raises start.NeedleError if the wait timed out.
+
+        """
+        if self.timeout is not None:
+            timeout = self.timeout
+        else:
+            # Each of the old search loops slept for up to the maximum of
+            #   loop_sleep_range, plus the time it took to search.
+            timeout = self.loop_num * (
+                (self.loop_sleep_range[1] / 1000) + WAIT_SEARCH_ALLOWANCE
+            )
+        try:
+            return WAITS.until(
+                predicate,
+                timeout,
+                poll_min=max(self.loop_sleep_range[0] / 1000, WAIT_POLL_MIN),
+                poll_max=self.loop_sleep_range[1] / 1000,
+                description=description,
+            )
+        except start.TimeoutException as error:
+            raise start.NeedleError(str(error), description) from error
+
+    def wait_for_any(self, needles: list) -> tuple:
+        """
+        Waits until one of the needles appears, checking each new frame with
+        find_any(). See the `timeout` arg of this class.
+
+        Returns:
+            Returns the same 2-tuple as find_any().
+
+        Raises:
+            Raises start.NeedleError if none of the needles could be found.
+
+        """
+
+        def predicate():
+            try:
+                return self.find_any(needles)
+            except start.NeedleError:
+                return None
+
+        return self._wait(predicate, "any of " + str(needles))
+
+    def appears(self):
+        """
+        Creates a predicate that checks whether the needle is visible, for
+        use with wait_until() or first_of().
+
+        Returns:
+            Returns a function that returns the needle's coordinates (see
+            find_needle()) if the needle is visible, or None otherwise.
+
+        """
+
+        def predicate():
+            try:
+                return self.find_needle()
+            except start.NeedleError:
+                return None
+
+        return predicate
+
+    def vanishes(self):
+        """
+        Creates a predicate that checks whether the needle is no longer
+        visible, for use with wait_until() or first_of().
+
+        Returns:
+            Returns a function that returns True if the needle can't be
+            found, or False otherwise.
+
+        """
+
+        def predicate():
+            try:
+                self.find_needle()
+                return False
+            except start.NeedleError:
+                return True
+
+        return predicate
+
+    # TODO: Add examples of usage.
+    def wait_for_needle(self):
+        """
+        Waits until the needle appears within the self.region coordinates,
+        checking each new frame. See the `timeout` arg of this class.
+
+        Returns:
+            If self.loctype is `regular`, returns a 4-tuple containing the
+            (left, top, width, height) coordinates of the needle.
+
+            If self.loctype is `center`, returns a 2-tuple containing the
+            (X, Y) center of the needle.
+
+        Raises:
+            Raises start.NeedleError if the needle could not be found.
+        """
+        return self._wait(self.appears(), self.needle)
+
+    # TODO: Add examples of usage.
+    def click_needle(
+        self,
+        sleep_range: tuple[int, int, int, int] = (50, 200, 50, 200),
+        move_duration_range: tuple[int, int] = (1, 50),
+        button: str = "left",
+        move_away: bool = False,
+        number_of_clicks: int = 1,
+    ) -> None:
+        """
+        Moves the mouse to the provided needle image and clicks on
+        it. Automatically randomizes the location the mouse cursor
+        will click to based on the dimensions of the needle image.
+
+        Args:
+            sleep_range (tuple): Passed to the Mouse class in inputs.py,
+                                 see its docstring for more info.
+            move_duration_range (tuple): Passed to the Mouse class in
+                                         inputs.py, see its docstring for
+                                         more info.
+            button (str): The mouse button to use when clicking on the
+                          needle, default is `left`.
+            move_away (bool): Whether to move the mouse out of the way
+                              after clicking on the needle. Useful when
+                              we needs to determine the status of a button
+                              that the mouse just clicked.
+            number_of_clicks (int): Passed to the click_coord() function of the
+                                    Mouse class, see its docstring for more
+                                    info. Default is 1.
+
+        Returns:
+            Returns True if the needle was clicked on successfully,
+            returns False otherwise.
+
+        """
+        log.debug("Looking for %s to click on.", self.needle)
+
+        needle_coords = self.wait_for_needle()
+
+        # Randomize the location the mouse cursor will move to using
+        #   the dimensions of needle image.
+        # The mouse will click anywhere within the needle image.
+        inputs.Mouse(
+            region=needle_coords,
+            sleep_range=sleep_range,
+            move_duration_range=move_duration_range,
+            button=button,
+        ).click_coord(number_of_clicks=number_of_clicks)
+
+        log.debug("Clicking on %s", self.needle)
+
+        # Ensure the mouse moves completely off the client.
+        if move_away is True:
+
+            # Unpack CLIENT tuple so we can get to the left and top values.
+            (client_left, client_top, CLIENT_WIDTH, CLIENT_HEIGHT) = CLIENT
+            client_right = client_left + CLIENT_WIDTH
+            client_bottom = client_top + CLIENT_HEIGHT
+
+            inputs.Mouse(
+                region=(client_right + 2, client_bottom + 2, 3, 3),
+                move_duration_range=(5, 20),
+            ).move_to()
+
+    def match_all(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Finds every distinct instance of the needle within the region, see
+        match_boxes(). Results are reused if the region hasn't changed, see
+        ChangeDetector.
+
+        Returns:
+            Returns a 2-tuple of an (N, 4) array of the (left, top, width,
+            height) of each match relative to the display, and an (N,)
+            array of their scores, both sorted by descending score.
+
+        """
+        needle = NEEDLES.get(self.needle)
+        haystack = get_haystack(self.region)
+        search_key = (needle.path, self.region, self.conf, self.grayscale, "all")
+        checksum = CHANGES.checksum(self.region, haystack)
+        result = CHANGES.get(search_key, checksum)
+        if result is None:
+            needle_image = needle.color
+            if self.grayscale:
+                haystack = cv2.cvtColor(haystack, cv2.COLOR_BGR2GRAY)
+                needle_image = needle.gray
+            (boxes, scores) = match_boxes(
+                needle_image, haystack, self.conf, mask=needle.mask
+            )
+            boxes[:, 0] += self.region[0]
+            boxes[:, 1] += self.region[1]
+            result = (boxes, scores)
+            CHANGES.put(search_key, checksum, result)
+        return result
+
+    def count_needles(self):
+        """
+        Counts the number of needles found within the region specified.
+
+        Examples:
+            Count the number of iron bars in the player's inventory:
+            vision.Vision(region=vis.inv, needle="./needles/items/iron-bar.png").count_needles()
+
+        Returns:
+            Returns an int.
+        """
+        (boxes, _) = self.match_all()
+        return len(boxes)
+
+
+class Pixel(Vision):
+    """
+    Matches a handful of pixels instead of a needle image. Checking a few
+    pixels takes microseconds, so this is preferred over Vision for state
+    checks where the position of the thing being checked is fixed, like
+    whether a button is enabled or a rock is empty.
+
+    Since this is a subclass of Vision, find_needle(), wait_for_needle(),
+    click_needle(), appears() and vanishes() all work the same way. The
+    "needle" is the bounding box of the points, so click_needle() clicks
+    somewhere within it.
+
+    Args:
+        region (tuple): The region the points are relative to, e.g. `INV`
+                        or `GAME_SCREEN`. See Vision.
+        points (list): The signature to match, as a list of 2-tuples, each
+                       containing the (X, Y) coordinates of a pixel relative
+                       to the top left corner of `region`, and the pixel's
+                       expected (R, G, B) color. Coordinates are those of
+                       the unscaled client, and are scaled by SCALE.
+        tolerance (int): The maximum difference allowed between the
+                         expected and actual value of each color channel
+                         of each pixel. Default is 10.
+        name (str): A description of what is being matched, used in logs
+                    and exceptions. Default is `pixel probe`.
+
+    The remaining args are the same as those of Vision.
+
+    Examples:
+        Check whether the minimap's compass is visible:
+            vision.Pixel(
+                region=vision.CLIENT,
+                points=[((720, 10), (58, 52, 28)), ((750, 30), (49, 45, 34))],
+                name="compass",
+            ).find_needle()
+
+    """
+
+    def __init__(
+        self,
+        region: tuple[int, int, int, int],
+        points: list,
+        tolerance: int = 10,
+        name: str = "pixel probe",
+        loctype: str = "regular",
+        loop_num: int = 10,
+        loop_sleep_range: tuple[int, int] = (0, 100),
+        timeout: float = None,
+    ):
+        super().__init__(
+            region=region,
+            needle=name,
+            loctype=loctype,
+            loop_num=loop_num,
+            loop_sleep_range=loop_sleep_range,
+            timeout=timeout,
+        )
+        self.points = points
+        self.tolerance = tolerance
+        self._xs = np.array([round(point[0][0] * SCALE) for point in points])
+        self._ys = np.array([round(point[0][1] * SCALE) for point in points])
+        # Colors are given as RGB, but haystacks are BGR.
+        self._colors = np.array(
+            [tuple(reversed(point[1])) for point in points], dtype=np.int16
+        )
+
+    def matches(self) -> bool:
+        """
+        Samples every point of the signature from the current frame.
+
+        Returns:
+            Returns True if every point is within tolerance of its expected
+            color, returns False otherwise.
+
+        """
+        haystack = get_haystack(self.region)
+        samples = haystack[self._ys, self._xs].astype(np.int16)
+        return bool(np.abs(samples - self._colors).max() <= self.tolerance)
+
+    def find_needle(self):
+        """
+        Checks whether the signature matches.
+
+        Returns:
+            If self.loctype is `regular`, returns the left/top/width/height
+            of the bounding box of the points as a 4-tuple.
+
+            If self.loctype is `center`, returns the (X, Y) center of the
+            bounding box of the points as a 2-tuple.
+
+        Raises:
+            Raises start.NeedleError if the signature doesn't match.
+
+        """
+        if not self.matches():
+            raise start.NeedleError("Could not match pixels!", self.needle)
+
+        left = self.region[0] + int(self._xs.min())
+        top = self.region[1] + int(self._ys.min())
+        width = int(self._xs.max() - self._xs.min()) + 1
+        height = int(self._ys.max() - self._ys.min()) + 1
+        if self.loctype == "regular":
+            return left, top, width, height
+        if self.loctype == "center":
+            return left + int(width / 2), top + int(height / 2)
+        raise RuntimeError(
+            "self.loctype must be 'regular' or 'center', got '%s'", self.loctype
+        )
+
+    def count_needles(self) -> int:
+        """
+        Returns 1 if the signature matches, or 0 otherwise.
+
+        """
+        return int(self.matches())
+
+
+# TODO: Add examples of usage.
+# TODO: Break out an "is_logged_in" function.
+def orient(
+    region: tuple[int, int, int, int] = (DISPLAY),
+    launch_client: bool = False,
+):
+    """
+    Looks for an icon to orient the client. If it's found, use its
+    location within the game client to determine the coordinates of the
+    game client relative to the display's coordinates.
+
+    This function is also used to determine if the client is logged out.
+    This is generally one of the first functions that is run upon script
+    startup.
+
+    Args:
+        region (tuple): A 4-tuple containing the left, top, width, and
+                      height of the coordinate space to search within,
+                      relative to the display's coordinates. By default
+                      uses the entire display.
+
+    Raises:
+       Raises an exception if the client cannot be found, or if the
+       function can't determine if the client is logged in or logged
+       out.
+
+    Returns:
+         If client is logged in, returns a 2-tuple containing a string
+         with the text "logged_in" and a 2-tuple of the center (X, Y)
+         coordinates of the orient needle.
+
+         If client is logged out, returns a 2-tuple containing a string
+         with the text "logged_out" and a 2-tuple of the center (X, Y)
+         coordinates of the orient-logged-out needle.
+
+    """
+    # If the client is not logged in, check if it's logged out.
+    orient_needles = {
+        needle_path: client_status
+        for (client_status, (needle_path, _)) in ORIENT_NEEDLES.items()
+    }
+    try:
+        (needle, anchor) = Vision(
+            region=region, loctype="center", loop_num=5, conf=0.8, pyramid=True
+        ).wait_for_any(list(orient_needles))
+        client_status = orient_needles[needle]
+        log.info("Client is %s.", client_status.replace("_", " "))
+        return client_status, anchor
+    except start.NeedleError as error:
+        raise RuntimeError("Unable to locate client!") from error
+
+
+# Client geometry. --------------------------------------------------------------------------------
+#
+# init() needs the position of the client's top left corner. Each geometry
+#   provider below offers a candidate position. Candidates are tried in order
+#   and the first one that passes probe_client() is used, so a wrong
+#   candidate costs a single cheap probe instead of a misplaced bot.
+
+# The orient needles, keyed by the client status they indicate, and the
+#   position of their best match relative to the client's top left corner.
+ORIENT_NEEDLES = {
+    "logged_in": ("needles/minimap/orient.png", (715, 2)),
+    "logged_out": ("needles/login-menu/orient-logged-out.png", (165, 29)),
+}
+# The confidence an orient needle's best match must exceed to pass
+#   probe_client().
+PROBE_CONF = 0.9
+# The number of pixels an orient needle's best match may be off by and
+#   still pass probe_client().
+PROBE_TOLERANCE = 1
+# The number of pixels around an orient needle that probe_client() searches.
+#   Must be larger than PROBE_TOLERANCE so that a best match beyond the
+#   tolerance can be told apart from one within it.
+PROBE_MARGIN = 3
+
+# The client position of the last successful init().
+_client_origin = None
+
+
+def probe_client(left: int, top: int):
+    """
+    Checks whether the client's top left corner is at the given position by
+    looking for an orient needle exactly where it should be. Only a few
+    pixels around each needle are searched, and the best match must be
+    within PROBE_TOLERANCE pixels of its expected position.
+
+    Returns:
+        Returns the client's status (`logged_in` or `logged_out`) if the
+        client is at the given position, returns None otherwise.
+
+    """
+    (display_left, display_top, display_width, display_height) = DISPLAY
+    for (client_status, (needle_path, (offset_x, offset_y))) in ORIENT_NEEDLES.items():
+        needle = NEEDLES.get(needle_path)
+        # Where the needle should be, and the margin around it clipped to
+        #   the display, since the client may be at the display's edge.
+        needle_left = left + round(offset_x * SCALE)
+        needle_top = top + round(offset_y * SCALE)
+        region_left = max(needle_left - PROBE_MARGIN, display_left)
+        region_top = max(needle_top - PROBE_MARGIN, display_top)
+        region_right = min(
+            needle_left + needle.width + PROBE_MARGIN, display_left + display_width
+        )
+        region_bottom = min(
+            needle_top + needle.height + PROBE_MARGIN, display_top + display_height
+        )
+        if (
+            needle_left < display_left
+            or needle_top < display_top
+            or needle_left + needle.width > region_right
+            or needle_top + needle.height > region_bottom
+        ):
+            continue
+        region = (
+            region_left,
+            region_top,
+            region_right - region_left,
+            region_bottom - region_top,
+        )
+        result = match_template(needle.color, capture(region), needle.mask)
+        (_, score, _, (best_x, best_y)) = cv2.minMaxLoc(result)
+        if (
+            score >= PROBE_CONF
+            and abs(best_x - (needle_left - region_left)) <= PROBE_TOLERANCE
+            and abs(best_y - (needle_top - region_top)) <= PROBE_TOLERANCE
+        ):
+            return client_status
+    return None
+
+
+class GeometryProvider(abc.ABC):
+    """
+    Base class for sources of the client's position. Subclasses must
+    implement locate().
+
+    """
+
+    name = ""
+
+    @abc.abstractmethod
+    def locate(self):
+        """
+        Returns a 2-tuple of a candidate (left, top) position of the client,
+        or None if this provider doesn't know where the client is.
+
+        Raises:
+            May raise OSError if the provider isn't available on this system.
+
+        """
+
+
+class WindowManagerGeometry(GeometryProvider):
+    """
+    Asks the X server for the position of the client's window. Windows are
+    listed through the window manager's EWMH _NET_CLIENT_LIST, or by walking
+    the window tree if there's no window manager (e.g. under Xvfb), and the
+    first window whose title matches is used.
+
+    Args:
+        title (str): A regular expression matched against window titles.
+                     Default is the `client_window_title` setting in the
+                     main config file.
+        offset (tuple): The position of the client's top left corner within
+                        the window. Default is the `client_window_offset`
+                        setting in the main config file.
+
+    Raises:
+        Raises OSError if X11 isn't available.
+
+    """
+
+    name = "window_manager"
+
+    _ANY_PROPERTY_TYPE = 0
+    _error_handler_type = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p)
+
+    def __init__(self, title: str = None, offset: tuple[int, int] = None):
+        config = start.config["main"]
+        if title is None:
+            title = config.get("client_window_title", "RuneLite|Old School RuneScape")
+        if offset is None:
+            offset = config.get("client_window_offset", (0, 0))
+        self.title = re.compile(title)
+        self.offset = tuple(offset)
+        # The (left, top, width, height) of the window found by locate().
+        self.window = None
+
+        x11_path = ctypes.util.find_library("X11")
+        if x11_path is None:
+            raise OSError("Could not find libX11!")
+        self._x11 = ctypes.CDLL(x11_path)
+        self._declare_functions()
+
+    def _declare_functions(self) -> None:
+        x11 = self._x11
+        display = ctypes.c_void_p
+        window = ctypes.c_ulong
+        int_p = ctypes.POINTER(ctypes.c_int)
+        uint_p = ctypes.POINTER(ctypes.c_uint)
+        ulong_p = ctypes.POINTER(ctypes.c_ulong)
+
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XOpenDisplay.restype = display
+        x11.XCloseDisplay.argtypes = [display]
+        x11.XDefaultRootWindow.argtypes = [display]
+        x11.XDefaultRootWindow.restype = window
+        x11.XSetErrorHandler.argtypes = [self._error_handler_type]
+        x11.XSetErrorHandler.restype = self._error_handler_type
+        x11.XInternAtom.argtypes = [display, ctypes.c_char_p, ctypes.c_int]
+        x11.XInternAtom.restype = ctypes.c_ulong
+        x11.XGetWindowProperty.argtypes = [
+            display,
+            window,
+            ctypes.c_ulong,
+            ctypes.c_long,
+            ctypes.c_long,
+            ctypes.c_int,
+            ctypes.c_ulong,
+            ulong_p,
+            int_p,
+            ulong_p,
+            ulong_p,
+            ctypes.POINTER(ctypes.c_void_p),
+        ]
+        x11.XGetWindowProperty.restype = ctypes.c_int
+        x11.XQueryTree.argtypes = [
+            display,
+            window,
+            ulong_p,
+            ulong_p,
+            ctypes.POINTER(ulong_p),
+            uint_p,
+        ]
+        x11.XQueryTree.restype = ctypes.c_int
+        x11.XFetchName.argtypes = [display, window, ctypes.POINTER(ctypes.c_char_p)]
+        x11.XFetchName.restype = ctypes.c_int
+        x11.XGetGeometry.argtypes = [
+            display,
+            window,
+            ulong_p,
+            int_p,
+            int_p,
+            uint_p,
+            uint_p,
+            uint_p,
+            uint_p,
+        ]
+        x11.XGetGeometry.restype = ctypes.c_int
+        x11.XTranslateCoordinates.argtypes = [
+            display,
+            window,
+            window,
+            ctypes.c_int,
+            ctypes.c_int,
+            int_p,
+            int_p,
+            ulong_p,
+        ]
+        x11.XTranslateCoordinates.restype = ctypes.c_int
+        x11.XFree.argtypes = [ctypes.c_void_p]
+
+    def _property(self, display, window: int, name: bytes) -> tuple:
+        """
+        Helper function that reads a window property.
+
+        Returns:
+            Returns a 3-tuple of a pointer to the property's data, its format
+            (8, 16 or 32) and its number of items. The pointer must be freed
+            with XFree() if it isn't None.
+
+        """
+        atom = self._x11.XInternAtom(display, name, 1)
+        if not atom:
+            return None, 0, 0
+        actual_type = ctypes.c_ulong()
+        actual_format = ctypes.c_int()
+        items = ctypes.c_ulong()
+        bytes_after = ctypes.c_ulong()
+        data = ctypes.c_void_p()
+        status = self._x11.XGetWindowProperty(
+            display,
+            window,
+            atom,
+            0,
+            1 << 16,
+            0,
+            self._ANY_PROPERTY_TYPE,
+            ctypes.byref(actual_type),
+            ctypes.byref(actual_format),
+            ctypes.byref(items),
+            ctypes.byref(bytes_after),
+            ctypes.byref(data),
+        )
+        if status != 0 or not data.value:
+            return None, 0, 0
+        return data.value, actual_format.value, items.value
+
+    def _windows(self, display, root: int) -> list[int]:
+        """
+        Helper function that lists top level windows, preferring the window
+        manager's list of client windows.
+
+        """
+        (data, data_format, items) = self._property(display, root, b"_NET_CLIENT_LIST")
+        if data is not None:
+            # Format 32 properties are returned as an array of C longs.
+            windows = list((ctypes.c_ulong * items).from_address(data)) if data_format == 32 else []
+            self._x11.XFree(data)
+            if windows:
+                return windows
+
+        windows = []
+        pending = [root]
+        while pending:
+            parent = pending.pop()
+            root_return = ctypes.c_ulong()
+            parent_return = ctypes.c_ulong()
+            children = ctypes.POINTER(ctypes.c_ulong)()
+            count = ctypes.c_uint()
+            if not self._x11.XQueryTree(
+                display,
+                parent,
+                ctypes.byref(root_return),
+                ctypes.byref(parent_return),
+                ctypes.byref(children),
+                ctypes.byref(count),
+            ):
+                continue
+            found = [children[index] for index in range(count.value)]
+            if children:
+                self._x11.XFree(children)
+            windows.extend(found)
+            # Window managers that don't support EWMH reparent client windows
+            #   into frames, so look one level deeper.
+            if parent == root:
+                pending.extend(found)
+        return windows
+
+    def _title(self, display, window: int) -> str:
+        """
+        Helper function that gets a window's title.
+
+        """
+        (data, data_format, items) = self._property(display, window, b"_NET_WM_NAME")
+        if data is not None:
+            title = ctypes.string_at(data, items).decode("utf-8", "replace")
+            self._x11.XFree(data)
+            if data_format == 8:
+                return title
+
+        name = ctypes.c_char_p()
+        if self._x11.XFetchName(display, window, ctypes.byref(name)) and name.value:
+            title = name.value.decode("latin-1")
+            self._x11.XFree(name)
+            return title
+        return ""
+
+    def _geometry(self, display, root: int, window: int):
+        """
+        Helper function that gets the (left, top, width, height) of a
+        window's contents relative to the root window.
+
+        """
+        root_return = ctypes.c_ulong()
+        (x, y) = (ctypes.c_int(), ctypes.c_int())
+        (width, height) = (ctypes.c_uint(), ctypes.c_uint())
+        (border, depth) = (ctypes.c_uint(), ctypes.c_uint())
+        if not self._x11.XGetGeometry(
+            display,
+            window,
+            ctypes.byref(root_return),
+            ctypes.byref(x),
+            ctypes.byref(y),
+            ctypes.byref(width),
+            ctypes.byref(height),
+            ctypes.byref(border),
+            ctypes.byref(depth),
+        ):
+            return None
+        (left, top) = (ctypes.c_int(), ctypes.c_int())
+        child = ctypes.c_ulong()
+        if not self._x11.XTranslateCoordinates(
+            display,
+            window,
+            root,
+            0,
+            0,
+            ctypes.byref(left),
+            ctypes.byref(top),
+            ctypes.byref(child),
+        ):
+            return None
+        return left.value, top.value, width.value, height.value
+
+    def locate(self):
+        display = self._x11.XOpenDisplay(None)
+        if not display:
+            raise OSError("Could not open X display!")
+
+        # Windows may be destroyed while they're being queried. Ignore the
+        #   resulting errors instead of letting Xlib's default handler exit.
+        ignore_errors = self._error_handler_type(lambda display, event: 0)
+        previous_handler = self._x11.XSetErrorHandler(ignore_errors)
+        try:
+            root = self._x11.XDefaultRootWindow(display)
+            for window in self._windows(display, root):
+                if not self.title.search(self._title(display, window)):
+                    continue
+                geometry = self._geometry(display, root, window)
+                if (
+                    geometry is None
+                    or geometry[2] < round(CLIENT_WIDTH * SCALE) + self.offset[0]
+                    or geometry[3] < round(CLIENT_HEIGHT * SCALE) + self.offset[1]
+                ):
+                    continue
+                self.window = geometry
+                return geometry[0] + self.offset[0], geometry[1] + self.offset[1]
+            return None
+        finally:
+            self._x11.XSetErrorHandler(previous_handler)
+            self._x11.XCloseDisplay(display)
+
+
+class CachedGeometry(GeometryProvider):
+    """
+    Offers the client's position from the last successful init(), or from
+    the calibration file if this is the first init(). The client usually
+    hasn't moved since, even across restarts of the bot.
+
+    """
+
+    name = "cached"
+
+    def locate(self):
+        if _client_origin is not None:
+            return _client_origin
+        return CALIBRATION.origin
+
+
+class OrientGeometry(GeometryProvider):
+    """
+    Finds the client by searching for an orient needle, see orient(). Slow,
+    but works wherever the client is. orient() accepts the first match above
+    its confidence, so the needle's best match is then found around it.
+
+    Args:
+        window (GeometryProvider): If given and this provider found the
+                                   client's window, the window is searched
+                                   before the entire display. Default is
+                                   None.
+
+    """
+
+    name = "orient"
+
+    def __init__(self, window: WindowManagerGeometry = None):
+        self.window = window
+
+    def locate(self):
+        regions = [DISPLAY]
+        if self.window is not None and self.window.window is not None:
+            regions.insert(0, self.window.window)
+
+        for region in regions:
+            try:
+                (client_status, (anchor_x, anchor_y)) = orient(region=region)
+            except RuntimeError:
+                if region == DISPLAY:
+                    raise
+                continue
+            (needle_path, (offset_x, offset_y)) = ORIENT_NEEDLES[client_status]
+            needle = NEEDLES.get(needle_path)
+            left = max(anchor_x - needle.width, DISPLAY[0])
+            top = max(anchor_y - needle.height, DISPLAY[1])
+            right = min(anchor_x + needle.width, DISPLAY[0] + DISPLAY[2])
+            bottom = min(anchor_y + needle.height, DISPLAY[1] + DISPLAY[3])
+            window = (left, top, right - left, bottom - top)
+            result = match_template(needle.color, capture(window), needle.mask)
+            (_, _, _, (best_x, best_y)) = cv2.minMaxLoc(result)
+            return (
+                window[0] + best_x - round(offset_x * SCALE),
+                window[1] + best_y - round(offset_y * SCALE),
+            )
+        return None
+
+
+def locate_client() -> tuple[str, tuple[int, int]]:
+    """
+    Determines the position of the client by trying each geometry provider
+    in turn: the window manager, then the position cached by the last
+    init(), then a visual search. Each candidate is confirmed with
+    probe_client() before it's used.
+
+    Returns:
+        Returns a 2-tuple of the client's status (`logged_in` or
+        `logged_out`) and the (left, top) position of its top left corner.
+
+    Raises:
+        Raises RuntimeError if the client could not be found.
+
+    """
+    providers = []
+    try:
+        providers.append(WindowManagerGeometry())
+    except OSError as error:
+        log.debug("Window manager geometry is unavailable: %s", error)
+    window = providers[0] if providers else None
+    providers.extend([CachedGeometry(), OrientGeometry(window)])
+
+    for provider in providers:
+        start_time = time.perf_counter()
+        try:
+            origin = provider.locate()
+        except OSError as error:
+            log.debug("Geometry provider %s failed: %s", provider.name, error)
+            continue
+        if origin is None:
+            continue
+
+        client_status = probe_client(*origin)
+        duration = (time.perf_counter() - start_time) * 1000
+        if client_status is not None:
+            log.info(
+                "Client is %s, located at %s by %s in %.1f ms.",
+                client_status.replace("_", " "),
+                origin,
+                provider.name,
+                duration,
+            )
+            return client_status, origin
+        log.debug(
+            "Geometry provider %s offered %s, but the probe failed.",
+            provider.name,
+            origin,
+        )
+
+    raise RuntimeError("Unable to locate client!")
+
+
+def detect_scale(region: tuple[int, int, int, int] = DISPLAY):
+    """
+    Determines the scale of the client by matching the orient needles at
+    each candidate scale and picking the scale of the best match. The
+    region is matched at half resolution, since only the scales' scores are
+    compared.
+
+    Args:
+        region (tuple): The region to search within. Default is DISPLAY.
+
+    Returns:
+        Returns the scale whose best match scored highest, or None if no
+        scale's best match exceeds the confidence orient() uses.
+
+    """
+    scales = start.config["main"].get("client_scales", CLIENT_SCALES)
+    haystack = cv2.pyrDown(capture(region))
+    (best_scale, best_score) = (None, 0.8)
+    for scale in scales:
+        for (needle_path, _) in ORIENT_NEEDLES.values():
+            needle = rescale_needle(NEEDLES.get(needle_path, 1.0), scale / 2)
+            if needle.height > haystack.shape[0] or needle.width > haystack.shape[1]:
+                continue
+            score = float(match_template(needle.color, haystack, needle.mask).max())
+            log.debug("Orient needle %s scored %.3f at scale %s.", needle_path, score, scale)
+            if score > best_score:
+                (best_scale, best_score) = (scale, score)
+    return best_scale
+
+
+def set_scale(scale: float) -> None:
+    """
+    Sets SCALE and rescales the needles to match, see
+    NeedleRegistry.set_scale(). Hints and cached search results of the old
+    scale are discarded. The regions are rescaled by the next init().
+
+    """
+    global SCALE
+    if scale == SCALE:
+        return
+    log.info("Client scale is %s.", scale)
+    SCALE = scale
+    NEEDLES.set_scale(scale)
+    HINTS.clear()
+    CHANGES.clear()
+
+
+# Calibration cache. ------------------------------------------------------------------------------
+#
+# Restarting the bot normally throws away everything init() and earlier
+#   searches learned. The calibration cache persists the client's position
+#   and the needle location hints to disk, so a restart after a crash or a
+#   logout break can confirm the client's position with a single probe and
+#   find needles near their last known locations instead of searching cold.
+
+# The version of the calibration file's format. Files of other versions are
+#   ignored.
+CALIBRATION_VERSION = 2
+
+
+class CalibrationCache:
+    """
+    Saves and loads the client's position and scale, and the location hints
+    of needles within the client. Hints are stored relative to the client's position,
+    so they remain valid if the client has moved since they were saved.
+
+    Args:
+        path (str): The file to save to and load from. Default is the
+                    `calibration_file` setting in the main config file.
+
+    """
+
+    def __init__(self, path: str = None):
+        if path is None:
+            path = start.config["main"].get("calibration_file", "calibration.json")
+        self.path = pathlib.Path(path)
+        # The client position and scale that were loaded.
+        self.origin = None
+        self.scale = 1.0
+        # Hints that were loaded, relative to self.origin.
+        self._hints: list = []
+
+    def load(self) -> bool:
+        """
+        Reads the calibration file. Missing, unreadable or outdated files are
+        ignored.
+
+        Returns:
+            Returns True if the file was loaded, False otherwise.
+
+        """
+        try:
+            with open(self.path, encoding="utf-8") as calibration_file:
+                data = json.load(calibration_file)
+            if data["version"] != CALIBRATION_VERSION:
+                log.info("Ignoring outdated calibration file %s.", self.path)
+                return False
+            self.origin = tuple(data["client"])
+            self.scale = data["scale"]
+            self._hints = [
+                (
+                    (hint["needle"], tuple(hint["region"])),
+                    tuple(hint["hint"]),
+                    hint["score"],
+                )
+                for hint in data["hints"]
+            ]
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            log.warning("Ignoring unreadable calibration file %s: %s", self.path, error)
+            return False
+        log.debug(
+            "Loaded calibration file %s with %s hints.", self.path, len(self._hints)
+        )
+        return True
+
+    def restore(self, origin: tuple[int, int]) -> int:
+        """
+        Loads the hints read by load() into HINTS, moving them to the given
+        client position.
+
+        Returns:
+            Returns the number of hints that were restored.
+
+        """
+        # Hints are only valid at the scale they were found at.
+        if self.origin is None or self.scale != SCALE:
+            return 0
+        hints = []
+        for ((needle_path, region), hint, score) in self._hints:
+            region = (
+                region[0] + origin[0],
+                region[1] + origin[1],
+                region[2],
+                region[3],
+            )
+            hints.append(((needle_path, region), hint, score))
+        HINTS.load(hints)
+        return len(hints)
+
+    def save(self) -> None:
+        """
+        Writes the client's position and the hints of every needle that was
+        found within the client to the calibration file. Does nothing if
+        init() hasn't located the client.
+
+        """
+        if _client_origin is None:
+            return
+        hints = [
+            {
+                "needle": needle_path,
+                "region": [
+                    region[0] - _client_origin[0],
+                    region[1] - _client_origin[1],
+                    region[2],
+                    region[3],
+                ],
+                "hint": list(hint),
+                "score": score,
+            }
+            for ((needle_path, region), hint, score) in HINTS.dump()
+            # Hints within regions outside the client (e.g. the entire display)
+            #   don't move with it.
+            if in_client(region)
+        ]
+        data = {
+            "version": CALIBRATION_VERSION,
+            "client": list(_client_origin),
+            "scale": SCALE,
+            "hints": hints,
+        }
+        # Write to a temporary file first so a crash while saving can't leave
+        #   a truncated calibration file behind.
+        temporary_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(temporary_path, "w", encoding="utf-8") as calibration_file:
+                json.dump(data, calibration_file, indent=1)
+            os.replace(temporary_path, self.path)
+        except OSError as error:
+            log.warning("Unable to save calibration file %s: %s", self.path, error)
+            return
+        log.debug("Saved %s hints to calibration file %s.", len(hints), self.path)
+
+
+CALIBRATION = CalibrationCache()
+
+
+# Client watchdog. --------------------------------------------------------------------------------
+#
+# The vision regions are derived from the client's position once, by init().
+#   If the client's window is moved afterwards, every search silently looks
+#   in the wrong place. The watchdog probes the client's position every few
+#   frames and re-derives the regions if it has moved.
+
+
+class ClientWatchdog:
+    """
+    Checks that the client hasn't moved since its regions were derived.
+    Checks are driven by grab_frame(), which runs check() every `interval`
+    frames. Each check is a single probe_client(). Only if the probe fails
+    is the client located again, see locate_client().
+
+    Args:
+        interval (int): The number of frames between checks. 0 disables the
+                        watchdog. Default is the `client_check_interval`
+                        setting in the main config file.
+
+    """
+
+    def __init__(self, interval: int = None):
+        if interval is None:
+            interval = start.config["main"].get("client_check_interval", 50)
+        self.interval = interval
+        self._checking = False
+        self.checks = 0
+        # Checks in which the client was found at a new position.
+        self.moves = 0
+        # Checks in which the client couldn't be found at all.
+        self.failures = 0
+        # Total number of seconds spent checking.
+        self.check_time = 0.0
+
+    def due(self, frame_id: int) -> bool:
+        """
+        Returns True if the given frame should be followed by a check.
+
+        """
+        return (
+            self.interval > 0
+            and not self._checking
+            and _client_origin is not None
+            and frame_id % self.interval == 0
+        )
+
+    def check(self) -> bool:
+        """
+        Probes the client at its current position, and re-derives the vision
+        regions if it has moved. Never raises if the client can't be found,
+        since the client may just be briefly obscured; the next check will
+        try again.
+
+        Returns:
+            Returns True if the client was found, whether or not it moved.
+
+        """
+        # Locating the client searches for needles, which must not trigger
+        #   another check.
+        self._checking = True
+        start_time = time.perf_counter()
+        try:
+            self.checks += 1
+            old_origin = _client_origin
+            if probe_client(*old_origin) is not None:
+                return True
+            try:
+                (_, new_origin) = locate_client()
+            except RuntimeError:
+                self.failures += 1
+                log.warning("Client not found at %s, will check again.", old_origin)
+                return False
+            if new_origin != old_origin:
+                self.moves += 1
+                log.warning("Client moved from %s to %s.", old_origin, new_origin)
+                move_client(*new_origin)
+            return True
+        finally:
+            self.check_time += time.perf_counter() - start_time
+            self._checking = False
+
+    def clear(self) -> None:
+        """
+        Resets the statistics.
+
+        """
+        self.checks = 0
+        self.moves = 0
+        self.failures = 0
+        self.check_time = 0.0
+
+    def stats(self) -> dict:
+        """
+        Reports how often the client was checked and moved.
+
+        Returns:
+            Returns a dict containing the number of checks, moves and
+            failures, and the average check time in milliseconds.
+
+        """
+        return {
+            "checks": self.checks,
+            "moves": self.moves,
+            "failures": self.failures,
+            "avg_check_ms": (
+                (self.check_time / self.checks) * 1000 if self.checks else 0.0
+            ),
+        }
+
+
+WATCHDOG = ClientWatchdog()
+
+
+def move_client(client_left: int, client_top: int) -> None:
+    """
+    Moves the vision regions to a new client position, and moves the hints
+    of needles within the client along with them. Cached search results and
+    the shared frame belong to the old position, so they're discarded.
+
+    """
+    (old_left, old_top) = _client_origin
+    (delta_x, delta_y) = (client_left - old_left, client_top - old_top)
+    hints = [
+        (
+            (needle_path, (region[0] + delta_x, region[1] + delta_y, region[2], region[3])),
+            hint,
+            score,
+        )
+        for ((needle_path, region), hint, score) in HINTS.dump()
+        if in_client(region)
+    ]
+    set_regions(client_left, client_top)
+    HINTS.load(hints)
+    CHANGES.clear()
+    invalidate_frame()
+
+
+# TODO: add 'configure camera' function that clicks on compass, zooms in camera, and holds down up arrow
+#       only click on the compass if it isn't perfectly aligned
+
+
+# Vision regions. ---------------------------------------------------------------------------------
+
+
+def _offset(box: tuple, delta_x: int, delta_y: int) -> tuple:
+    """
+    Helper function that moves a (left, top, ...) tuple by the given number
+    of pixels.
+
+    """
+    return (box[0] + delta_x, box[1] + delta_y) + tuple(box[2:])
+
+
+class Regions:
+    """
+    Every vision region of a client whose top left corner is at the given
+    position, derived in one place. Regions objects are never modified;
+    when the client moves, rebase() returns a moved copy.
+
+    Iterating over a Regions object yields a 2-tuple of the name and the
+    (left, top, width, height) region of each named region, e.g.
+    ("inv", (548, 205, 186, 262)).
+
+    Args:
+        client_left (int): The left coordinate of the client, relative to
+                           the display.
+        client_top (int): The top coordinate of the client, relative to the
+                          display.
+        scale (float): The factor by which the client is scaled, see
+                       SCALE. Default is 1.0.
+
+    """
+
+    # The named regions, in the order they're iterated. Each one is also
+    #   available as a global of the same name in upper case, e.g. INV.
+    NAMES = (
+        "client",
+        "inv",
+        "inv_bottom",
+        "inv_right_half",
+        "inv_left_half",
+        "game_screen",
+        "bank_items_window",
+        "side_stones",
+        "chat_menu",
+        "chat_menu_recent",
+        "login_field",
+        "pass_field",
+        "minimap",
+        "minimap_slice",
+    )
+
+    __slots__ = NAMES + ("origin", "scale", "inv_slots", "bank_slots", "minimap_center")
+
+    def __init__(self, client_left: int, client_top: int, scale: float = 1.0):
+        self.origin = (client_left, client_top)
+        self.scale = scale
+
+        # The regions are first derived for an unscaled client whose top left
+        #   corner is at (0, 0), then scaled and moved to the client's
+        #   position.
+
+        # Each of these tuples contains coordinates for the "region" parameter
+        #   of PyAutoGUI's Locate() functions. These tuples are used by methods
+        #   in the Vision class to look for needles within the specified set of
+        #   coordinates, rather than within the entire display's coordinates,
+        #   which is much faster.
+
+        # All coordinates are in a (left, top, width, height) format, to match
+        #   PyAutoGUI.
+
+        # The fixed-width game client.
+        self.client = (0, 0, CLIENT_WIDTH, CLIENT_HEIGHT)
+
+        # The player's inventory.
+        inv_left = 548
+        inv_top = 205
+        self.inv = (inv_left, inv_top, INV_WIDTH, INV_HEIGHT)
+
+        # Bottom half of the player's inventory.
+        inv_bottom_left = inv_left
+        inv_bottom_top = inv_top + INV_HALF_HEIGHT
+        self.inv_bottom = (
+            inv_bottom_left,
+            inv_bottom_top,
+            INV_WIDTH,
+            INV_HALF_HEIGHT,
+        )
+
+        # Right half of the player's inventory.
+        inv_right_half_left = (inv_left + INV_HALF_WIDTH) - 5
+        inv_right_half_top = inv_top
+        self.inv_right_half = (
+            inv_right_half_left,
+            inv_right_half_top,
+            INV_HALF_WIDTH,
+            INV_HEIGHT,
+        )
+
+        # Left half of the player's inventory.
+        inv_left_half_left = inv_left
+        inv_left_half_top = inv_top
+        self.inv_left_half = (
+            inv_left_half_left,
+            inv_left_half_top,
+            INV_HALF_WIDTH,
+            INV_HEIGHT,
+        )
+
+        # The "gameplay screen". This is the screen that displays the player
+        #   character and the game world.
+        game_screen_left = 4
+        game_screen_top = 4
+        self.game_screen = (
+            game_screen_left,
+            game_screen_top,
+            GAME_SCREEN_WIDTH,
+            GAME_SCREEN_HEIGHT,
+        )
+
+        # Banking window, minus the tabs at the top and other surrounding elements.
+        # This is done to prevent the bot from attempting to withdrawal items by
+        #   clicking on their tab icons
+        bank_items_window_left = game_screen_left + 68
+        bank_items_window_top = game_screen_top + 77
+        self.bank_items_window = (
+            bank_items_window_left,
+            bank_items_window_top,
+            BANK_ITEMS_WINDOW_WIDTH,
+            BANK_ITEMS_WINDOW_HEIGHT,
+        )
+
+        # The player's inventory, plus the top and bottom "side stone" tabs that
+        #   open all the different menus.
+        side_stones_left = 516
+        side_stones_top = 166
+        self.side_stones = (
+            side_stones_left,
+            side_stones_top,
+            SIDE_STONES_WIDTH,
+            SIDE_STONES_HEIGHT,
+        )
+
+        # Chat menu.
+        chat_menu_left = 7
+        chat_menu_top = 345
+        self.chat_menu = (
+            chat_menu_left,
+            chat_menu_top,
+            CHAT_MENU_WIDTH,
+            CHAT_MENU_HEIGHT,
+        )
+
+        # The most recent chat message.
+        chat_menu_recent_left = chat_menu_left - 3
+        chat_menu_recent_top = chat_menu_top + 98
+        self.chat_menu_recent = (
+            chat_menu_recent_left,
+            chat_menu_recent_top,
+            CHAT_MENU_RECENT_WIDTH,
+            CHAT_MENU_RECENT_HEIGHT,
+        )
+
+        # The "Login" field on the main login screen.
+        login_field_left = 273
+        login_field_top = 242
+        self.login_field = (
+            login_field_left,
+            login_field_top,
+            LOGIN_FIELD_WIDTH,
+            LOGIN_FIELD_HEIGHT,
+        )
+
+        # The "Password" field on the main login screen.
+        pass_field_left = 275
+        pass_field_top = 258
+        self.pass_field = (
+            pass_field_left,
+            pass_field_top,
+            LOGIN_FIELD_WIDTH,
+            LOGIN_FIELD_HEIGHT,
+        )
+
+        # The entire minimap.
+        minimap_left = 571
+        minimap_top = 11
+        self.minimap = (minimap_left, minimap_top, MINIMAP_WIDTH, MINIMAP_HEIGHT)
+
+        # The current minimap "slice" for locating the player on the world map.
+        # The largest area of the minimap, centered on the player, that can be
+        #   used to determine the player's location for the travel() function.
+        minimap_slice_left = 599
+        minimap_slice_top = 43
+        self.minimap_slice = (
+            minimap_slice_left,
+            minimap_slice_top,
+            MINIMAP_SLICE_WIDTH,
+            MINIMAP_SLICE_HEIGHT,
+        )
+
+        for name in self.NAMES:
+            setattr(self, name, self._place(getattr(self, name)))
+
+        # The (X, Y) coordinates of the center of the minimap, where the
+        #   player is.
+        self.minimap_center = self._place((642, 85))
+
+        # The region of each inventory slot, ordered from left to right, then
+        #   top to bottom.
+        self.inv_slots = tuple(
+            (
+                self.inv[0] + round((INV_SLOT_LEFT + (column * INV_SLOT_X_SPACING)) * scale),
+                self.inv[1] + round((INV_SLOT_TOP + (row * INV_SLOT_Y_SPACING)) * scale),
+                round(INV_SLOT_WIDTH * scale),
+                round(INV_SLOT_HEIGHT * scale),
+            )
+            for row in range(INV_ROWS)
+            for column in range(INV_COLUMNS)
+        )
+
+        # The region of each item in the visible part of the bank, ordered
+        #   from left to right, then top to bottom. Assumes the bank is
+        #   scrolled to the top and isn't divided into tabs.
+        self.bank_slots = tuple(
+            (
+                self.bank_items_window[0] + round(column * BANK_SLOT_X_SPACING * scale),
+                self.bank_items_window[1] + round(row * BANK_SLOT_Y_SPACING * scale),
+                round(BANK_SLOT_WIDTH * scale),
+                round(BANK_SLOT_HEIGHT * scale),
+            )
+            for row in range(BANK_ROWS)
+            for column in range(BANK_COLUMNS)
+        )
+
+    def _place(self, box: tuple) -> tuple:
+        """
+        Helper function that scales an unscaled (left, top, ...) tuple
+        relative to the client and moves it to the client's position.
+
+        """
+        return (
+            self.origin[0] + round(box[0] * self.scale),
+            self.origin[1] + round(box[1] * self.scale),
+        ) + tuple(round(size * self.scale) for size in box[2:])
+
+    def rebase(self, client_left: int, client_top: int):
+        """
+        Returns a copy of these regions for a client whose top left corner
+        is at the given position. Every region keeps its size, so the copy
+        only moves each region rather than deriving it again.
+
+        """
+        (delta_x, delta_y) = (client_left - self.origin[0], client_top - self.origin[1])
+        regions = object.__new__(Regions)
+        regions.origin = (client_left, client_top)
+        regions.scale = self.scale
+        for name in self.NAMES:
+            setattr(regions, name, _offset(getattr(self, name), delta_x, delta_y))
+        regions.minimap_center = _offset(self.minimap_center, delta_x, delta_y)
+        regions.inv_slots = tuple(
+            (left + delta_x, top + delta_y, width, height)
+            for (left, top, width, height) in self.inv_slots
+        )
+        regions.bank_slots = tuple(
+            (left + delta_x, top + delta_y, width, height)
+            for (left, top, width, height) in self.bank_slots
+        )
+        return regions
+
+    def __iter__(self):
+        return ((name, getattr(self, name)) for name in self.NAMES)
+
+    def __repr__(self) -> str:
+        return "Regions(%s, %s, scale=%s)" % (self.origin + (self.scale,))
+
+
+# The regions of the client, set by init().
+REGIONS = None
+
+
+def set_regions(client_left: int, client_top: int) -> None:
+    """
+    Sets REGIONS and the region globals (e.g. INV) to those of a client
+    whose top left corner is at the given position. Every region is
+    computed before any global is changed, and the globals are then
+    replaced in a single step, so no search ever sees regions of two
+    different client positions.
+
+    """
+    if REGIONS is None or REGIONS.scale != SCALE:
+        regions = Regions(client_left, client_top, SCALE)
+    else:
+        regions = REGIONS.rebase(client_left, client_top)
+    region_globals = {name.upper(): region for (name, region) in regions}
+    globals().update(
+        region_globals, REGIONS=regions, _client_origin=(client_left, client_top)
     )
+
+
+def init() -> None:
+    """
+    Locates the client and sets the value of the vision regions.
+    This function MUST be run before OCVBot can do anything else.
+    """
+    first_init = _client_origin is None
+    if first_init and CALIBRATION.load():
+        set_scale(CALIBRATION.scale)
+    try:
+        (_, (client_left, client_top)) = locate_client()
+    except RuntimeError:
+        # The client may be scaled differently than expected.
+        scale = detect_scale()
+        if scale is None or scale == SCALE:
+            raise
+        set_scale(scale)
+        (_, (client_left, client_top)) = locate_client()
+    set_regions(client_left, client_top)
+    if first_init:
+        restored = CALIBRATION.restore(_client_origin)
+        if restored:
+            log.info("Restored %s needle location hints.", restored)
@@ -7,6 +7,8 @@ Linux only. Requires feh.
 """
 import os
 
+import cv2
+import numpy as np
 import pytest
 
 import init_tests
@@ -17,6 +19,7 @@ pass
 # OCVBot modules must be imported after init_tests.
 from ocvbot import behavior
 from ocvbot import startup as start
+from ocvbot import vision as vis
 
 image_directory = (os.path.dirname(__file__)) + "/test_behavior/"
 
@@ -134,3 +137,80 @@ def test_open_side_stone_fail(params) -> None:
     with pytest.raises(Exception, match="Could not open side stone!"):
         behavior.open_side_stone(side_stone)
     init_tests.kill_feh()
+
+
+# MINIMAP_LOCALIZER -------------------------------------------------------------------------------
+
+
+def minimap_slice(test_number: str):
+    """
+    Crops the minimap slice from a recorded screenshot of the client.
+
+    """
+    image = cv2.imread(
+        os.path.dirname(__file__)
+        + "/haystacks/locations/mining-varrock-east/image_"
+        + test_number
+        + ".png",
+        cv2.IMREAD_GRAYSCALE,
+    )
+    (left, top, width, height) = vis.Regions(0, 0).minimap_slice
+    return image[top : top + height, left : left + width]
+
+
+def test_minimap_localizer() -> None:
+    haystack = cv2.imread(
+        os.path.dirname(__file__) + "/../ocvbot/haystacks/varrock-east-mine.png",
+        cv2.IMREAD_GRAYSCALE,
+    )
+    localizer = behavior.MinimapLocalizer(odometry=False)
+    (position, score) = localizer.locate(haystack, minimap_slice("002"))
+    assert position == (195, 356)
+    assert score > behavior.LOCALIZE_MIN_SCORE
+    # The player hasn't moved, so only their surroundings are searched.
+    assert localizer.locate(haystack, minimap_slice("006"))[0] == (195, 356)
+    # The player is somewhere else entirely, so the entire map is searched.
+    assert localizer.locate(haystack, minimap_slice("004"))[0] == (207, 192)
+    # Nothing matches, so the player's position is forgotten.
+    localizer.locate(haystack, minimap_slice("001"))
+    assert localizer.position is None
+    stats = localizer.stats()
+    assert stats["windowed"] == 1
+    assert stats["fallbacks"] == 2
+    assert stats["full_map"] == 3
+
+
+def test_minimap_localizer_odometry() -> None:
+    haystack = cv2.imread(
+        os.path.dirname(__file__) + "/../ocvbot/haystacks/varrock-east-mine.png",
+        cv2.IMREAD_GRAYSCALE,
+    )
+    localizer = behavior.MinimapLocalizer(odometry=True)
+    # Walk diagonally across the map.
+    for step in range(behavior.ODOMETRY_MAX_STEPS + 2):
+        (left, top) = (150 + step * 6, 200 + step * 4)
+        needle = haystack[top : top + 85, left : left + 85]
+        assert localizer.locate(haystack, needle)[0] == (left, top)
+    stats = localizer.stats()
+    # The first step and the step after the most estimates in a row are
+    #   matched against the map instead.
+    assert stats["odometry"] == behavior.ODOMETRY_MAX_STEPS
+    assert stats["odometry_rejects"] == 0
+
+
+def test_minimap_localizer_tiled_map(tmp_path) -> None:
+    haystack_map = cv2.imread(
+        os.path.dirname(__file__) + "/../ocvbot/haystacks/varrock-east-mine.png",
+        cv2.IMREAD_GRAYSCALE,
+    )
+    world = np.zeros((1500, 1500), dtype=np.uint8)
+    world[800:1361, 900:1281] = haystack_map
+    vis.write_tiled_map(world, str(tmp_path / "world"), tile_size=256)
+    tiled_map = vis.TiledMap(str(tmp_path / "world"), cache_path=str(tmp_path))
+
+    localizer = behavior.MinimapLocalizer(odometry=False)
+    assert localizer.locate(tiled_map, minimap_slice("002"))[0] == (1095, 1156)
+    tiled_map.tiles.clear()
+    assert localizer.locate(tiled_map, minimap_slice("006"))[0] == (1095, 1156)
+    # Only the tiles around the player were opened.
+    assert tiled_map.tiles.stats()["misses"] <= 4
@@ -0,0 +1,64 @@
+# coding=UTF-8
+"""
+Unit tests for the inventory.py module.
+
+Linux only. Requires feh.
+
+"""
+import os
+
+import pytest
+
+import init_tests
+
+# This statement exists to prevent the OCVBot imports from being re-ordered.
+pass
+
+# OCVBot modules must be imported after init_tests.
+from ocvbot import inventory
+
+# The inventory screenshots used by test_vision.py are reused here.
+image_directory = (os.path.dirname(__file__)) + "/test_vision/"
+empty_slots_directory = (os.path.dirname(__file__)) + "/test_inventory/"
+
+# INVENTORY ---------------------------------------------------------------------------------------
+
+inventory_pass_params = (
+    ("./needles/items/iron-bar.png", 27, "01"),
+    ("./needles/items/raw-anchovies.png", 8, "02"),
+    ("./needles/items/raw-anchovies.png", 0, "03"),
+    ("./needles/items/raw-anchovies.png", 18, "04"),
+)
+
+
+@pytest.mark.parametrize("params", inventory_pass_params)
+def test_inventory_count_pass(params) -> None:
+    needle_path, correct_number_of_needles, test_number = params
+    init_tests.feh("count_needles", "pass", test_number, image_directory)
+    contents = inventory.Inventory([needle_path], conf=0.988)
+    assert contents.count(needle_path) == correct_number_of_needles
+    assert len(contents.positions(needle_path)) == correct_number_of_needles
+    init_tests.kill_feh()
+
+
+def test_inventory_full() -> None:
+    init_tests.feh("count_needles", "pass", "01", image_directory)
+    contents = inventory.Inventory(
+        ["./needles/items/iron-bar.png", "./needles/items/hammer.png"]
+    )
+    assert contents.count("./needles/items/hammer.png") == 1
+    assert contents.is_full() is True
+    assert contents.free_slots() == []
+    init_tests.kill_feh()
+
+
+def test_inventory_empty_slots() -> None:
+    # Slot 0 holds a hammer, which isn't one of the items looked for, slots
+    #   1 to 7 hold iron bars and the rest are empty.
+    init_tests.feh("empty_slots", "pass", "01", empty_slots_directory)
+    contents = inventory.Inventory(["./needles/items/iron-bar.png"])
+    assert contents.slots[0] == inventory.UNKNOWN
+    assert contents.count("./needles/items/iron-bar.png") == 7
+    assert contents.free_slots() == list(range(8, 28))
+    assert contents.is_full() is False
+    init_tests.kill_feh()
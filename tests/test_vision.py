@@ -5,8 +5,14 @@ Unit tests for the vision.py module.
 Linux only. Requires feh.
 
 """
+import asyncio
+import json
 import os
+import time
+import zipfile
 
+import cv2
+import numpy as np
 import pytest
 
 import init_tests
@@ -15,6 +21,7 @@ import init_tests
 pass
 
 # OCVBot modules must be imported after init_tests.
+from ocvbot import startup as start
 from ocvbot import vision as vis
 
 image_directory = (os.path.dirname(__file__)) + "/test_vision/"
@@ -36,3 +43,587 @@ def test_count_needles_pass(params) -> None:
     result = vis.Vision(region=vis.INV, needle=needle_path, conf=0.988).count_needles()
     assert result == correct_number_of_needles
     init_tests.kill_feh()
+
+
+# NEEDLE_REGISTRY ---------------------------------------------------------------------------------
+
+
+def test_needle_registry() -> None:
+    registry = vis.NeedleRegistry()
+    assert registry.preload("./needles/items/") > 0
+    # Preloaded needles are hits, regardless of how their path is written.
+    registry.get("./needles/items/iron-bar.png")
+    registry.get("needles/items/iron-bar.png")
+    stats = registry.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 0
+    # Preloading the same needles again shouldn't decode anything.
+    assert registry.preload("./needles/items/iron-bar.png") == 0
+
+
+def test_needle_registry_scale() -> None:
+    registry = vis.NeedleRegistry()
+    needle = registry.get("./needles/items/iron-bar.png")
+    # Setting the scale must rescale the needles that are already decoded.
+    assert registry.set_scale(2.0) == 1
+    scaled = registry.get("./needles/items/iron-bar.png")
+    assert (scaled.width, scaled.height) == (needle.width * 2, needle.height * 2)
+    assert scaled.path == needle.path
+    assert registry.stats()["misses"] == 1
+
+
+# MAP_STORE ---------------------------------------------------------------------------------------
+
+
+def test_map_store(tmp_path) -> None:
+    haystack_map = (
+        os.path.dirname(__file__) + "/../ocvbot/haystacks/varrock-east-mine.png"
+    )
+    store = vis.MapStore(path=str(tmp_path), size=1)
+    image = store.get(haystack_map)
+    assert image.shape == (561, 381)
+    assert not image.flags.writeable
+    assert (image == cv2.imread(haystack_map, cv2.IMREAD_GRAYSCALE)).all()
+    assert store.get(haystack_map) is image
+    # Each level of the pyramid is half the size of the previous one, and is
+    #   converted from it.
+    assert store.get(haystack_map, level=1).shape == (281, 191)
+    # The map itself was evicted to make room for the pyramid level, and is
+    #   opened again without being converted.
+    assert store.get(haystack_map) is not image
+    stats = store.stats()
+    assert stats["hits"] == 2
+    assert stats["conversions"] == 2
+    assert stats["maps"] == 1
+
+
+# TILED_MAP ---------------------------------------------------------------------------------------
+
+
+def test_tiled_map(tmp_path) -> None:
+    haystack_map = cv2.imread(
+        os.path.dirname(__file__) + "/../ocvbot/haystacks/varrock-east-mine.png",
+        cv2.IMREAD_GRAYSCALE,
+    )
+    # Surround the map with an empty area, which isn't written as tiles.
+    world = np.zeros((1000, 800), dtype=np.uint8)
+    world[300:861, 200:581] = haystack_map
+    written = vis.write_tiled_map(world, str(tmp_path / "world"), tile_size=128)
+    assert written < (1000 // 128 + 1) * (800 // 128 + 1)
+
+    tiled_map = vis.TiledMap(str(tmp_path / "world"), cache_path=str(tmp_path))
+    assert tiled_map.shape == world.shape
+    assert tiled_map.tiles_within(0, 0, 128, 128) == []
+    assert tiled_map.tiles_within(240, 300, 30, 10) == [(1, 2), (2, 2)]
+    # Within a single tile, across several tiles, and past the map's edge.
+    for (top, left, height, width) in (
+        (260, 130, 100, 100),
+        (300, 200, 300, 300),
+        (900, 700, 200, 200),
+    ):
+        area = tiled_map[top : top + height, left : left + width]
+        assert (area == world[top : top + height, left : left + width]).all()
+
+    needle = world[500:585, 400:485].copy()
+    (position, score) = tiled_map.match(needle)
+    assert position == (400, 500)
+    assert score > 0.99
+    # A needle starting in a missing tile, e.g. near the map's top left edge.
+    assert (1, 1) not in tiled_map.tiles_within(128, 128, 128, 128)
+    needle = world[250:335, 190:275].copy()
+    (position, score) = tiled_map.match(needle)
+    assert position == (190, 250)
+    assert score > 0.99
+    assert tiled_map.tiles.stats()["maps"] <= vis.TILE_CACHE_SIZE
+
+
+# CLIENT_SCALE ------------------------------------------------------------------------------------
+
+
+def test_detect_scale() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    assert vis.detect_scale() == 1.0
+    init_tests.kill_feh()
+
+
+# FIND_ANY ----------------------------------------------------------------------------------------
+
+find_any_needles = [
+    "./needles/login-menu/orient-logged-out.png",
+    "./needles/minimap/orient.png",
+]
+
+
+def test_find_any_pass() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    needle, _ = vis.Vision(region=vis.CLIENT, conf=0.8).find_any(find_any_needles)
+    assert needle == "./needles/minimap/orient.png"
+    init_tests.kill_feh()
+
+
+def test_find_all_of_pass() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    result = vis.Vision(region=vis.CLIENT, conf=0.8).find_all_of(find_any_needles)
+    assert list(result) == ["./needles/minimap/orient.png"]
+    init_tests.kill_feh()
+
+
+# CLIENT_GEOMETRY ---------------------------------------------------------------------------------
+
+
+def test_window_manager_geometry() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    # feh's window shows the client screenshot at the window's top left corner.
+    origin = vis.WindowManagerGeometry(title="^feh").locate()
+    assert origin == vis.CLIENT[:2]
+    assert vis.probe_client(*origin) == "logged_in"
+    init_tests.kill_feh()
+
+
+def test_probe_client_fail() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    assert vis.probe_client(vis.CLIENT[0] + 5, vis.CLIENT[1]) is None
+    init_tests.kill_feh()
+
+
+def test_probe_client_display_origin(monkeypatch) -> None:
+    # Place the client screenshot so that the client's top left corner is at
+    #   the display's origin, where the probe's margin runs off the display.
+    screenshot = cv2.imread(image_directory + "test_orient/pass/test01/image_001.png")
+    needle = vis.NEEDLES.get("needles/minimap/orient.png")
+    result = vis.match_template(needle.color, screenshot, needle.mask)
+    (_, _, _, (needle_x, needle_y)) = cv2.minMaxLoc(result)
+    (offset_x, offset_y) = vis.ORIENT_NEEDLES["logged_in"][1]
+    client_left = needle_x - round(offset_x * vis.SCALE)
+    client_top = needle_y - round(offset_y * vis.SCALE)
+    display = np.zeros((vis.DISPLAY_HEIGHT, vis.DISPLAY_WIDTH, 3), dtype=np.uint8)
+    client = screenshot[client_top:, client_left:]
+    display[: client.shape[0], : client.shape[1]] = client
+
+    def capture(region):
+        (left, top, width, height) = region
+        assert left >= 0 and top >= 0
+        assert left + width <= vis.DISPLAY_WIDTH and top + height <= vis.DISPLAY_HEIGHT
+        return display[top : top + height, left : left + width]
+
+    monkeypatch.setattr(vis, "capture", capture)
+    assert vis.probe_client(0, 0) == "logged_in"
+    assert vis.probe_client(5, 0) is None
+
+
+# HINT_CACHE --------------------------------------------------------------------------------------
+
+
+def test_hint_cache() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    vis.HINTS.clear()
+    results = [
+        vis.Vision(
+            region=vis.CLIENT, needle="./needles/minimap/orient.png", conf=0.8
+        ).find_needle()
+        for _ in range(2)
+    ]
+    # The second search must find the same needle using the first one's hint.
+    assert results[0] == results[1]
+    stats = vis.HINTS.stats()
+    assert stats["cold"] == 1
+    assert stats["hits"] == 1
+    init_tests.kill_feh()
+
+
+# CALIBRATION_CACHE -------------------------------------------------------------------------------
+
+
+def test_calibration_cache(tmp_path) -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    vis.HINTS.clear()
+    vis.Vision(
+        region=vis.CLIENT, needle="./needles/minimap/orient.png", conf=0.8
+    ).find_needle()
+    ((needle_path, region), hint, score) = vis.HINTS.dump()[0]
+    assert score >= 0.8
+    vis.CalibrationCache(tmp_path / "calibration.json").save()
+
+    vis.HINTS.clear()
+    cache = vis.CalibrationCache(tmp_path / "calibration.json")
+    assert cache.load()
+    assert cache.origin == vis.CLIENT[:2]
+    # Hints must follow the client if it moved since they were saved.
+    assert cache.restore((vis.CLIENT[0] + 10, vis.CLIENT[1] + 20)) == 1
+    moved_region = (region[0] + 10, region[1] + 20, region[2], region[3])
+    assert vis.HINTS.dump() == [((needle_path, moved_region), hint, score)]
+    vis.HINTS.clear()
+    init_tests.kill_feh()
+
+
+# REGIONS -----------------------------------------------------------------------------------------
+
+
+def test_regions() -> None:
+    regions = vis.Regions(100, 50)
+    assert regions.inv == (648, 255, vis.INV_WIDTH, vis.INV_HEIGHT)
+    assert regions.minimap_center == (742, 135)
+    assert len(regions.inv_slots) == vis.INV_COLUMNS * vis.INV_ROWS
+    assert regions.inv_slots[5] == (648 + 15 + 42, 255 + 8 + 36, 36, 32)
+    assert len(regions.bank_slots) == vis.BANK_COLUMNS * vis.BANK_ROWS
+    assert [name for (name, _) in regions] == list(vis.Regions.NAMES)
+
+    # Rebasing must give the same regions as deriving them from scratch.
+    rebased = regions.rebase(7, 9)
+    fresh = vis.Regions(7, 9)
+    for name in vis.Regions.__slots__:
+        assert getattr(rebased, name) == getattr(fresh, name)
+    assert regions.origin == (100, 50)
+
+
+def test_regions_scale() -> None:
+    regions = vis.Regions(100, 50, scale=2.0)
+    assert regions.client == (100, 50, vis.CLIENT_WIDTH * 2, vis.CLIENT_HEIGHT * 2)
+    assert regions.inv == (100 + 1096, 50 + 410, vis.INV_WIDTH * 2, vis.INV_HEIGHT * 2)
+    assert regions.inv_slots[0] == (regions.inv[0] + 30, regions.inv[1] + 16, 72, 64)
+    assert regions.rebase(0, 0).scale == 2.0
+
+
+def test_region_globals() -> None:
+    for (name, region) in vis.REGIONS:
+        assert getattr(vis, name.upper()) == region
+
+
+# CLIENT_WATCHDOG ---------------------------------------------------------------------------------
+
+
+def test_client_watchdog() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    client = vis.CLIENT
+    inv = vis.INV
+    vis.WATCHDOG.clear()
+    assert vis.WATCHDOG.check()
+    assert vis.WATCHDOG.stats()["moves"] == 0
+    # Pretend the client was somewhere else when the regions were derived.
+    vis.set_regions(client[0] + 30, client[1] + 15)
+    assert vis.WATCHDOG.check()
+    assert vis.WATCHDOG.stats()["moves"] == 1
+    assert vis.CLIENT == client
+    assert vis.INV == inv
+    init_tests.kill_feh()
+
+
+# SHARED_FRAME ------------------------------------------------------------------------------------
+
+
+def test_frame_time() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    vis.invalidate_frame()
+    before = time.monotonic()
+    vis.get_haystack(vis.MINIMAP)
+    assert before <= vis.frame_time() <= time.monotonic()
+    # Searches of the same frame must report when it was captured.
+    captured = vis.frame_time()
+    vis.get_haystack(vis.INV)
+    assert vis.frame_time() == captured
+    init_tests.kill_feh()
+
+
+# FRAME_PRODUCER ----------------------------------------------------------------------------------
+
+
+def test_frame_producer() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    producer = vis.FrameProducer(fps=30, size=4)
+    producer.start()
+    try:
+        (frame, frame_id, _, region) = producer.wait_for_frame(0, timeout=1)
+        assert frame.shape == (vis.CLIENT[3], vis.CLIENT[2], 3)
+        assert region == vis.CLIENT
+        newer = producer.wait_for_frame(time.monotonic(), timeout=1)
+        assert newer[1] > frame_id
+        history = producer.history()
+        assert 0 < len(history) <= 3
+        assert [frame_id for (frame_id, _, _) in history] == sorted(
+            frame_id for (frame_id, _, _) in history
+        )
+    finally:
+        producer.stop()
+    assert not producer.running
+    init_tests.kill_feh()
+
+
+def test_frame_producer_history() -> None:
+    class Backend(vis.CaptureBackend):
+        def grab(self, region):
+            return np.zeros((region[3], region[2], 3), dtype=np.uint8)
+
+    producer = vis.FrameProducer(fps=30, size=4)
+    for _ in range(6):
+        producer._capture(Backend(), (0, 0, 20, 10))
+    # The oldest slot is left out, since it's about to be overwritten.
+    assert [frame_id for (frame_id, _, _) in producer.history()] == [4, 5, 6]
+    # Frames from before the client changed size must not be returned.
+    producer._capture(Backend(), (0, 0, 30, 10))
+    history = producer.history()
+    assert [frame_id for (frame_id, _, _) in history] == [7]
+    assert history[0][2].shape == (10, 30, 3)
+
+
+# FLIGHT_RECORDER ---------------------------------------------------------------------------------
+
+
+def test_flight_recorder(tmp_path) -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    recorder = vis.FlightRecorder(frames=4, path=str(tmp_path))
+    original = vis.RECORDER
+    vis.RECORDER = recorder
+    try:
+        vis.invalidate_frame()
+        vis.Vision(
+            region=vis.CLIENT, needle="./needles/minimap/orient.png", conf=0.8
+        ).find_needle()
+        vis.invalidate_frame()
+        with pytest.raises(start.NeedleError):
+            vis.Vision(
+                region=vis.CLIENT, needle="./needles/items/raw-anchovies.png", conf=0.99
+            ).find_needle()
+    finally:
+        vis.RECORDER = original
+    bundle_path = recorder.dump(RuntimeError("test"))
+    with zipfile.ZipFile(bundle_path) as bundle:
+        report = json.loads(bundle.read("report.json"))
+        assert "RuntimeError" in report["error"]
+        assert 1 <= len(report["frames"]) <= 5
+        for frame in report["frames"]:
+            assert frame["file"] in bundle.namelist()
+    (found, missed) = report["queries"]
+    assert found["matches"] == 1
+    assert missed["matches"] == 0
+    # The miss is given the score of its best match, which wasn't good enough.
+    assert 0 < missed["score"] < 0.99
+    assert recorder.stats()["dumps"] == 1
+    # A second report written within the same second must not replace the first.
+    assert recorder.dump() != bundle_path
+    assert bundle_path.exists()
+    init_tests.kill_feh()
+
+
+def test_flight_recorder_copies_frame(tmp_path) -> None:
+    recorder = vis.FlightRecorder(frames=4, path=str(tmp_path))
+    frame = np.full((32, 32, 3), 255, dtype=np.uint8)
+    recorder.record_frame(1, frame, 0.0)
+    # Recorded within RECORDER_INTERVAL of the first frame, so it's only kept
+    #   as the newest frame. Capture backends overwrite their arrays.
+    recorder.record_frame(2, frame, vis.RECORDER_INTERVAL / 2)
+    frame[:] = 0
+    with zipfile.ZipFile(recorder.dump(RuntimeError("test"))) as bundle:
+        jpeg = np.frombuffer(bundle.read("frame-2.jpg"), dtype=np.uint8)
+    assert cv2.imdecode(jpeg, cv2.IMREAD_COLOR).min() > 200
+
+
+# CHANGE_DETECTOR ---------------------------------------------------------------------------------
+
+
+def test_change_detector() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    vis.CHANGES.clear()
+    vision = vis.Vision(region=vis.MINIMAP, needle="./needles/minimap/orient.png")
+    first = vision.count_needles()
+    # The screen hasn't changed, so matching a new frame must be skipped.
+    vis.invalidate_frame()
+    assert vision.count_needles() == first
+    stats = vis.CHANGES.stats()
+    assert stats["checks"] == 2
+    assert stats["skips"] == 1
+    init_tests.kill_feh()
+
+
+# WAIT_UNTIL --------------------------------------------------------------------------------------
+
+
+def test_wait_until_pass() -> None:
+    polls = []
+    # Becomes true on the third poll.
+    result = vis.wait_until(lambda: polls.append(1) or len(polls) >= 3, timeout=5)
+    assert result is True
+    assert vis.WAITS.last_duration < 5
+
+
+def test_wait_until_fail() -> None:
+    with pytest.raises(start.TimeoutException):
+        vis.wait_until(lambda: False, timeout=0.2)
+    assert vis.WAITS.last_duration >= 0.2
+
+
+def test_wait_for_needle_pass() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    vision = vis.Vision(
+        region=vis.CLIENT, needle="./needles/minimap/orient.png", conf=0.8, timeout=2
+    )
+    assert vision.wait_for_needle()
+    init_tests.kill_feh()
+
+
+# FIRST_OF ----------------------------------------------------------------------------------------
+
+
+def test_first_of_pass() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    logged_in = vis.Vision(
+        region=vis.CLIENT, needle="./needles/minimap/orient.png", conf=0.8
+    ).appears()
+    logged_out = vis.Vision(
+        region=vis.CLIENT, needle="./needles/login-menu/orient-logged-out.png", conf=0.8
+    ).appears()
+    # The slower condition must be cancelled once the first one is met.
+    slow = asyncio.sleep(10, result=True)
+    condition, result = asyncio.run(vis.first_of(logged_out, logged_in, slow, timeout=5))
+    assert condition is logged_in
+    assert result
+    init_tests.kill_feh()
+
+
+def test_first_of_fail() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    logged_out = vis.Vision(
+        region=vis.CLIENT, needle="./needles/login-menu/orient-logged-out.png", conf=0.8
+    ).appears()
+    with pytest.raises(start.TimeoutException):
+        asyncio.run(vis.first_of(logged_out, timeout=0.5))
+    init_tests.kill_feh()
+
+
+# PIXEL -------------------------------------------------------------------------------------------
+
+compass_points = [((720, 10), (58, 52, 28)), ((750, 30), (49, 45, 34))]
+
+
+def test_pixel_pass() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    pixel = vis.Pixel(region=vis.CLIENT, points=compass_points, timeout=1)
+    result = pixel.wait_for_needle()
+    assert result == (vis.CLIENT[0] + 720, vis.CLIENT[1] + 10, 31, 21)
+    init_tests.kill_feh()
+
+
+def test_pixel_fail() -> None:
+    init_tests.feh("orient", "pass", "01", image_directory)
+    points = [(point, (255, 255, 255)) for (point, _) in compass_points]
+    pixel = vis.Pixel(region=vis.CLIENT, points=points, timeout=0.2)
+    assert pixel.count_needles() == 0
+    with pytest.raises(start.NeedleError):
+        pixel.wait_for_needle()
+    init_tests.kill_feh()
+
+
+# MATCH_BOXES -------------------------------------------------------------------------------------
+
+
+def test_match_boxes() -> None:
+    haystack = cv2.imread(image_directory + "test_count_needles/pass/test01/image_001.png")
+    needle = cv2.imread("./needles/items/iron-bar.png")
+    # Upscaling blurs the peaks of the matching result, so each item exceeds
+    #   the confidence at several neighboring positions.
+    haystack = cv2.resize(haystack, None, fx=2, fy=2, interpolation=cv2.INTER_NEAREST)
+    needle = cv2.resize(needle, None, fx=2, fy=2, interpolation=cv2.INTER_NEAREST)
+    assert len(vis.locate_all(needle, haystack, 0.8)) > 27
+    boxes, scores = vis.match_boxes(needle, haystack, 0.8)
+    assert len(boxes) == 27
+    assert (scores[:-1] >= scores[1:]).all()
+
+
+# LOCATE_EXACT ------------------------------------------------------------------------------------
+
+locate_exact_params = (
+    ("./needles/items/iron-bar.png", "01"),
+    ("./needles/items/raw-anchovies.png", "02"),
+    ("./needles/items/raw-anchovies.png", "04"),
+    ("./needles/items/hammer.png", "01"),
+)
+
+
+@pytest.mark.parametrize("params", locate_exact_params)
+def test_locate_exact(params) -> None:
+    needle_path, test_number = params
+    haystack = cv2.imread(
+        image_directory + "test_count_needles/pass/test" + test_number + "/image_001.png"
+    )
+    needle = cv2.imread(needle_path)
+    for image in (haystack, cv2.cvtColor(haystack, cv2.COLOR_BGR2GRAY)):
+        if image.ndim == 2:
+            needle = cv2.cvtColor(needle, cv2.COLOR_BGR2GRAY)
+        # The exact path must find the same matches as template matching.
+        ncc = vis.locate_all(needle, image, 0.9999, exact=False)
+        assert vis.locate_all(needle, image, 0.9999) == ncc
+        # A region cut from the haystack must be found where it was cut.
+        crop = image[100:130, 600:640]
+        assert (600, 100) in vis.locate_all(crop, image, 0.9999)
+        assert (600, 100) in vis.locate_all(crop, image, 0.9999, exact=False)
+
+
+def test_locate_exact_mask() -> None:
+    haystack = cv2.imread(image_directory + "test_count_needles/pass/test01/image_001.png")
+    needle = haystack[210:250, 560:600].copy()
+    mask = np.full(needle.shape[:2], 255, dtype=np.uint8)
+    mask[:10, :10] = 0
+    # Pixels the mask leaves out must not stop an exact match.
+    haystack[210:220, 560:570] = 255 - haystack[210:220, 560:570]
+    assert vis.locate_exact(needle, haystack) == []
+    assert vis.locate_exact(needle, haystack, mask=mask) == [(560, 210)]
+
+
+# MASKS -------------------------------------------------------------------------------------------
+
+
+def test_needle_alpha_mask(tmp_path) -> None:
+    needle = cv2.imread("./needles/items/raw-anchovies.png")
+    alpha = vis.mask_from_background(needle)
+    path = str(tmp_path / "raw-anchovies.png")
+    cv2.imwrite(path, cv2.merge((*cv2.split(needle), alpha)))
+    decoded = vis.NeedleRegistry().get(path)
+    assert (decoded.mask == alpha).all()
+    assert (decoded.color == needle).all()
+
+
+def test_needle_companion_mask(tmp_path) -> None:
+    needle = cv2.imread("./needles/items/raw-anchovies.png")
+    mask = vis.mask_from_background(needle)
+    path = tmp_path / "raw-anchovies.png"
+    cv2.imwrite(str(path), needle)
+    cv2.imwrite(str(path.with_suffix(vis.MASK_SUFFIX)), mask)
+    registry = vis.NeedleRegistry()
+    # Mask files must not be preloaded as needles.
+    assert registry.preload(str(tmp_path)) == 1
+    assert (registry.get(str(path)).mask == mask).all()
+
+
+def test_masked_match() -> None:
+    haystack = cv2.imread(image_directory + "test_count_needles/pass/test02/image_001.png")
+    needle = cv2.imread("./needles/items/raw-anchovies.png")
+    mask = vis.mask_from_background(needle)
+    # Ignoring the background raises the scores of raw anchovies without
+    #   raising those of cooked anchovies as much.
+    assert len(vis.match_boxes(needle, haystack, 0.995)[0]) == 0
+    assert len(vis.match_boxes(needle, haystack, 0.995, mask=mask)[0]) == 8
+
+
+# LOCATE_PYRAMID ----------------------------------------------------------------------------------
+
+locate_pyramid_params = (
+    ("./needles/minimap/orient.png", (1003, 517)),
+    ("./needles/minimap/orient.png", (2, 1)),
+    ("./needles/login-menu/orient-logged-out.png", (1150, 577)),
+)
+
+
+@pytest.mark.parametrize("params", locate_pyramid_params)
+def test_locate_pyramid(params) -> None:
+    needle_path, (left, top) = params
+    if "logged-out" in needle_path:
+        client = cv2.imread(
+            os.path.dirname(__file__) + "/haystacks/user-interface/login-menu/main-menu.png"
+        )
+    else:
+        client = cv2.imread(image_directory + "test_orient/pass/test01/image_001.png")
+    needle = cv2.imread(needle_path)
+    display = np.full((1080, 1920, 3), 60, dtype=np.uint8)
+    display[top : top + client.shape[0], left : left + client.shape[1]] = client
+    expected = vis.locate_all(needle, display, 0.8, 1)
+    assert expected
+    assert vis.locate_pyramid(needle, display, 0.8, 1) == expected
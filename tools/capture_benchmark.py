@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# coding=UTF-8
+"""
+Compares the screen capture latency of each capture backend for each of
+the main vision regions. The OSRS client must be visible on the display.
+
+Syntax:
+    python3 capture_benchmark.py [RUNS]
+
+Optional positional arguments:
+    RUNS (int): The number of captures from which to determine the average
+                latency, default is 50.
+
+"""
+import pathlib
+import sys
+import time
+
+# Ensure ocvbot files are added to sys.path.
+SCRIPTPATH = str(pathlib.Path(__file__).parent.parent.absolute())
+sys.path.insert(1, SCRIPTPATH)
+
+from ocvbot import vision as vis
+
+vis.init()
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+REGIONS = {
+    "INV": vis.INV,
+    "GAME_SCREEN": vis.GAME_SCREEN,
+    "MINIMAP_SLICE": vis.MINIMAP_SLICE,
+    "DISPLAY": vis.DISPLAY,
+}
+
+
+def benchmark(backend: vis.CaptureBackend, region: tuple[int, int, int, int]) -> float:
+    """
+    Returns the average number of miliseconds the backend takes to capture
+    the region.
+    """
+    # Warm up the backend so one-time setup isn't included in the average.
+    backend.grab(region)
+    start_time = time.perf_counter()
+    for _ in range(RUNS):
+        backend.grab(region)
+    return (time.perf_counter() - start_time) / RUNS * 1000
+
+
+def main() -> None:
+    results = {}
+    for name, backend_class in vis.CAPTURE_BACKENDS.items():
+        try:
+            backend = backend_class()
+        except OSError as error:
+            print(f"Skipping backend {name}: {error}")
+            continue
+        results[name] = {
+            region_name: benchmark(backend, region)
+            for region_name, region in REGIONS.items()
+        }
+        backend.close()
+
+    print(f"\nAverage capture latency over {RUNS} runs (miliseconds):\n")
+    print("Region".ljust(16) + "".join(name.rjust(12) for name in results))
+    for region_name in REGIONS:
+        row = region_name.ljust(16)
+        for name in results:
+            row += str(round(results[name][region_name], 2)).rjust(12)
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
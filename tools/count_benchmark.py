@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# coding=UTF-8
+"""
+Compares the speed and results of counting needles in full-inventory
+haystacks using PyScreeze's locateAll() (what count_needles() used to wrap)
+and vision.match_boxes(). Doesn't require the OSRS client.
+
+Syntax:
+    python3 count_benchmark.py [RUNS]
+
+Optional positional arguments:
+    RUNS (int): The number of counts from which to determine the average
+                duration, default is 100.
+
+"""
+import pathlib
+import sys
+import time
+
+import cv2
+
+# Ensure ocvbot files are added to sys.path.
+SCRIPTPATH = str(pathlib.Path(__file__).parent.parent.absolute())
+sys.path.insert(1, SCRIPTPATH)
+
+from ocvbot import vision as vis
+
+try:
+    import pyscreeze
+except ImportError:
+    pyscreeze = None
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+TESTS = pathlib.Path(SCRIPTPATH) / "tests"
+NEEDLES = pathlib.Path(SCRIPTPATH) / "ocvbot" / "needles" / "items"
+# Each haystack, the needle to count in it and the confidence to use. At
+#   lower confidences, a single item can match at several neighboring
+#   positions.
+HAYSTACKS = [
+    (TESTS / "test_vision/test_count_needles/pass/test01/image_001.png", "iron-bar", 0.95),
+    (TESTS / "test_vision/test_count_needles/pass/test02/image_001.png", "raw-anchovies", 0.95),
+    (TESTS / "test_vision/test_count_needles/pass/test04/image_001.png", "raw-anchovies", 0.988),
+    (TESTS / "haystacks/user-interface/side-stones/inventory/image_001.png", "iron-bar", 0.8),
+]
+# The position of the inventory within the client screenshots.
+INV_LEFT = 548
+INV_TOP = 205
+
+
+def benchmark(function) -> tuple[float, int]:
+    """
+    Returns the average number of miliseconds the function takes and the
+    count it returns.
+    """
+    count = function()
+    start_time = time.perf_counter()
+    for _ in range(RUNS):
+        function()
+    return ((time.perf_counter() - start_time) * 1000 / RUNS), count
+
+
+for (path, item, conf) in HAYSTACKS:
+    client = cv2.imread(str(path))
+    haystack = client[
+        INV_TOP : INV_TOP + vis.INV_HEIGHT, INV_LEFT : INV_LEFT + vis.INV_WIDTH
+    ].copy()
+    needle = cv2.imread(str(NEEDLES / (item + ".png")))
+    print(path.relative_to(TESTS), item, conf)
+
+    # count_needles() used to pass the needle's filepath, so PyScreeze decoded
+    #   it on every call.
+    if pyscreeze is not None:
+        (duration, count) = benchmark(
+            lambda: len(
+                list(
+                    pyscreeze.locateAll(
+                        str(NEEDLES / (item + ".png")),
+                        haystack,
+                        grayscale=False,
+                        confidence=conf,
+                    )
+                )
+            )
+        )
+        print("    pyscreeze.locateAll: %7.3f ms, %s matches" % (duration, count))
+
+    (duration, count) = benchmark(lambda: len(vis.locate_all(needle, haystack, conf)))
+    print("    vision.locate_all:   %7.3f ms, %s matches" % (duration, count))
+
+    (duration, count) = benchmark(
+        lambda: len(vis.match_boxes(needle, haystack, conf)[0])
+    )
+    print("    vision.match_boxes:  %7.3f ms, %s matches" % (duration, count))
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# coding=UTF-8
+"""
+Creates a companion mask file for a needle that excludes the needle's
+background from matching. The needle's top left pixel is assumed to be
+background. Check the resulting mask before committing it.
+
+Syntax:
+    python3 make_needle_mask.py NEEDLE [TOLERANCE]
+
+Positional arguments:
+    NEEDLE (str): Filepath to the needle.
+
+Optional positional arguments:
+    TOLERANCE (int): Pixels whose color channels all differ from the
+                     background by no more than this are excluded, default
+                     is 12.
+
+"""
+import pathlib
+import sys
+
+import cv2
+
+# Ensure ocvbot files are added to sys.path.
+SCRIPTPATH = str(pathlib.Path(__file__).parent.parent.absolute())
+sys.path.insert(1, SCRIPTPATH)
+
+from ocvbot import vision as vis
+
+needle_path = pathlib.Path(sys.argv[1])
+tolerance = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+
+needle = cv2.imread(str(needle_path), cv2.IMREAD_COLOR)
+mask = vis.mask_from_background(needle, tolerance)
+mask_path = needle_path.with_suffix(vis.MASK_SUFFIX)
+cv2.imwrite(str(mask_path), mask)
+print("Wrote %s, %.0f%% of pixels are matched." % (mask_path, mask.mean() / 2.55))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# coding=UTF-8
+"""
+Splits a large haystack map, such as a map of the entire world, into a
+tiled map that travel() can navigate without loading all of it. Areas of
+the map that are entirely black aren't written.
+
+Syntax:
+    python3 make_tiled_map.py MAP DIRECTORY [TILE_SIZE]
+
+Positional arguments:
+    MAP (str): Filepath to the map to split.
+    DIRECTORY (str): The directory to write the tiled map to.
+
+Optional positional arguments:
+    TILE_SIZE (int): The width and height of each tile, default is 256.
+
+"""
+import pathlib
+import sys
+
+import cv2
+
+# Ensure ocvbot files are added to sys.path.
+SCRIPTPATH = str(pathlib.Path(__file__).parent.parent.absolute())
+sys.path.insert(1, SCRIPTPATH)
+
+from ocvbot import vision as vis
+
+map_path = sys.argv[1]
+directory = sys.argv[2]
+tile_size = int(sys.argv[3]) if len(sys.argv) > 3 else vis.TILE_SIZE
+
+image = cv2.imread(map_path, cv2.IMREAD_GRAYSCALE)
+if image is None:
+    sys.exit("Could not read %s!" % map_path)
+tiles = vis.write_tiled_map(image, directory, tile_size)
+print(
+    "Wrote %s tiles of %s x %s pixels to %s." % (tiles, tile_size, tile_size, directory)
+)
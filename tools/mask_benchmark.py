@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# coding=UTF-8
+"""
+Compares the accuracy and speed of matching inventory items with and
+without a mask that excludes the needles' background. Uses the
+full-inventory screenshots from the test suite, so it doesn't require the
+OSRS client.
+
+Accuracy is reported as the margin between the lowest score of a slot that
+contains the item and the highest score of a slot that doesn't. The larger
+the margin, the more room there is to choose a confidence that separates
+them.
+
+Syntax:
+    python3 mask_benchmark.py [RUNS]
+
+Optional positional arguments:
+    RUNS (int): The number of matches from which to determine the average
+                duration, default is 20.
+
+"""
+import pathlib
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Ensure ocvbot files are added to sys.path.
+SCRIPTPATH = str(pathlib.Path(__file__).parent.parent.absolute())
+sys.path.insert(1, SCRIPTPATH)
+
+from ocvbot import inventory
+from ocvbot import vision as vis
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+TESTS = pathlib.Path(SCRIPTPATH) / "tests" / "test_vision" / "test_count_needles"
+NEEDLES = pathlib.Path(SCRIPTPATH) / "ocvbot" / "needles" / "items"
+# Each haystack, the item to match in it and the number of slots that
+#   contain it.
+HAYSTACKS = [
+    (TESTS / "pass/test01/image_001.png", "iron-bar", 27),
+    (TESTS / "pass/test02/image_001.png", "raw-anchovies", 8),
+    (TESTS / "pass/test04/image_001.png", "raw-anchovies", 18),
+]
+# The position of the inventory within the client screenshots.
+INV_LEFT = 548
+INV_TOP = 205
+
+
+def slot_scores(result: np.ndarray, needle: np.ndarray) -> np.ndarray:
+    """
+    Returns the best score within each inventory slot, in descending order.
+    """
+    scores = []
+    for slot in range(28):
+        (left, top) = inventory.slot_offset(slot)
+        scores.append(
+            result[
+                top : top + vis.INV_SLOT_HEIGHT - needle.shape[0] + 1,
+                left : left + vis.INV_SLOT_WIDTH - needle.shape[1] + 1,
+            ].max()
+        )
+    return np.sort(scores)[::-1]
+
+
+for (path, item, slots) in HAYSTACKS:
+    client = cv2.imread(str(path))
+    haystack = client[
+        INV_TOP : INV_TOP + vis.INV_HEIGHT, INV_LEFT : INV_LEFT + vis.INV_WIDTH
+    ].copy()
+    needle = cv2.imread(str(NEEDLES / (item + ".png")))
+    mask = vis.mask_from_background(needle)
+    print(
+        path.relative_to(TESTS),
+        item,
+        "(%.0f%% of pixels are matched)" % (mask.mean() / 2.55),
+    )
+
+    for (name, needle_mask) in (("unmasked", None), ("masked", mask)):
+        start_time = time.perf_counter()
+        for _ in range(RUNS):
+            result = vis.match_template(needle, haystack, needle_mask)
+        duration = (time.perf_counter() - start_time) * 1000 / RUNS
+
+        scores = slot_scores(result, needle)
+        (lowest_hit, highest_miss) = (scores[slots - 1], scores[slots])
+        print(
+            "    %-8s %6.2f ms, lowest hit %.4f, highest miss %.4f, margin %.4f"
+            % (name, duration, lowest_hit, highest_miss, lowest_hit - highest_miss)
+        )
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# coding=UTF-8
+"""
+Compares the accuracy and speed of locating the player on a haystack map
+by matching the entire map (what ocv_find_location() used to do), by
+matching around the last position, and by odometry between matches.
+Doesn't require the OSRS client.
+
+Each haystack map is walked along a random route. The minimap slice at
+each step is cropped from the map and degraded with noise and dots, since
+the minimap never matches the map exactly. The recorded screenshots of the
+Varrock east mine are also replayed in order.
+
+Syntax:
+    python3 odometry_benchmark.py [STEP] [SECONDS]
+
+Optional positional arguments:
+    STEP (int): The furthest the player moves between steps along each
+                axis, in haystack map pixels. Default is 20.
+    SECONDS (float): The number of seconds between steps, which determines
+                     how far the player could have moved. Default is 5,
+                     which is how long travel() usually waits between clicks.
+
+"""
+import pathlib
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Ensure ocvbot files are added to sys.path.
+SCRIPTPATH = str(pathlib.Path(__file__).parent.parent.absolute())
+sys.path.insert(1, SCRIPTPATH)
+
+from ocvbot import behavior
+from ocvbot import vision as vis
+
+STEP = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+SECONDS_PER_STEP = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+STEPS = 200
+MAPS = sorted((pathlib.Path(SCRIPTPATH) / "ocvbot" / "haystacks").glob("*.png"))
+RECORDING = pathlib.Path(SCRIPTPATH) / "tests" / "haystacks" / "locations"
+RECORDING = RECORDING / "mining-varrock-east"
+RNG = np.random.default_rng(0)
+
+
+def walk(haystack: np.ndarray) -> list:
+    """
+    Returns a random route across the map as a list of the true (left, top)
+    position of the minimap slice and the degraded slice at each step.
+    """
+    (map_height, map_width) = haystack.shape
+    (width, height) = (vis.MINIMAP_SLICE_WIDTH, vis.MINIMAP_SLICE_HEIGHT)
+    position = np.array([map_width - width, map_height - height]) // 2
+    direction = RNG.integers(-STEP, STEP + 1, 2)
+    route = []
+    for _ in range(STEPS):
+        # Mostly keep walking in the same direction.
+        if RNG.random() < 0.2:
+            direction = RNG.integers(-STEP, STEP + 1, 2)
+        position = np.clip(
+            position + direction, 0, [map_width - width, map_height - height]
+        )
+        (left, top) = position.tolist()
+        needle = haystack[top : top + height, left : left + width].astype(np.float32)
+        needle += RNG.normal(0, 8, needle.shape)
+        for (x, y) in RNG.integers(0, min(width, height) - 3, (6, 2)):
+            needle[y : y + 3, x : x + 3] = RNG.choice([40, 255])
+        route.append(((left, top), np.clip(needle, 0, 255).astype(np.uint8)))
+    return route
+
+
+def replay(name: str, haystack: np.ndarray, route: list, locate) -> None:
+    """
+    Prints the error and the average time per step of a way of locating the
+    player along the route.
+    """
+    errors = []
+    start_time = time.perf_counter()
+    for (step, (truth, needle)) in enumerate(route):
+        position = locate(haystack, needle, step * SECONDS_PER_STEP)
+        errors.append(max(abs(position[0] - truth[0]), abs(position[1] - truth[1])))
+    duration = (time.perf_counter() - start_time) * 1000 / len(route)
+    errors = np.array(errors)
+    print(
+        "    %-10s %7.3f ms/step, mean error %5.2f px, max %3d px, %3d steps off by > 4 px"
+        % (name, duration, errors.mean(), errors.max(), (errors > 4).sum())
+    )
+
+
+def full_map(haystack: np.ndarray, needle: np.ndarray, _) -> tuple[int, int]:
+    result = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+    return cv2.minMaxLoc(result)[3]
+
+
+def localizer(odometry: bool):
+    instance = behavior.MinimapLocalizer(odometry=odometry)
+    return (
+        lambda haystack, needle, now: instance.locate(haystack, needle, now=now)[0],
+        instance,
+    )
+
+
+def compare(haystack: np.ndarray, route: list) -> None:
+    replay("full map", haystack, route, full_map)
+    (windowed, _) = localizer(odometry=False)
+    replay("windowed", haystack, route, windowed)
+    (odometry, odometry_localizer) = localizer(odometry=True)
+    replay("odometry", haystack, route, odometry)
+    print("    odometry localizer stats:", odometry_localizer.stats())
+
+
+for path in MAPS:
+    haystack = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+    print("%s, random walk, up to %s px per step" % (path.name, STEP))
+    compare(haystack, walk(haystack))
+
+# The recording is mostly of the player standing still at the mine, so the
+#   true position is taken from matching the entire map.
+haystack = cv2.imread(
+    str(pathlib.Path(SCRIPTPATH) / "ocvbot" / "haystacks" / "varrock-east-mine.png"),
+    cv2.IMREAD_GRAYSCALE,
+)
+(left, top, width, height) = vis.Regions(0, 0).minimap_slice
+route = []
+for path in sorted(RECORDING.glob("*.png")):
+    needle = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)[
+        top : top + height, left : left + width
+    ]
+    result = cv2.matchTemplate(haystack, needle, cv2.TM_CCOEFF_NORMED)
+    (_, score, _, truth) = cv2.minMaxLoc(result)
+    # Skip screenshots in which the minimap is hidden.
+    if score >= behavior.LOCALIZE_MIN_SCORE:
+        route.append((truth, needle))
+print("%s, %s recorded screenshots" % (RECORDING.name, len(route)))
+compare(haystack, route)
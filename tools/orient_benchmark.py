@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# coding=UTF-8
+"""
+Compares how long orient() takes to locate the client on large displays
+when searching at full resolution and when using a coarse-to-fine pyramid
+search. Synthetic displays are built from a screenshot of the client
+pasted onto a cluttered desktop, so the OSRS client isn't required.
+
+Syntax:
+    python3 orient_benchmark.py [RUNS]
+
+Optional positional arguments:
+    RUNS (int): The number of searches from which to determine the average
+                duration, default is 3.
+
+"""
+import pathlib
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Ensure ocvbot files are added to sys.path.
+SCRIPTPATH = str(pathlib.Path(__file__).parent.parent.absolute())
+sys.path.insert(1, SCRIPTPATH)
+
+from ocvbot import vision as vis
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+TESTS = pathlib.Path(SCRIPTPATH) / "tests"
+NEEDLES = pathlib.Path(SCRIPTPATH) / "ocvbot" / "needles"
+# Each client screenshot and the orient needle to find in it.
+CLIENTS = [
+    (
+        TESTS / "test_vision/test_orient/pass/test01/image_001.png",
+        NEEDLES / "minimap/orient.png",
+    ),
+    (
+        TESTS / "haystacks/user-interface/login-menu/main-menu.png",
+        NEEDLES / "login-menu/orient-logged-out.png",
+    ),
+]
+DISPLAYS = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4K": (3840, 2160),
+    "Dual 4K": (7680, 2160),
+}
+
+
+def synthetic_display(
+    width: int, height: int, client: np.ndarray, rng: np.random.Generator
+) -> tuple[np.ndarray, tuple[int, int]]:
+    """
+    Returns a display of the given size cluttered with random windows, with
+    the client pasted at a random position, and the client's position.
+    """
+    display = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    display = cv2.GaussianBlur(display, (0, 0), 3)
+    for _ in range(40):
+        (left, top) = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        right = left + int(rng.integers(50, 800))
+        bottom = top + int(rng.integers(50, 600))
+        color = tuple(int(channel) for channel in rng.integers(0, 256, 3))
+        cv2.rectangle(display, (left, top), (right, bottom), color, -1)
+        cv2.putText(
+            display,
+            "Lorem ipsum",
+            (left + 5, top + 30),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            1,
+            0,
+            2,
+        )
+    (client_height, client_width) = client.shape[:2]
+    left = int(rng.integers(0, width - client_width))
+    top = int(rng.integers(0, height - client_height))
+    display[top : top + client_height, left : left + client_width] = client
+    return display, (left, top)
+
+
+def benchmark(function) -> tuple[float, list]:
+    """
+    Returns the average number of miliseconds the function takes and what
+    it returns.
+    """
+    result = function()
+    start_time = time.perf_counter()
+    for _ in range(RUNS):
+        function()
+    return ((time.perf_counter() - start_time) * 1000 / RUNS), result
+
+
+rng = np.random.default_rng(0)
+for (client_path, needle_path) in CLIENTS:
+    client = cv2.imread(str(client_path))
+    needle = cv2.imread(str(needle_path))
+    expected = vis.locate_all(needle, client, 0.8, 1)[0]
+    print(client_path.relative_to(TESTS), "levels:", vis._pyramid_levels(needle))
+
+    for (name, (width, height)) in DISPLAYS.items():
+        (display, (left, top)) = synthetic_display(width, height, client, rng)
+        correct = [(left + expected[0], top + expected[1])]
+
+        (full_ms, full) = benchmark(lambda: vis.locate_all(needle, display, 0.8, 1))
+        (pyramid_ms, pyramid) = benchmark(
+            lambda: vis.locate_pyramid(needle, display, 0.8, 1)
+        )
+        print(
+            "    %-8s full %8.1f ms (%s), pyramid %7.1f ms (%s), %.0fx faster"
+            % (
+                name,
+                full_ms,
+                "found" if full == correct else "MISSED",
+                pyramid_ms,
+                "found" if pyramid == correct else "MISSED",
+                full_ms / pyramid_ms,
+            )
+        )